@@ -1,12 +1,14 @@
 from pathlib import Path
 from pkg_resources import get_distribution
 
+from .dispatch import interval_difference
 from .log import setup_logging
 
 setup_logging()
 
 __all__ = [
     "__version__",
+    "interval_difference",
 ]
 
 __version__ = get_distribution(Path(__file__).parent.name).version
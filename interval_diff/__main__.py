@@ -1,7 +1,18 @@
 import argparse
 import sys
 
-from .benchmark import benchmark
+from .benchmark import (
+    benchmark,
+    benchmark_allocations,
+    benchmark_async,
+    benchmark_batch,
+    benchmark_bitmap,
+    benchmark_wide,
+    calibrate,
+)
+from .divergence import DEFAULT_FIXTURES_DIR
+from .globals import INTERVAL_COL_NAMES
+from .streaming import DEFAULT_CHUNK_SIZE, STDIO_PATH, diff_files
 
 
 def parse_cli_input():
@@ -26,12 +37,205 @@ def parse_cli_input():
         action="store_true",
         help="Whether to benchmark dataframes as well",
     )
+    parser.add_argument(
+        "--structured",
+        action="store_true",
+        help="Whether to benchmark structured arrays with metadata fields instead",
+    )
+    parser.add_argument(
+        "--no-check",
+        dest="check",
+        action="store_false",
+        help="skip checking that the backends agree.",
+    )
+    parser.add_argument(
+        "--fixtures-dir",
+        default=DEFAULT_FIXTURES_DIR,
+        help="directory to save reproducers of divergent results to.",
+    )
+    parser.add_argument(
+        "--suite",
+        "-s",
+        choices=["backends", "batch", "async", "alloc", "bitmap", "wide"],
+        default="backends",
+        help=(
+            "benchmark to run, 'batch' compares batched calls against a loop of single calls, "
+            "'async' compares event loop latency for blocking and offloaded calls, 'alloc' "
+            "compares memory allocated by repeated calls with and without a workspace, 'bitmap' "
+            "compares the bitmap and vectorised backends on dense grid-aligned intervals, 'wide' "
+            "compares ways of reattaching metadata of dataframes with many columns."
+        ),
+    )
+    parser.add_argument(
+        "--n-pairs",
+        "-p",
+        type=int,
+        help="number of (A, B) pairs in each sample of the batch benchmark.",
+    )
+    parser.add_argument(
+        "--n-jobs",
+        "-j",
+        type=int,
+        help="number of concurrent jobs in each sample of the async benchmark.",
+    )
+    parser.add_argument(
+        "--n-groups",
+        "-g",
+        type=int,
+        help="number of groups in B in each sample of the bitmap benchmark.",
+    )
+    parser.add_argument(
+        "--n-columns",
+        "-m",
+        type=int,
+        help="number of metadata columns of A in each sample of the wide benchmark.",
+    )
+    parser.add_argument(
+        "--n-calls",
+        "-c",
+        type=int,
+        help="number of repeated calls in each sample of the alloc benchmark.",
+    )
+
+    subparsers = parser.add_subparsers(dest="command")
+    diff_parser = subparsers.add_parser(
+        "diff",
+        help="Compute A \\ B between two interval files (CSV, Parquet or .npy).",
+    )
+    diff_parser.add_argument("path_a", help="file containing intervals A, sorted by start.")
+    diff_parser.add_argument("path_b", help="file containing intervals B, sorted by start.")
+    diff_parser.add_argument(
+        "--output",
+        "-o",
+        dest="path_out",
+        default=STDIO_PATH,
+        help="file to write A \\ B to (CSV on stdout by default).",
+    )
+    diff_parser.add_argument(
+        "--min-len",
+        type=float,
+        default=0.0,
+        help="minimum length of intervals to keep.",
+    )
+    diff_parser.add_argument(
+        "--by",
+        nargs="+",
+        help="columns to group by, A is only clipped by B within matching groups.",
+    )
+    diff_parser.add_argument(
+        "--start-col",
+        default=INTERVAL_COL_NAMES[0],
+        help="name of the column holding interval starts.",
+    )
+    diff_parser.add_argument(
+        "--end-col",
+        default=INTERVAL_COL_NAMES[1],
+        help="name of the column holding interval ends.",
+    )
+    diff_parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=DEFAULT_CHUNK_SIZE,
+        help="maximum number of rows to read from a file at once.",
+    )
+
+    calibrate_parser = subparsers.add_parser(
+        "calibrate",
+        help="Fit the backend dispatch cost model to timings on this machine.",
+    )
+    calibrate_parser.add_argument(
+        "--n-intervals",
+        "-n",
+        nargs="*",
+        type=int,
+        help="number of intervals in A in each sample.",
+    )
+    calibrate_parser.add_argument(
+        "--n-samples",
+        "-k",
+        type=int,
+        help="number of random samples for each size and ratio.",
+    )
+    calibrate_parser.add_argument(
+        "--ratios",
+        "-r",
+        nargs="*",
+        type=float,
+        help="ratios of the number of intervals in B to the number of intervals in A.",
+    )
+    calibrate_parser.add_argument(
+        "--profile",
+        help="file to save the profile to (the profile of this machine by default).",
+    )
 
     return parser.parse_args()
 
 
 def main():
-    benchmark(**vars(parse_cli_input()))
+    args = parse_cli_input()
+    if args.command == "diff":
+        diff_files(
+            args.path_a,
+            args.path_b,
+            args.path_out,
+            min_len=args.min_len,
+            by=args.by,
+            start_col=args.start_col,
+            end_col=args.end_col,
+            chunk_size=args.chunk_size,
+        )
+        return
+    if args.command == "calibrate":
+        calibrate(
+            n_intervals=args.n_intervals,
+            n_samples=args.n_samples,
+            ratios=args.ratios,
+            path=args.profile,
+        )
+        return
+    if args.suite == "batch":
+        benchmark_batch(
+            n_pairs=args.n_pairs,
+            n_intervals=args.n_intervals,
+            n_samples=args.n_samples,
+        )
+        return
+    if args.suite == "async":
+        benchmark_async(
+            n_jobs=args.n_jobs,
+            n_intervals=args.n_intervals,
+            n_samples=args.n_samples,
+        )
+        return
+    if args.suite == "bitmap":
+        benchmark_bitmap(
+            n_groups=args.n_groups,
+            n_intervals=args.n_intervals,
+            n_samples=args.n_samples,
+        )
+        return
+    if args.suite == "wide":
+        benchmark_wide(
+            n_columns=args.n_columns,
+            n_intervals=args.n_intervals,
+            n_samples=args.n_samples,
+        )
+        return
+    if args.suite == "alloc":
+        benchmark_allocations(
+            n_calls=args.n_calls,
+            n_intervals=args.n_intervals,
+            n_samples=args.n_samples,
+        )
+        return
+    benchmark(
+        n_intervals=args.n_intervals,
+        n_samples=args.n_samples,
+        dataframes=args.dataframes,
+        check=args.check,
+        fixtures_dir=args.fixtures_dir,
+        structured=args.structured,
+    )
 
 
 if __name__ == "__main__":
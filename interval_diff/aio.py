@@ -0,0 +1,190 @@
+"""Asyncio-friendly versions of the interval operations.
+
+Heavy computations are offloaded to an executor so they don't block the event loop. The default
+thread pool works well since NumPy releases the GIL for sorting and accumulating arrays, and a
+process pool can be used instead for pure-Python backends. A semaphore limits how many heavy jobs
+run at once.
+"""
+
+import asyncio
+import os
+import weakref
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import AsyncIterable, AsyncIterator, Callable, Iterable, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+from numpy.typing import NDArray
+
+from . import vectorised
+from .streaming import (
+    IntervalChunk,
+    IntervalWindow,
+    check_sorted,
+    interval_bounds,
+    window_difference,
+)
+
+DEFAULT_MAX_CONCURRENCY = os.cpu_count() or 1
+
+_default_engine = None
+
+
+class AsyncIntervalEngine:
+    """Run interval operations in an executor, limiting the number of concurrent jobs.
+
+    Args:
+        executor: Executor to run jobs in, a new pool is created (and shut down on `close`) if
+            `None`.
+        max_concurrency: Maximum number of jobs to run at once, further jobs wait for a free slot.
+        processes: Whether to create a process pool instead of a thread pool when no executor is
+            given.
+    """
+
+    def __init__(
+        self,
+        executor: Optional[Executor] = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        processes: bool = False,
+    ):
+        self._owns_executor = executor is None
+        if executor is None:
+            pool = ProcessPoolExecutor if processes else ThreadPoolExecutor
+            executor = pool(max_workers=max_concurrency)
+        self.executor = executor
+        self.max_concurrency = max_concurrency
+        self._semaphores = weakref.WeakKeyDictionary()
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        # Semaphores are bound to the loop they're first used in, so each running loop gets its
+        # own and the engine can be reused across `asyncio.run` calls
+        loop = asyncio.get_running_loop()
+        if loop not in self._semaphores:
+            self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphores[loop]
+
+    async def run(self, func: Callable, *args, **kwargs):
+        """Run `func(*args, **kwargs)` in the executor once a slot is free."""
+        async with self.semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, partial(func, *args, **kwargs))
+
+    async def interval_difference(
+        self,
+        intervals_a: Union[NDArray, pd.DataFrame],
+        intervals_b: Union[NDArray, pd.DataFrame, List[Union[NDArray, pd.DataFrame]]],
+        **kwargs,
+    ):
+        """Async version of `vectorised.interval_difference`."""
+        return await self.run(vectorised.interval_difference, intervals_a, intervals_b, **kwargs)
+
+    async def batch_interval_difference(
+        self,
+        a_values: NDArray,
+        a_offsets: NDArray,
+        b_values: NDArray,
+        b_offsets: NDArray,
+        **kwargs,
+    ):
+        """Async version of `vectorised.batch_interval_difference`."""
+        return await self.run(
+            vectorised.batch_interval_difference, a_values, a_offsets, b_values, b_offsets, **kwargs
+        )
+
+    async def stream_interval_difference(
+        self,
+        chunks_a: Union[AsyncIterable[IntervalChunk], Iterable[IntervalChunk]],
+        chunks_b: Union[AsyncIterable[IntervalChunk], Iterable[IntervalChunk]],
+        min_len: float = 0.0,
+        by: Optional[List[str]] = None,
+    ) -> AsyncIterator[IntervalChunk]:
+        """Async version of `streaming.stream_interval_difference`.
+
+        Chunks can come from async or regular iterators, and are only pulled from the inputs as
+        the results are consumed.
+        """
+        chunks_b = _aiter(chunks_b)
+        window = IntervalWindow()
+        last_start_a = -np.inf
+        async for chunk_a in _aiter(chunks_a):
+            if len(chunk_a) == 0:
+                continue
+            starts_a, ends_a = interval_bounds(chunk_a)
+            last_start_a = check_sorted(starts_a, last_start_a, "A")
+
+            # Buffering B concatenates and filters whole chunks, so it runs in a thread as well
+            # (not the engine's executor, which may be a process pool that can't update `window`)
+            while window.needs(ends_a.max()):
+                await _run_in_thread(window.extend, await _anext(chunks_b))
+            await _run_in_thread(window.drop_before, starts_a.min())
+
+            yield await self.run(window_difference, chunk_a, window, min_len=min_len, by=by)
+
+    def close(self):
+        """Shut down the executor if it was created by the engine."""
+        if self._owns_executor:
+            self.executor.shutdown(wait=True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def get_default_engine() -> AsyncIntervalEngine:
+    """Get the engine used by the module-level functions, creating it if needed."""
+    global _default_engine  # pylint: disable=global-statement
+    if _default_engine is None:
+        _default_engine = AsyncIntervalEngine()
+    return _default_engine
+
+
+def set_default_engine(engine: Optional[AsyncIntervalEngine]):
+    """Set the engine used by the module-level functions."""
+    global _default_engine  # pylint: disable=global-statement
+    _default_engine = engine
+
+
+async def interval_difference(intervals_a, intervals_b, **kwargs):
+    """Async version of `vectorised.interval_difference` using the default engine."""
+    return await get_default_engine().interval_difference(intervals_a, intervals_b, **kwargs)
+
+
+async def batch_interval_difference(a_values, a_offsets, b_values, b_offsets, **kwargs):
+    """Async version of `vectorised.batch_interval_difference` using the default engine."""
+    return await get_default_engine().batch_interval_difference(
+        a_values, a_offsets, b_values, b_offsets, **kwargs
+    )
+
+
+async def stream_interval_difference(chunks_a, chunks_b, **kwargs):
+    """Async version of `streaming.stream_interval_difference` using the default engine."""
+    async for result in get_default_engine().stream_interval_difference(
+        chunks_a, chunks_b, **kwargs
+    ):
+        yield result
+
+
+async def _run_in_thread(func: Callable, *args):
+    return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+
+async def _aiter_sync(iterable):
+    for item in iterable:
+        yield item
+
+
+def _aiter(iterable):
+    if hasattr(iterable, "__aiter__"):
+        return iterable.__aiter__()
+    return _aiter_sync(iterable)
+
+
+async def _anext(iterator):
+    try:
+        return await iterator.__anext__()
+    except StopAsyncIteration:
+        return None
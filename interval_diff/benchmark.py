@@ -1,35 +1,66 @@
 import time
+import asyncio
+import platform
+import tracemalloc
 import logging
+from functools import partial
 from itertools import product
 from collections import defaultdict
-from typing import Optional, List, Callable, Tuple, Any
+from pathlib import Path
+from typing import Optional, List, Callable, Dict, Tuple, Any, Union
 
 import numpy as np
 import pandas as pd
 from tqdm import tqdm
-from interval_diff.globals import INTERVAL_COL_NAMES
 
+from interval_diff.aio import AsyncIntervalEngine
+from interval_diff.bitmap import interval_difference as bitmap_diff
+from interval_diff.dispatch import CostModel, automatic_backends, cost_features, save_profile
+from interval_diff.divergence import DEFAULT_FIXTURES_DIR, DivergenceRecorder
 from interval_diff.vectorised import interval_difference as vec_diff
+from interval_diff.vectorised import batch_interval_difference
 from interval_diff.non_vectorised import interval_difference as nonvec_diff
-from interval_diff.utils import generate_random_intervals
-from interval_diff.vis import plot_intervals
+from interval_diff.globals import INTERVAL_COL_NAMES
+from interval_diff.utils import (
+    generate_random_intervals,
+    interval_values,
+    take_intervals,
+    to_ragged,
+)
+from interval_diff.workspace import Workspace
 
 np.random.seed(1234)
 
 DEFAULT_N_INTERVALS = [20, 100, 500, 1000, 2000, 5000, 10000]
 DEFAULT_N_SAMPLES = 3
 DEFAULT_DF = False
+DEFAULT_N_PAIRS = 1000
+DEFAULT_BATCH_N_INTERVALS = [5, 20, 100]
+DEFAULT_N_JOBS = 8
+DEFAULT_ASYNC_N_INTERVALS = [1000, 10000, 100000]
+HEARTBEAT_INTERVAL = 0.001
+DEFAULT_N_CALLS = 100
+DEFAULT_CALIBRATION_N_INTERVALS = [10, 30, 100, 300, 1000]
+DEFAULT_CALIBRATION_RATIOS = [0.1, 1.0, 10.0]
+MIN_CALIBRATION_TIME = 0.01
+DEFAULT_N_GROUPS = 4
+DEFAULT_BITMAP_N_INTERVALS = [1000, 10000, 100000, 1000000]
+DEFAULT_N_COLUMNS = 64
+DEFAULT_WIDE_N_INTERVALS = [1000, 10000, 100000]
 DATAFRAME = True
 
 
 logger = logging.getLogger(__name__)
 
+
 # TODO test
 def benchmark(
     n_intervals: Optional[List[int]] = None,
     n_samples: Optional[int] = None,
     dataframes: Optional[bool] = None,
-    inspect: bool = True,
+    check: bool = True,
+    fixtures_dir: Optional[str] = DEFAULT_FIXTURES_DIR,
+    structured: bool = False,
 ):
     if n_intervals is None:
         n_intervals = DEFAULT_N_INTERVALS
@@ -40,7 +71,9 @@ def benchmark(
     if dataframes is None:
         dataframes = DEFAULT_DF
 
+    mode = "rec" if structured else "pd" if dataframes else "np"
     times = [defaultdict(list) for _ in n_intervals]
+    recorder = DivergenceRecorder(fixtures_dir=fixtures_dir)
 
     # pylint: disable=invalid-name
     for (i, n), _ in tqdm(
@@ -49,29 +82,474 @@ def benchmark(
         miniters=1,
         bar_format="{l_bar}{bar}| {n_fmt}/{total_fmt} [{elapsed}{postfix}]",
     ):
-        intervals_a = generate_random_intervals(n, start=100, max_len=100, dataframe=dataframes)
-        intervals_b = generate_random_intervals(n, start=0, max_len=80, dataframe=dataframes)
+        intervals_a = generate_random_intervals(
+            n, start=100, max_len=100, dataframe=dataframes, structured=structured
+        )
+        intervals_b = generate_random_intervals(
+            n, start=0, max_len=80, dataframe=dataframes, structured=structured
+        )
 
-        results = []
+        funcs, results = {}, {}
         for vec in [True, False]:
-            key = "_".join([("vec" if vec else "nonvec"), ("pd" if dataframes else "np")])
-            elapsed, result = _time_func_run(
-                vec_diff if vec else nonvec_diff,
-                intervals_a,
-                intervals_b,
-            )
+            key = "_".join([("vec" if vec else "nonvec"), mode])
+            funcs[key] = vec_diff if vec else nonvec_diff
+            elapsed, results[key] = _time_func_run(funcs[key], intervals_a, intervals_b)
             times[i][key].append(elapsed)
-            results.append(result)
 
-        if inspect:
-            _inspect_if_unequal(*results, intervals_a, intervals_b)
+        if check:
+            recorder.check(funcs, results, intervals_a, intervals_b)
+
+    _print_table(times, n_intervals, n_samples, mode)
+    _write_csv(times, n_intervals, n_samples, mode)
+    _print_divergences(recorder)
+
+
+def benchmark_batch(
+    n_pairs: Optional[int] = None,
+    n_intervals: Optional[List[int]] = None,
+    n_samples: Optional[int] = None,
+):
+    """Compare `batch_interval_difference` against a loop of single `interval_difference` calls.
+
+    Args:
+        n_pairs: Number of (A, B) pairs in each sample.
+        n_intervals: Number of intervals in each A and B.
+        n_samples: Number of random samples to run algorithms.
+    """
+    if n_pairs is None:
+        n_pairs = DEFAULT_N_PAIRS
+
+    def make_inputs(n):
+        groups_a = [generate_random_intervals(n, start=100, max_len=100) for _ in range(n_pairs)]
+        groups_b = [generate_random_intervals(n, start=0, max_len=80) for _ in range(n_pairs)]
+        (a_values, a_offsets), (b_values, b_offsets) = to_ragged(groups_a), to_ragged(groups_b)
+        return dict(
+            groups_a=groups_a,
+            groups_b=groups_b,
+            a_values=a_values,
+            a_offsets=a_offsets,
+            b_values=b_values,
+            b_offsets=b_offsets,
+        )
+
+    _benchmark_sizes(
+        f"[batch] Intervals (x{n_pairs})",
+        DEFAULT_BATCH_N_INTERVALS if n_intervals is None else n_intervals,
+        n_samples,
+        make_inputs,
+        funcs={
+            "loop": lambda groups_a, groups_b, **_: _loop_diff(groups_a, groups_b),
+            "batch": lambda groups_a, groups_b, **ragged: batch_interval_difference(**ragged),
+        },
+        columns={"loop": "Loop mean (s)", "batch": "Batch mean (s)"},
+    )
+
+
+def benchmark_async(
+    n_jobs: Optional[int] = None,
+    n_intervals: Optional[List[int]] = None,
+    n_samples: Optional[int] = None,
+):
+    """Compare event loop latency under concurrent load for blocking and offloaded calls.
+
+    A heartbeat task measures how late the event loop wakes it up while `n_jobs` concurrent
+    differences are computed, either directly in coroutines or through an `AsyncIntervalEngine`.
+
+    Args:
+        n_jobs: Number of concurrent differences in each sample.
+        n_intervals: Number of intervals in each A and B.
+        n_samples: Number of random samples to run algorithms.
+    """
+    if n_jobs is None:
+        n_jobs = DEFAULT_N_JOBS
+
+    def make_inputs(n):
+        pairs = [
+            (
+                generate_random_intervals(n, start=100, max_len=100),
+                generate_random_intervals(n, start=0, max_len=80),
+            )
+            for _ in range(n_jobs)
+        ]
+        return dict(pairs=pairs)
+
+    # The lag and the total time of each mode come from separate runs
+    blocking = partial(_concurrent_lag, offload=False)
+    offload = partial(_concurrent_lag, offload=True)
+    _benchmark_sizes(
+        f"[async] Intervals (x{n_jobs})",
+        DEFAULT_ASYNC_N_INTERVALS if n_intervals is None else n_intervals,
+        n_samples,
+        make_inputs,
+        funcs={"blocking_total": blocking, "offload_total": offload},
+        measures={"blocking_lag": blocking, "offload_lag": offload},
+        columns={
+            "blocking_lag": "Blocking lag (s)",
+            "offload_lag": "Offload lag (s)",
+            "blocking_total": "Blocking total (s)",
+            "offload_total": "Offload total (s)",
+        },
+    )
+
+
+def benchmark_allocations(
+    n_calls: Optional[int] = None,
+    n_intervals: Optional[List[int]] = None,
+    n_samples: Optional[int] = None,
+):
+    """Compare memory allocated by repeated `interval_difference` calls with and without workspace.
+
+    Each sample makes `n_calls` calls on random inputs of the same size, and records the peak
+    memory traced during a call and the number of buffers the workspace had to allocate after
+    warming up.
+
+    Args:
+        n_calls: Number of calls in each sample.
+        n_intervals: Number of intervals in each A and B.
+        n_samples: Number of random samples to run algorithms.
+    """
+    if n_calls is None:
+        n_calls = DEFAULT_N_CALLS
+
+    def make_inputs(n):
+        pairs = [
+            (
+                generate_random_intervals(n, start=100, max_len=100),
+                generate_random_intervals(n, start=0, max_len=80),
+            )
+            for _ in range(n_calls)
+        ]
+        # Warm up the workspace, so only steady-state allocations are measured
+        workspace = Workspace()
+        vec_diff(*pairs[0], workspace=workspace)
+        return dict(pairs=pairs, workspace=workspace, n_allocations=workspace.n_allocations)
+
+    _benchmark_sizes(
+        f"[alloc] Intervals (x{n_calls})",
+        DEFAULT_N_INTERVALS if n_intervals is None else n_intervals,
+        n_samples,
+        make_inputs,
+        funcs={
+            "alloc_time": lambda pairs, **_: _pairs_diff(pairs),
+            "workspace_time": lambda pairs, workspace, **_: _pairs_diff(pairs, workspace=workspace),
+        },
+        measures={
+            "alloc_peak": lambda pairs, **_: _peak_memory(pairs) / 1024,
+            "workspace_peak": lambda pairs, workspace, **_: (
+                _peak_memory(pairs, workspace=workspace) / 1024
+            ),
+            "buffers": lambda workspace, n_allocations, **_: (
+                workspace.n_allocations - n_allocations
+            ),
+        },
+        columns={
+            "alloc_peak": "Peak (KiB)",
+            "workspace_peak": "Workspace peak (KiB)",
+            "buffers": "Workspace buffers",
+            "alloc_time": "Total (s)",
+            "workspace_time": "Workspace total (s)",
+        },
+    )
+
+
+def _peak_memory(pairs, **kwargs):
+    tracemalloc.start()
+    try:
+        peak = 0
+        for intervals_a, intervals_b in pairs:
+            tracemalloc.reset_peak()
+            baseline, _ = tracemalloc.get_traced_memory()
+            vec_diff(intervals_a, intervals_b, **kwargs)
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - baseline)
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def _pairs_diff(pairs, **kwargs):
+    return [vec_diff(intervals_a, intervals_b, **kwargs) for intervals_a, intervals_b in pairs]
+
+
+def benchmark_bitmap(
+    n_groups: Optional[int] = None,
+    n_intervals: Optional[List[int]] = None,
+    n_samples: Optional[int] = None,
+):
+    """Compare the bitmap backend against the vectorised backend on dense, grid-aligned intervals.
+
+    Each sample chops `n_groups` overlapping groups of B out of A, with every bound on an integer
+    grid.
+
+    Args:
+        n_groups: Number of groups in B.
+        n_intervals: Number of intervals in A and each group of B.
+        n_samples: Number of random samples to run algorithms.
+    """
+    if n_groups is None:
+        n_groups = DEFAULT_N_GROUPS
+
+    def make_inputs(n):
+        intervals_a = generate_random_intervals(n, start=100, max_len=20, min_len=1, precision=0)
+        groups_b = [
+            generate_random_intervals(n, start=7 * j, max_len=20, min_len=1, precision=0)
+            for j in range(n_groups)
+        ]
+        return dict(intervals_a=intervals_a, intervals_b=groups_b)
+
+    _benchmark_sizes(
+        f"[bitmap] Intervals (x{n_groups + 1})",
+        DEFAULT_BITMAP_N_INTERVALS if n_intervals is None else n_intervals,
+        n_samples,
+        make_inputs,
+        funcs={"vec": vec_diff, "bitmap": partial(bitmap_diff, resolution=1.0)},
+        columns={"vec": "Vec mean (s)", "bitmap": "Bitmap mean (s)"},
+    )
+
+
+def benchmark_wide(
+    n_columns: Optional[int] = None,
+    n_intervals: Optional[List[int]] = None,
+    n_samples: Optional[int] = None,
+):
+    """Compare reattaching metadata of wide dataframes with `take` against rebuilding the frame.
+
+    A has `n_columns` metadata columns of mixed numpy, categorical, nullable integer and string
+    dtypes. Reattaching with `take_intervals` gathers each block of columns once, while the
+    rebuild copies the frame, drops the interval columns, gathers rows with `iloc`, resets the
+    index, assigns the intervals and reorders the columns.
+
+    Args:
+        n_columns: Number of metadata columns of A.
+        n_intervals: Number of intervals in A and B.
+        n_samples: Number of random samples to run algorithms.
+    """
+    if n_columns is None:
+        n_columns = DEFAULT_N_COLUMNS
+
+    def make_inputs(n):
+        intervals_a = _wide_dataframe(n, n_columns)
+        intervals_b = generate_random_intervals(n, start=0, max_len=80)
+        starts, ends, indices = vec_diff(intervals_a, intervals_b, return_indices=True)
+        return dict(
+            intervals_a=intervals_a,
+            values_a=interval_values(intervals_a),
+            intervals_b=intervals_b,
+            indices=indices,
+            values=np.stack([starts, ends], axis=1),
+        )
+
+    _benchmark_sizes(
+        f"[wide] Intervals (x{n_columns} cols)",
+        DEFAULT_WIDE_N_INTERVALS if n_intervals is None else n_intervals,
+        n_samples,
+        make_inputs,
+        funcs={
+            "array": lambda values_a, intervals_b, **_: vec_diff(values_a, intervals_b),
+            "dataframe": lambda intervals_a, intervals_b, **_: vec_diff(intervals_a, intervals_b),
+            "take": lambda intervals_a, indices, values, **_: (
+                take_intervals(intervals_a, indices, values)
+            ),
+            "rebuild": lambda intervals_a, indices, values, **_: (
+                _rebuild_dataframe(intervals_a, indices, values)
+            ),
+        },
+        columns={
+            "array": "Array mean (s)",
+            "dataframe": "Dataframe mean (s)",
+            "take": "Take mean (s)",
+            "rebuild": "Rebuild mean (s)",
+        },
+    )
+
+
+def _wide_dataframe(n_intervals, n_columns):
+    intervals = generate_random_intervals(n_intervals, start=100, max_len=100, dataframe=True)
+    columns = {}
+    for j in range(n_columns):
+        kind = j % 4
+        if kind == 0:
+            columns[f"float_{j}"] = np.random.rand(n_intervals)
+        elif kind == 1:
+            columns[f"category_{j}"] = pd.Categorical(intervals["tags"])
+        elif kind == 2:
+            columns[f"int_{j}"] = pd.array(np.random.randint(0, 100, n_intervals), dtype="Int64")
+        else:
+            columns[f"str_{j}"] = intervals["tags"].astype(str)
+    return pd.concat([intervals, pd.DataFrame(columns)], axis=1)
+
+
+def _rebuild_dataframe(intervals, indices, values):
+    metadata = intervals.copy().drop(INTERVAL_COL_NAMES, axis=1)
+    metadata = metadata.iloc[indices].reset_index(drop=True)
+    metadata[INTERVAL_COL_NAMES] = values
+    return metadata[intervals.columns]
+
+
+def _benchmark_sizes(
+    title: str,
+    n_intervals: List[int],
+    n_samples: Optional[int],
+    make_inputs: Callable[[int], Dict[str, Any]],
+    funcs: Dict[str, Callable],
+    columns: Dict[str, str],
+    measures: Optional[Dict[str, Callable]] = None,
+):
+    """Time functions on random inputs of every size, and print the mean of every column.
+
+    Args:
+        title: Title of the column of sizes.
+        n_intervals: Sizes to make inputs of.
+        n_samples: Number of random samples of each size.
+        make_inputs: Function of a size returning the keyword arguments of every function.
+        funcs: Functions to time, by key.
+        columns: Labels of the keys to print, in order.
+        measures: Functions returning a measurement other than time, by key. They're called after
+            timing `funcs` on the same inputs.
+    """
+    if n_samples is None:
+        n_samples = DEFAULT_N_SAMPLES
+
+    measures = {} if measures is None else measures
+    times = [defaultdict(list) for _ in n_intervals]
+
+    # pylint: disable=invalid-name
+    for (i, n), _ in tqdm(
+        product(enumerate(n_intervals), range(n_samples)),
+        total=len(n_intervals) * n_samples,
+        miniters=1,
+        bar_format="{l_bar}{bar}| {n_fmt}/{total_fmt} [{elapsed}{postfix}]",
+    ):
+        inputs = make_inputs(n)
+        for key, func in funcs.items():
+            times[i][key].append(_time_func_run(func, **inputs)[0])
+        for key, measure in measures.items():
+            times[i][key].append(measure(**inputs))
+
+    _print_summary(title, times, n_intervals, n_samples, columns)
+
+
+def calibrate(
+    n_intervals: Optional[List[int]] = None,
+    n_samples: Optional[int] = None,
+    ratios: Optional[List[float]] = None,
+    path: Optional[Union[str, Path]] = None,
+) -> CostModel:
+    """Fit the dispatch cost model to timings of the automatic backends on this machine and save it.
+
+    Each sample times the backends on random A with `n` intervals and B with `n * ratio`
+    intervals spread over the same span, so the finer B is the more intervals of A each
+    interval of B overlaps.
+
+    Args:
+        n_intervals: Number of intervals in each A.
+        n_samples: Number of random samples for each size and ratio.
+        ratios: Ratios of the number of intervals in B to the number of intervals in A.
+        path: Profile file to save the model to, the profile of this machine by default.
+
+    Returns:
+        Fitted cost model.
+    """
+    if n_intervals is None:
+        n_intervals = DEFAULT_CALIBRATION_N_INTERVALS
+
+    if n_samples is None:
+        n_samples = DEFAULT_N_SAMPLES
+
+    if ratios is None:
+        ratios = DEFAULT_CALIBRATION_RATIOS
+
+    features, times = [], defaultdict(list)
+
+    # pylint: disable=invalid-name
+    for (n, ratio), _ in tqdm(
+        product(product(n_intervals, ratios), range(n_samples)),
+        total=len(n_intervals) * len(ratios) * n_samples,
+        miniters=1,
+        bar_format="{l_bar}{bar}| {n_fmt}/{total_fmt} [{elapsed}{postfix}]",
+    ):
+        n_b = max(int(n * ratio), 1)
+        intervals_a = generate_random_intervals(n, start=100, max_len=100)
+        intervals_b = generate_random_intervals(n_b, start=0, max_len=100 * n / n_b)
+
+        features.append(cost_features(intervals_a, intervals_b))
+        for name, func in automatic_backends().items():
+            times[name].append(_min_time_func_run(func, intervals_a, intervals_b))
+
+    model = CostModel.fit(np.stack(features), times, machine=platform.node())
+    print(f"Saved profile to {save_profile(model, path)}")
+    return model
+
+
+def _min_time_func_run(func: Callable, *args, **kwargs) -> float:
+    # Repeat fast calls until they add up to a measurable time, and keep the fastest run
+    elapsed, total, n_runs = [], 0.0, 0
+    while total < MIN_CALIBRATION_TIME or n_runs < 3:
+        tic = time.perf_counter()
+        func(*args, **kwargs)
+        elapsed.append(time.perf_counter() - tic)
+        total, n_runs = total + elapsed[-1], n_runs + 1
+    return min(elapsed)
+
+
+def _concurrent_lag(pairs, offload):
+    return asyncio.run(_run_concurrent_jobs(pairs, offload))
+
+
+async def _run_concurrent_jobs(pairs, offload):
+    async def blocking_diff(intervals_a, intervals_b):
+        return vec_diff(intervals_a, intervals_b)
+
+    stop = asyncio.Event()
+    heartbeat = asyncio.create_task(_heartbeat(stop))
+    await asyncio.sleep(0)
 
-    _print_table(times, n_intervals, n_samples, dataframes)
-    _write_csv(times, n_intervals, n_samples, dataframes)
+    async with AsyncIntervalEngine() as engine:
+        diff = engine.interval_difference if offload else blocking_diff
+        await asyncio.gather(
+            *[diff(intervals_a, intervals_b) for intervals_a, intervals_b in pairs]
+        )
+
+    stop.set()
+    return await heartbeat
+
+
+async def _heartbeat(stop):
+    max_lag = 0.0
+    while not stop.is_set():
+        tic = time.perf_counter()
+        await asyncio.sleep(HEARTBEAT_INTERVAL)
+        max_lag = max(max_lag, time.perf_counter() - tic - HEARTBEAT_INTERVAL)
+    return max_lag
+
+
+def _loop_diff(groups_a, groups_b):
+    return [vec_diff(a, b) for a, b in zip(groups_a, groups_b)]
+
+
+def _print_summary(title, times, n_intervals, n_samples, columns):
+    header = " " + "| ".join(
+        [f"{title:<28}", *[f"{label:<20}" for label in columns.values()]],
+    )
+    print("-" * len(header))
+    print(header)
+    print("-" * len(header))
+    for i, n in enumerate(n_intervals):
+        means = [sum(times[i][key]) / n_samples for key in columns]
+        row = " " + "| ".join([f"{n:<28}", *[f"{mean:<20.6f}" for mean in means]])
+        print(row)
 
 
-def _print_table(times, n_intervals, n_samples, df):
-    mode = "pd" if df else "np"
+def _print_divergences(recorder):
+    if len(recorder.divergences) == 0:
+        return
+    print(f"WARNING: {len(recorder.divergences)} divergent results between backends")
+    for divergence in recorder.divergences:
+        names = " vs ".join(divergence["backends"])
+        location = divergence.get("path", "not saved")
+        print(f" {names}: {tuple(divergence['rows'])} rows of (A, B), reproducer {location}")
+
+
+def _print_table(times, n_intervals, n_samples, mode):
     vec_key = "vec_" + mode
     nonvec_key = "nonvec_" + mode
     n_intervals_str = f"[{mode}] Intervals ({n_samples} samples)"
@@ -98,8 +576,7 @@ def _print_table(times, n_intervals, n_samples, df):
         print(row)
 
 
-def _write_csv(times, n_intervals, n_samples, df):
-    mode = "pd" if df else "np"
+def _write_csv(times, n_intervals, n_samples, mode):
     vec_key, nonvec_key = f"vec_{mode}", f"nonvec_{mode}"
     with open(f"results_{mode}.csv", "w", encoding="utf-8") as f:
         header = ",".join(
@@ -126,74 +603,3 @@ def _time_func_run(func: Callable, *args, **kwargs) -> Tuple[float, Any]:
     result = func(*args, **kwargs)
     toc = time.time()
     return toc - tic, result
-
-
-# TODO rfc
-def _inspect_if_unequal(vec_result, nonvec_result, intervals_a, intervals_b):
-    vec_metadata = None
-    if isinstance(vec_result, pd.DataFrame):
-        vec_metadata = vec_result.drop(INTERVAL_COL_NAMES, axis=1)
-        vec_result = vec_result[INTERVAL_COL_NAMES].values
-
-    nonvec_metadata = None
-    if isinstance(nonvec_result, pd.DataFrame):
-        nonvec_metadata = nonvec_result.drop(INTERVAL_COL_NAMES, axis=1)
-        nonvec_result = nonvec_result[INTERVAL_COL_NAMES].values
-
-    if np.array_equal(vec_result, nonvec_result):
-        if vec_metadata is None or nonvec_metadata is None:
-            return
-        if vec_metadata.equals(nonvec_metadata):
-            return
-
-    n_vec_results = len(vec_result)
-    n_nonvec_results = len(nonvec_result)
-    print(f"WARNING: Unequal result {n_vec_results = }, {n_nonvec_results = }")
-    print(">>> >>> Starting difference investigation")
-    for i in range(min(n_vec_results, n_nonvec_results)):
-        if not np.array_equal(vec_result[i, :], nonvec_result[i, :]):
-            start_idx, end_idx = i - 2, i + 3
-            delta = 300
-
-            vec_subset = vec_result[start_idx:end_idx, :]
-            nonvec_subset = nonvec_result[start_idx:end_idx, :]
-
-            min_point = min(vec_result[start_idx, 0], nonvec_result[start_idx, 0])
-            max_point = max(vec_result[end_idx, 1], nonvec_result[end_idx, 1])
-
-            intervals_a_mask = (intervals_a[:, 1] > min_point - delta) & (
-                intervals_a[:, 0] < max_point + delta
-            )
-            intervals_a_subset = intervals_a[intervals_a_mask, :]
-
-            intervals_b_mask = (intervals_b[:, 1] > min_point - delta) & (
-                intervals_b[:, 0] < max_point + delta
-            )
-            intervals_b_subset = intervals_b[intervals_b_mask, :]
-
-            print(f"difference at interval {i = }")
-
-            print("Vec result:")
-            print(vec_subset)
-
-            print("NonVec result:")
-            print(nonvec_subset)
-
-            print("A subset:")
-            print(intervals_a_subset)
-
-            print("B subset:")
-            print(intervals_b_subset)
-
-            figure = plot_intervals(
-                [
-                    intervals_a_subset,
-                    intervals_b_subset,
-                    vec_subset,
-                    nonvec_subset,
-                ],
-                colors=["yellow", "red", "yellow", "yellow"],
-                names=["A", "B", "VEC", "NONVEC"],
-            )
-            figure.show()
-            breakpoint()
@@ -0,0 +1,226 @@
+"""Set operations on intervals rasterized onto a fixed sample grid.
+
+When interval bounds are aligned to a sampling rate, a group of intervals can be stored as a packed
+bit array with one bit per sample, and set operations become bitwise operations on whole bytes.
+For dense groups with many rows this avoids sorting every point, at the cost of memory
+proportional to the span of the inputs rather than their number of rows.
+
+Bounds are rounded to the nearest sample, so results are only exact for bounds on the grid. The
+results are sets, so touching intervals are merged and the rows of the inputs aren't kept.
+"""
+
+from typing import List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from numpy.typing import NDArray
+
+from .globals import EMPTY_INTERVALS
+from .utils import as_interval_groups, interval_values
+
+
+class IntervalBitmap:
+    """Intervals rasterized onto the grid `origin + i * resolution` for `0 <= i < n_samples`.
+
+    Sample `i` is set if `[origin + i * resolution, origin + (i + 1) * resolution)` is covered.
+
+    Args:
+        bits: Packed bits of every sample (see `np.packbits`).
+        n_samples: Number of samples in the grid.
+        resolution: Spacing of the grid.
+        origin: Position of the first sample.
+    """
+
+    def __init__(self, bits: NDArray, n_samples: int, resolution: float, origin: float = 0.0):
+        if len(bits) != (n_samples + 7) // 8:
+            raise ValueError(f"Expected {(n_samples + 7) // 8} bytes for {n_samples} samples.")
+        self.bits = bits
+        self.n_samples = n_samples
+        self.resolution = resolution
+        self.origin = origin
+
+    def __repr__(self):
+        return (
+            f"IntervalBitmap({self.n_samples} samples, resolution={self.resolution}, "
+            f"origin={self.origin})"
+        )
+
+    @property
+    def grid(self) -> Tuple[int, float, float]:
+        """Number of samples, resolution and origin of the grid."""
+        return self.n_samples, self.resolution, self.origin
+
+    @classmethod
+    def empty(cls, n_samples: int, resolution: float, origin: float = 0.0) -> "IntervalBitmap":
+        """Bitmap with no samples set."""
+        return cls(np.zeros((n_samples + 7) // 8, dtype=np.uint8), n_samples, resolution, origin)
+
+    @classmethod
+    def from_intervals(
+        cls,
+        intervals: Union[NDArray, pd.DataFrame],
+        n_samples: int,
+        resolution: float,
+        origin: float = 0.0,
+    ) -> "IntervalBitmap":
+        """Rasterize a group of intervals, which may overlap or touch each other.
+
+        Bounds are rounded to the nearest sample, and bounds outside the grid are clipped.
+        """
+        intervals = interval_values(intervals)
+        bounds = np.rint((intervals - origin) / resolution).astype(np.int64)
+        np.clip(bounds, 0, n_samples, out=bounds)
+
+        # Samples are covered where more intervals have started than ended, so bounds which land
+        # on the same sample and overlapping intervals are counted rather than cancelling out
+        depth = np.zeros(n_samples + 1, dtype=np.int64)
+        np.add.at(depth, bounds[:, 0], 1)
+        np.add.at(depth, bounds[:, 1], -1)
+        covered = np.cumsum(depth)[:-1] > 0
+        return cls(np.packbits(covered), n_samples, resolution, origin)
+
+    def to_intervals(self, min_len: float = 0.0) -> NDArray:
+        """Convert runs of set samples back to intervals longer than `min_len`."""
+        covered = np.zeros(self.n_samples + 2, dtype=np.uint8)
+        covered[1:-1] = np.unpackbits(self.bits, count=self.n_samples)
+        edges = np.flatnonzero(covered[1:] != covered[:-1])
+
+        intervals = self.origin + edges.reshape(-1, 2) * self.resolution
+        if len(intervals) == 0:
+            return EMPTY_INTERVALS
+        return intervals[intervals[:, 1] - intervals[:, 0] > min_len]
+
+    def __sub__(self, other: "IntervalBitmap") -> "IntervalBitmap":
+        self._check_grid(other)
+        return IntervalBitmap(self.bits & ~other.bits, *self.grid)
+
+    def __and__(self, other: "IntervalBitmap") -> "IntervalBitmap":
+        self._check_grid(other)
+        return IntervalBitmap(self.bits & other.bits, *self.grid)
+
+    def __or__(self, other: "IntervalBitmap") -> "IntervalBitmap":
+        self._check_grid(other)
+        return IntervalBitmap(self.bits | other.bits, *self.grid)
+
+    def __ior__(self, other: "IntervalBitmap") -> "IntervalBitmap":
+        self._check_grid(other)
+        np.bitwise_or(self.bits, other.bits, out=self.bits)
+        return self
+
+    def _check_grid(self, other: "IntervalBitmap"):
+        if self.grid != other.grid:
+            raise ValueError(f"Expected bitmaps on the same grid, got {self} and {other}.")
+
+
+def common_grid(
+    interval_groups: List[NDArray],
+    resolution: float,
+    origin: Optional[float] = None,
+) -> Tuple[int, float, float]:
+    """Get the smallest grid which covers every group, aligned to multiples of `resolution`."""
+    interval_groups = [intervals for intervals in interval_groups if len(intervals) > 0]
+    if len(interval_groups) == 0:
+        return 0, resolution, 0.0 if origin is None else origin
+
+    if origin is None:
+        start = min(intervals[:, 0].min() for intervals in interval_groups)
+        origin = np.floor(start / resolution) * resolution
+    end = max(intervals[:, 1].max() for intervals in interval_groups)
+    n_samples = max(int(np.ceil((end - origin) / resolution)), 0)
+    return n_samples, resolution, float(origin)
+
+
+def rasterize_groups(
+    interval_groups: List[NDArray],
+    n_samples: int,
+    resolution: float,
+    origin: float = 0.0,
+) -> IntervalBitmap:
+    """Rasterize the union of several groups of intervals, which may overlap each other."""
+    bitmap = IntervalBitmap.empty(n_samples, resolution, origin)
+    for intervals in interval_groups:
+        bitmap |= IntervalBitmap.from_intervals(intervals, n_samples, resolution, origin)
+    return bitmap
+
+
+def interval_difference(
+    intervals_a: Union[NDArray, pd.DataFrame],
+    intervals_b: Union[NDArray, pd.DataFrame, List[Union[NDArray, pd.DataFrame]]],
+    min_len: float = 0.0,
+    resolution: float = 1.0,
+    origin: Optional[float] = None,
+) -> NDArray:
+    """Chop out sub-intervals from A that overlap with B, using bitwise operations on a grid.
+
+    Args:
+        intervals_a: Array representing intervals (col 0/1 represent start/end).
+        intervals_b: Array representing intervals (col 0/1 represent start/end), or a list of them.
+        min_len: minimum allowable length of intervals to keep, intervals shorter than min_len will
+            be dropped.
+        resolution: Spacing of the sample grid.
+        origin: Position of the first sample, the first multiple of `resolution` before the inputs
+            if `None`.
+
+    Returns:
+        Array of the merged intervals of A \\ B.
+    """
+    intervals_a = interval_values(intervals_a)
+    groups_b = as_interval_groups(intervals_b)
+    grid = common_grid([intervals_a], resolution, origin)
+
+    bitmap_a = IntervalBitmap.from_intervals(intervals_a, *grid)
+    return (bitmap_a - rasterize_groups(groups_b, *grid)).to_intervals(min_len=min_len)
+
+
+def interval_union(
+    interval_groups: List[Union[NDArray, pd.DataFrame]],
+    min_len: float = 0.0,
+    resolution: float = 1.0,
+    origin: Optional[float] = None,
+) -> NDArray:
+    """Union of several groups of intervals, using bitwise operations on a grid.
+
+    Args:
+        interval_groups: List of arrays representing intervals (col 0/1 represent start/end).
+        min_len: minimum allowable length of intervals to keep, intervals shorter than min_len will
+            be dropped.
+        resolution: Spacing of the sample grid.
+        origin: Position of the first sample, the first multiple of `resolution` before the inputs
+            if `None`.
+
+    Returns:
+        Array of the merged intervals of the union.
+    """
+    interval_groups = as_interval_groups(interval_groups)
+    grid = common_grid(interval_groups, resolution, origin)
+    return rasterize_groups(interval_groups, *grid).to_intervals(min_len=min_len)
+
+
+def interval_intersection(
+    interval_groups: List[Union[NDArray, pd.DataFrame]],
+    min_len: float = 0.0,
+    resolution: float = 1.0,
+    origin: Optional[float] = None,
+) -> NDArray:
+    """Intersection of several groups of intervals, using bitwise operations on a grid.
+
+    Args:
+        interval_groups: List of arrays representing intervals (col 0/1 represent start/end).
+        min_len: minimum allowable length of intervals to keep, intervals shorter than min_len will
+            be dropped.
+        resolution: Spacing of the sample grid.
+        origin: Position of the first sample, the first multiple of `resolution` before the inputs
+            if `None`.
+
+    Returns:
+        Array of the merged intervals of the intersection.
+    """
+    interval_groups = [interval_values(intervals) for intervals in interval_groups]
+    if len(interval_groups) == 0 or any(len(intervals) == 0 for intervals in interval_groups):
+        return EMPTY_INTERVALS
+
+    grid = common_grid(interval_groups, resolution, origin)
+    bitmap = IntervalBitmap.from_intervals(interval_groups[0], *grid)
+    for intervals in interval_groups[1:]:
+        bitmap = bitmap & IntervalBitmap.from_intervals(intervals, *grid)
+    return bitmap.to_intervals(min_len=min_len)
@@ -0,0 +1,261 @@
+"""Pick the fastest interval difference backend for the inputs from a calibrated cost model.
+
+The cost of each backend is modelled as a linear function of a few features of the inputs (see
+`cost_features`), with coefficients fitted to benchmark timings by
+`interval_diff.benchmark.calibrate`. Fitted models are saved to a per-machine profile file, and a
+default model is used on machines which haven't been calibrated.
+"""
+
+import inspect
+import json
+import logging
+import os
+import platform
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+from numpy.typing import NDArray
+
+from . import bitmap, non_vectorised, vectorised
+from .storage import read_stores
+from .utils import as_interval_groups, interval_values
+
+PROFILE_ENV_VAR = "INTERVAL_DIFF_PROFILE"
+FEATURES = ("overhead", "rows", "pairs", "overlaps")
+
+# Seconds per unit of each feature, fitted by `calibrate` on a development machine
+DEFAULT_COEFFICIENTS = {
+    "vectorised": [1.9e-04, 7.4e-08, 6.8e-11, 0.0],
+    "non_vectorised": [2.2e-05, 0.0, 4.0e-08, 3.3e-06],
+}
+
+BACKENDS: Dict[str, Callable] = {}
+MANUAL_BACKENDS = set()
+
+logger = logging.getLogger(__name__)
+
+_cost_model = None
+
+
+def register_backend(name: str, func: Callable, automatic: bool = True):
+    """Make a backend with the signature of `vectorised.interval_difference` available.
+
+    Backends which aren't `automatic` are only used when requested by name, e.g. because their
+    results are only exact for some inputs.
+    """
+    BACKENDS[name] = func
+    if automatic:
+        MANUAL_BACKENDS.discard(name)
+    else:
+        MANUAL_BACKENDS.add(name)
+
+
+def automatic_backends() -> Dict[str, Callable]:
+    """Get the backends which can be chosen by the cost model."""
+    return {name: func for name, func in BACKENDS.items() if name not in MANUAL_BACKENDS}
+
+
+register_backend("vectorised", vectorised.interval_difference)
+register_backend("non_vectorised", non_vectorised.interval_difference)
+register_backend("bitmap", bitmap.interval_difference, automatic=False)
+
+
+@dataclass
+class CostModel:
+    """Linear model of the run time of each backend.
+
+    Attributes:
+        coefficients: Seconds per unit of each feature in `FEATURES`, by backend.
+        machine: Name of the machine the model was calibrated on.
+    """
+
+    coefficients: Dict[str, List[float]] = field(default_factory=dict)
+    machine: str = ""
+
+    def predict(self, features: NDArray) -> Dict[str, float]:
+        """Predict the run time of each backend in the model from the features of the inputs."""
+        return {
+            name: float(np.dot(coefficients, features))
+            for name, coefficients in self.coefficients.items()
+        }
+
+    def choose(self, features: NDArray, candidates: Optional[List[str]] = None) -> str:
+        """Get the backend with the lowest predicted run time, out of `candidates` if given."""
+        costs = {
+            name: cost
+            for name, cost in self.predict(features).items()
+            if candidates is None or name in candidates
+        }
+        if len(costs) == 0:
+            raise ValueError(
+                f"The cost model has no coefficients for any of the backends {candidates}, please "
+                "recalibrate."
+            )
+        return min(costs, key=costs.get)
+
+    @classmethod
+    def fit(cls, features: NDArray, times: Dict[str, NDArray], machine: str = "") -> "CostModel":
+        """Fit the coefficients of each backend to measured run times.
+
+        Args:
+            features: Array of the features of each benchmarked input, one row per input.
+            times: Run time of each backend on each input.
+            machine: Name of the machine the times were measured on.
+
+        Returns:
+            Fitted cost model.
+        """
+        coefficients = {
+            name: _fit_nonnegative(features, np.asarray(t)) for name, t in times.items()
+        }
+        return cls(coefficients=coefficients, machine=machine)
+
+    def to_dict(self) -> dict:
+        return {
+            "machine": self.machine,
+            "features": list(FEATURES),
+            "coefficients": self.coefficients,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "CostModel":
+        if tuple(data.get("features", FEATURES)) != FEATURES:
+            raise ValueError("Profile was calibrated with different features, please recalibrate.")
+        return cls(coefficients=data["coefficients"], machine=data.get("machine", ""))
+
+
+def _fit_nonnegative(features: NDArray, times: NDArray) -> List[float]:
+    # Minimise the relative error, since run times span orders of magnitude, and drop features
+    # with negative coefficients until none are left so predictions stay sensible out of range
+    weights = 1 / np.maximum(times, np.finfo(float).tiny)
+    active = np.ones(features.shape[1], dtype=bool)
+    coefficients = np.zeros(features.shape[1])
+    while active.any():
+        solution, *_ = np.linalg.lstsq(
+            features[:, active] * weights[:, None], times * weights, rcond=None
+        )
+        if (solution >= 0).all():
+            coefficients[active] = solution
+            break
+        active[np.flatnonzero(active)[np.argmin(solution)]] = False
+    return coefficients.tolist()
+
+
+def cost_features(
+    intervals_a: Union[NDArray, pd.DataFrame],
+    intervals_b: Union[NDArray, pd.DataFrame, List[Union[NDArray, pd.DataFrame]]],
+) -> NDArray:
+    """Get the features of a pair of inputs used by the cost model.
+
+    The features are a constant, the total number of rows, the number of pairs of rows, and the
+    expected number of overlapping pairs for intervals spread evenly over the span of the inputs.
+    """
+    values_a = interval_values(intervals_a)
+    groups_b = as_interval_groups(intervals_b)
+    n_a, n_b = len(values_a), sum(len(intervals) for intervals in groups_b)
+    if n_a == 0 or n_b == 0:
+        return np.array([1.0, n_a + n_b, 0.0, 0.0])
+
+    groups = [values_a, *groups_b]
+    span = max(group[:, 1].max() for group in groups) - min(group[:, 0].min() for group in groups)
+    len_a = np.mean(values_a[:, 1] - values_a[:, 0])
+    len_b = sum(np.sum(group[:, 1] - group[:, 0]) for group in groups_b) / n_b
+    n_pairs = float(n_a) * n_b
+    overlaps = n_pairs if span <= 0 else min(n_pairs * (len_a + len_b) / span, n_pairs)
+    return np.array([1.0, n_a + n_b, n_pairs, overlaps])
+
+
+def default_profile_path() -> Path:
+    """Path of the profile of this machine, which can be set with `$INTERVAL_DIFF_PROFILE`."""
+    if PROFILE_ENV_VAR in os.environ:
+        return Path(os.environ[PROFILE_ENV_VAR])
+    return Path.home() / ".interval_diff" / f"profile_{platform.node() or 'default'}.json"
+
+
+def save_profile(model: CostModel, path: Optional[Union[str, Path]] = None) -> Path:
+    """Save a cost model to a profile file, the profile of this machine by default."""
+    path = Path(path) if path is not None else default_profile_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(model.to_dict(), f, indent=2)
+    return path
+
+
+def load_profile(path: Optional[Union[str, Path]] = None) -> Optional[CostModel]:
+    """Load a cost model from a profile file, `None` if the file doesn't exist."""
+    path = Path(path) if path is not None else default_profile_path()
+    if not path.exists():
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return CostModel.from_dict(json.load(f))
+
+
+def get_cost_model() -> CostModel:
+    """Get the cost model used for dispatch, loading the profile of this machine if needed."""
+    global _cost_model  # pylint: disable=global-statement
+    if _cost_model is None:
+        _cost_model = load_profile()
+        if _cost_model is None:
+            logger.debug("No profile found, using the default cost model.")
+            _cost_model = CostModel(coefficients=dict(DEFAULT_COEFFICIENTS), machine="default")
+    return _cost_model
+
+
+def set_cost_model(model: Optional[CostModel]):
+    """Set the cost model used for dispatch, `None` to reload the profile of this machine."""
+    global _cost_model  # pylint: disable=global-statement
+    _cost_model = model
+
+
+def choose_backend(
+    intervals_a: Union[NDArray, pd.DataFrame],
+    intervals_b: Union[NDArray, pd.DataFrame, List[Union[NDArray, pd.DataFrame]]],
+    **kwargs,
+) -> str:
+    """Get the name of the backend predicted to be fastest which supports `kwargs`."""
+    backends = automatic_backends()
+    candidates = [name for name, func in backends.items() if _accepts(func, tuple(kwargs))]
+    if len(candidates) == 0:
+        raise ValueError(
+            f"None of the backends {list(backends)} accept the keyword arguments {list(kwargs)}."
+        )
+    return get_cost_model().choose(cost_features(intervals_a, intervals_b), candidates)
+
+
+def interval_difference(
+    intervals_a: Union[NDArray, pd.DataFrame],
+    intervals_b: Union[NDArray, pd.DataFrame, List[Union[NDArray, pd.DataFrame]]],
+    min_len: float = 0.0,
+    backend: Optional[str] = None,
+    **kwargs,
+) -> NDArray:
+    """Chop out sub-intervals from A that overlap with B, using the fastest backend.
+
+    Args:
+        intervals_a: Array representing intervals (col 0/1 represent start/end).
+        intervals_b: Array representing intervals (col 0/1 represent start/end), or a list of them.
+        min_len: minimum allowable length of intervals to keep, intervals shorter than min_len will
+            be dropped.
+        backend: Name of the backend to use (see `BACKENDS`), chosen by the cost model if `None`.
+        kwargs: Keyword arguments to pass to the backend, only backends which support them are
+            considered.
+
+    Returns:
+        Interval difference between intervals_a and intervals_b.
+    """
+    intervals_a, intervals_b = read_stores(intervals_a, intervals_b, window=kwargs.get("window"))
+    if backend is None:
+        backend = choose_backend(intervals_a, intervals_b, **kwargs)
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}', expected one of {list(BACKENDS)}.")
+    return BACKENDS[backend](intervals_a, intervals_b, min_len=min_len, **kwargs)
+
+
+@lru_cache(maxsize=None)
+def _accepts(func: Callable, names: tuple) -> bool:
+    parameters = inspect.signature(func).parameters
+    return all(name in parameters for name in names)
@@ -0,0 +1,307 @@
+"""Automated checks for divergent results between interval difference backends.
+
+When two backends disagree on an (A, B) pair, the pair is shrunk to a minimal reproducer by
+delta-debugging on the rows of A and B, and saved as `.npy`/JSON fixtures which can be loaded back
+with `load_divergence`.
+"""
+
+import json
+import logging
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from numpy.typing import NDArray
+
+from .globals import INTERVAL_COL_NAMES
+from .utils import interval_values, is_structured, select_window
+
+DEFAULT_FIXTURES_DIR = "divergences"
+
+logger = logging.getLogger(__name__)
+
+Intervals = Union[NDArray, pd.DataFrame]
+
+
+def results_equal(result_1: Any, result_2: Any) -> bool:
+    """Check whether two interval difference results (arrays or dataframes) are equal."""
+    if isinstance(result_1, BaseException) or isinstance(result_2, BaseException):
+        return type(result_1) is type(result_2)
+
+    if isinstance(result_1, pd.DataFrame) != isinstance(result_2, pd.DataFrame):
+        return False
+
+    if isinstance(result_1, pd.DataFrame):
+        metadata_1 = result_1.drop(INTERVAL_COL_NAMES, axis=1).reset_index(drop=True)
+        metadata_2 = result_2.drop(INTERVAL_COL_NAMES, axis=1).reset_index(drop=True)
+        if not metadata_1.equals(metadata_2):
+            return False
+
+    if is_structured(result_1) or is_structured(result_2):
+        return result_1.dtype == result_2.dtype and np.array_equal(result_1, result_2)
+
+    values_1, values_2 = interval_values(result_1), interval_values(result_2)
+    return values_1.shape == values_2.shape and np.array_equal(values_1, values_2)
+
+
+def run_safely(func: Callable, *args, **kwargs) -> Any:
+    """Run a backend, returning any exception it raises instead of its result."""
+    try:
+        return func(*args, **kwargs)
+    except Exception as err:  # pylint: disable=broad-except
+        return err
+
+
+def diverges(
+    func_1: Callable,
+    func_2: Callable,
+    intervals_a: Intervals,
+    intervals_b: Intervals,
+    **kwargs,
+) -> bool:
+    """Check whether two backends give different results for an (A, B) pair."""
+    return not results_equal(
+        run_safely(func_1, intervals_a, intervals_b, **kwargs),
+        run_safely(func_2, intervals_a, intervals_b, **kwargs),
+    )
+
+
+def shrink_divergence(
+    func_1: Callable,
+    func_2: Callable,
+    intervals_a: Intervals,
+    intervals_b: Intervals,
+    buffer: Optional[float] = None,
+    **kwargs,
+) -> Tuple[Intervals, Intervals]:
+    """Shrink a divergent (A, B) pair to a minimal pair of subsets which still diverges.
+
+    The pair is first narrowed down to the rows within `buffer` of the first divergent interval of
+    the results, and then reduced by delta-debugging on the rows of A and B in turn until neither
+    can be reduced any further.
+
+    Args:
+        func_1: First backend.
+        func_2: Second backend.
+        intervals_a: Array representing intervals (col 0/1 represent start/end).
+        intervals_b: Array representing intervals (col 0/1 represent start/end).
+        buffer: Distance around the divergent intervals to keep rows within, the length of the
+            longest of those intervals and the rows of A overlapping them by default.
+        kwargs: Keyword arguments to pass to both backends.
+
+    Returns:
+        Subsets of the rows of intervals_a and intervals_b.
+    """
+    intervals_a, intervals_b = _localize(
+        func_1, func_2, intervals_a, intervals_b, buffer=buffer, **kwargs
+    )
+
+    while True:
+        n_rows = len(intervals_a) + len(intervals_b)
+
+        rows_a = _ddmin(
+            len(intervals_a),
+            lambda rows: diverges(func_1, func_2, _take(intervals_a, rows), intervals_b, **kwargs),
+        )
+        intervals_a = _take(intervals_a, rows_a)
+
+        rows_b = _ddmin(
+            len(intervals_b),
+            lambda rows: diverges(func_1, func_2, intervals_a, _take(intervals_b, rows), **kwargs),
+        )
+        intervals_b = _take(intervals_b, rows_b)
+
+        if len(intervals_a) + len(intervals_b) == n_rows:
+            return intervals_a, intervals_b
+
+
+def _ddmin(n_items: int, fails: Callable[[NDArray], bool]) -> NDArray:
+    """Find a 1-minimal subset of `range(n_items)` for which `fails` holds (Zeller's ddmin)."""
+    items, granularity = np.arange(n_items), 2
+    while len(items) >= 2:
+        chunks = np.array_split(items, granularity)
+
+        reduced = False
+        for chunk in chunks:
+            if fails(chunk):
+                items, granularity, reduced = chunk, 2, True
+                break
+
+        if not reduced and granularity > 2:
+            for i in range(len(chunks)):
+                complement = np.concatenate(chunks[:i] + chunks[i + 1 :])
+                if fails(complement):
+                    items, granularity, reduced = complement, max(granularity - 1, 2), True
+                    break
+
+        if not reduced:
+            if granularity >= len(items):
+                break
+            granularity = min(2 * granularity, len(items))
+
+    return items
+
+
+def _localize(func_1, func_2, intervals_a, intervals_b, buffer=None, **kwargs):
+    result_1 = run_safely(func_1, intervals_a, intervals_b, **kwargs)
+    result_2 = run_safely(func_2, intervals_a, intervals_b, **kwargs)
+    if isinstance(result_1, BaseException) or isinstance(result_2, BaseException):
+        return intervals_a, intervals_b
+
+    values_1, values_2 = interval_values(result_1), interval_values(result_2)
+    n_rows = min(len(values_1), len(values_2))
+    unequal = np.flatnonzero((values_1[:n_rows] != values_2[:n_rows]).any(axis=1))
+    i = unequal[0] if len(unequal) > 0 else n_rows
+
+    # Window around the first divergent interval of either result, clamped to the results
+    neighbours = [values[max(i - 2, 0) : i + 3] for values in (values_1, values_2)]
+    neighbours = np.concatenate([values for values in neighbours if len(values) > 0], axis=0)
+    if len(neighbours) == 0:
+        return intervals_a, intervals_b
+    window = (neighbours.min(), neighbours.max())
+    if buffer is None:
+        # Scale the buffer to the data, the rows of A overlapping the divergence are kept whole so
+        # the rows of B within their length of it are kept too
+        offending = np.concatenate(
+            [neighbours, interval_values(select_window(intervals_a, window, clip=False))], axis=0
+        )
+        buffer = np.max(offending[:, 1] - offending[:, 0])
+    window = (window[0] - buffer, window[1] + buffer)
+
+    local_a = select_window(intervals_a, window, clip=False)
+    local_b = select_window(intervals_b, window, clip=False)
+    if diverges(func_1, func_2, local_a, local_b, **kwargs):
+        return local_a, local_b
+    return intervals_a, intervals_b
+
+
+def _take(intervals: Intervals, rows: NDArray) -> Intervals:
+    if isinstance(intervals, pd.DataFrame):
+        return intervals.iloc[rows]
+    return intervals[rows]
+
+
+class DivergenceRecorder:
+    """Record, shrink and save divergent results between backends.
+
+    Args:
+        fixtures_dir: Directory to save reproducers to, reproducers aren't saved if `None`.
+        shrink: Whether to shrink divergent pairs before recording them.
+    """
+
+    def __init__(self, fixtures_dir: Optional[Union[str, Path]] = None, shrink: bool = True):
+        self.fixtures_dir = Path(fixtures_dir) if fixtures_dir is not None else None
+        self.shrink = shrink
+        self.divergences: List[Dict[str, Any]] = []
+
+    def check(
+        self,
+        funcs: Dict[str, Callable],
+        results: Dict[str, Any],
+        intervals_a: Intervals,
+        intervals_b: Intervals,
+        **kwargs,
+    ) -> bool:
+        """Compare the results of each backend against the first, recording any divergences.
+
+        Args:
+            funcs: Backends by name.
+            results: Results of each backend on intervals_a and intervals_b.
+            intervals_a: Array representing intervals (col 0/1 represent start/end).
+            intervals_b: Array representing intervals (col 0/1 represent start/end).
+            kwargs: Keyword arguments passed to the backends.
+
+        Returns:
+            Whether every backend agreed.
+        """
+        (reference, func_1), *others = funcs.items()
+        agreed = True
+        for name, func_2 in others:
+            if results_equal(results[reference], results[name]):
+                continue
+            agreed = False
+            self.record((reference, name), func_1, func_2, intervals_a, intervals_b, **kwargs)
+        return agreed
+
+    def record(
+        self,
+        names: Tuple[str, str],
+        func_1: Callable,
+        func_2: Callable,
+        intervals_a: Intervals,
+        intervals_b: Intervals,
+        **kwargs,
+    ) -> Dict[str, Any]:
+        """Shrink and save a divergent (A, B) pair."""
+        n_rows = (len(intervals_a), len(intervals_b))
+        if self.shrink:
+            intervals_a, intervals_b = shrink_divergence(
+                func_1, func_2, intervals_a, intervals_b, **kwargs
+            )
+
+        divergence = {
+            "backends": list(names),
+            "kwargs": kwargs,
+            "original_rows": list(n_rows),
+            "rows": [len(intervals_a), len(intervals_b)],
+            "intervals_a": intervals_a,
+            "intervals_b": intervals_b,
+            "results": [
+                _describe(run_safely(func, intervals_a, intervals_b, **kwargs))
+                for func in (func_1, func_2)
+            ],
+        }
+        logger.warning(
+            f"Divergence between {names[0]} and {names[1]}, shrunk from {n_rows} to "
+            f"{tuple(divergence['rows'])} rows of (A, B)"
+        )
+
+        if self.fixtures_dir is not None:
+            divergence["path"] = save_divergence(
+                divergence, self.fixtures_dir / f"divergence_{len(self.divergences)}"
+            )
+        self.divergences.append(divergence)
+        return divergence
+
+
+def save_divergence(divergence: Dict[str, Any], path: Union[str, Path]) -> Path:
+    """Save a divergence as `<path>_a.npy`, `<path>_b.npy` and `<path>.json`."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    np.save(f"{path}_a.npy", interval_values(divergence["intervals_a"]))
+    np.save(f"{path}_b.npy", interval_values(divergence["intervals_b"]))
+
+    metadata = {k: v for k, v in divergence.items() if k not in ("intervals_a", "intervals_b")}
+    for key in ("intervals_a", "intervals_b"):
+        if isinstance(divergence[key], pd.DataFrame):
+            metadata[f"{key}_records"] = divergence[key].to_dict(orient="records")
+
+    json_path = path.with_suffix(".json")
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(metadata, f, indent=2, default=str)
+    return json_path
+
+
+def load_divergence(path: Union[str, Path]) -> Tuple[Intervals, Intervals, Dict[str, Any]]:
+    """Load a divergence saved by `save_divergence` from the path of its JSON file."""
+    path = Path(path)
+    with open(path, "r", encoding="utf-8") as f:
+        metadata = json.load(f)
+
+    stem = path.with_suffix("")
+    intervals = []
+    for key, suffix in (("intervals_a", "_a.npy"), ("intervals_b", "_b.npy")):
+        records = metadata.pop(f"{key}_records", None)
+        if records is not None:
+            intervals.append(pd.DataFrame.from_records(records))
+        else:
+            intervals.append(np.load(f"{stem}{suffix}"))
+    return intervals[0], intervals[1], metadata
+
+
+def _describe(result: Any) -> Any:
+    if isinstance(result, BaseException):
+        return f"{type(result).__name__}: {result}"
+    return interval_values(result).tolist()
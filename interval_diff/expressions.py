@@ -0,0 +1,276 @@
+"""Lazy expressions over groups of intervals, evaluated in a single atomize pass.
+
+Set operations and filters on `IntervalSet`s are recorded rather than computed, e.g.
+
+    >>> import numpy as np
+    >>> a = IntervalSet(np.array([(0.0, 100.0), (200.0, 300.0)]), name="A")
+    >>> b = IntervalSet(np.array([(50.0, 250.0)]), name="B")
+    >>> c = IntervalSet(np.array([(280.0, 290.0)]), name="C")
+    >>> expr = ((a - b) - c).clip(10, 400).min_len(5)
+    >>> expr.evaluate()
+    array([[ 10.,  50.],
+           [250., 280.],
+           [290., 300.]])
+
+Every group in the expression is atomized together once, and the atoms making up the result are
+selected with a boolean formula over the group membership of each atom. Filters like `min_len`
+nested inside an expression need the merged result of their sub-expression, which is computed in
+its own pass. Compiled plans only depend on the structure of an expression, so they are cached and
+reused for new inputs.
+"""
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from numpy.typing import NDArray
+
+from .globals import EMPTY_INTERVALS
+from .utils import interval_values
+from .vectorised import atomize_intervals, merge_adjacent_intervals
+
+OPERATION_SYMBOLS = {"sub": "-", "and": "&", "or": "|"}
+
+
+class IntervalExpr(ABC):
+    """Base class for lazy expressions over groups of intervals."""
+
+    def __sub__(self, other) -> "IntervalExpr":
+        return SetOperation("sub", self, as_expr(other))
+
+    def __and__(self, other) -> "IntervalExpr":
+        return SetOperation("and", self, as_expr(other))
+
+    def __or__(self, other) -> "IntervalExpr":
+        return SetOperation("or", self, as_expr(other))
+
+    def __rsub__(self, other) -> "IntervalExpr":
+        return SetOperation("sub", as_expr(other), self)
+
+    def __rand__(self, other) -> "IntervalExpr":
+        return SetOperation("and", as_expr(other), self)
+
+    def __ror__(self, other) -> "IntervalExpr":
+        return SetOperation("or", as_expr(other), self)
+
+    def min_len(self, length: float) -> "IntervalExpr":
+        """Drop intervals of the result which are not longer than `length`."""
+        return MinLen(self, length)
+
+    def clip(self, t0: float, t1: float) -> "IntervalExpr":
+        """Clip the result to the window `[t0, t1]`."""
+        return SetOperation("and", self, IntervalSet(np.array([(t0, t1)]), name=f"[{t0}, {t1}]"))
+
+    @abstractmethod
+    def leaves(self) -> List["IntervalSet"]:
+        """Get the unique groups of intervals in the expression, in order of appearance."""
+
+    @abstractmethod
+    def key(self, slots: dict) -> tuple:
+        """Get the structure of the expression, with groups replaced by their slot in `slots`."""
+
+    def plan(self) -> "Plan":
+        """Compile the expression into a (cached) plan."""
+        leaves = self.leaves()
+        return compile_plan(self.key({id(leaf): i for i, leaf in enumerate(leaves)}))
+
+    def explain(self) -> str:
+        """Describe the compiled plan of the expression."""
+        return self.plan().explain([leaf.name for leaf in self.leaves()])
+
+    def evaluate(self) -> NDArray:
+        """Compute the intervals represented by the expression."""
+        return self.plan().execute([leaf.intervals for leaf in self.leaves()])
+
+
+class IntervalSet(IntervalExpr):
+    """A group of non-overlapping intervals to use in an expression.
+
+    Args:
+        intervals: Array representing intervals (col 0/1 represent start/end).
+        name: Name to show for the group when explaining plans.
+    """
+
+    def __init__(self, intervals: Union[NDArray, pd.DataFrame], name: Optional[str] = None):
+        self.intervals = interval_values(intervals)
+        self.name = name
+
+    def __repr__(self):
+        return f"IntervalSet({self.name or len(self.intervals)})"
+
+    def leaves(self) -> List["IntervalSet"]:
+        return [self]
+
+    def key(self, slots: dict) -> tuple:
+        return ("group", slots[id(self)])
+
+
+class SetOperation(IntervalExpr):
+    """Difference (`"sub"`), intersection (`"and"`) or union (`"or"`) of two expressions."""
+
+    def __init__(self, operation: str, left: IntervalExpr, right: IntervalExpr):
+        if operation not in OPERATION_SYMBOLS:
+            raise ValueError(f"Unknown set operation '{operation}'.")
+        self.operation = operation
+        self.left = left
+        self.right = right
+
+    def __repr__(self):
+        return f"({self.left!r} {OPERATION_SYMBOLS[self.operation]} {self.right!r})"
+
+    def leaves(self) -> List["IntervalSet"]:
+        return _unique(self.left.leaves() + self.right.leaves())
+
+    def key(self, slots: dict) -> tuple:
+        return (self.operation, self.left.key(slots), self.right.key(slots))
+
+
+class MinLen(IntervalExpr):
+    """Intervals of an expression which are longer than `length`."""
+
+    def __init__(self, child: IntervalExpr, length: float):
+        self.child = child
+        self.length = length
+
+    def __repr__(self):
+        return f"{self.child!r}.min_len({self.length})"
+
+    def leaves(self) -> List["IntervalSet"]:
+        return self.child.leaves()
+
+    def key(self, slots: dict) -> tuple:
+        return ("min_len", self.child.key(slots), self.length)
+
+
+def as_expr(intervals) -> IntervalExpr:
+    """Wrap intervals in an `IntervalSet` if they're not already an expression."""
+    if isinstance(intervals, IntervalExpr):
+        return intervals
+    return IntervalSet(intervals)
+
+
+@dataclass(frozen=True)
+class Plan:
+    """Compiled expression, evaluated with a single atomize pass over its inputs.
+
+    Attributes:
+        formula: Nested tuples of set operations over `("input", i)` terms, evaluated on the group
+            membership of each atom.
+        inputs: Each input is either `("group", slot)` for a group of the expression, or
+            `("plan", plan)` for a sub-expression which has to be computed first (only needed for
+            filters which depend on the merged result, like `min_len`).
+        min_len: Minimum length of the merged intervals to keep.
+    """
+
+    formula: tuple
+    inputs: Tuple[tuple, ...]
+    min_len: Optional[float] = None
+
+    @property
+    def n_passes(self) -> int:
+        """Number of atomize passes needed to execute the plan."""
+        return 1 + sum(source.n_passes for kind, source in self.inputs if kind == "plan")
+
+    def execute(self, groups: List[NDArray]) -> NDArray:
+        """Compute the result of the plan for the groups bound to each slot."""
+        inputs = [
+            groups[source] if kind == "group" else source.execute(groups)
+            for kind, source in self.inputs
+        ]
+        if sum(len(intervals) for intervals in inputs) == 0:
+            return EMPTY_INTERVALS
+
+        atoms, indices = atomize_intervals(inputs, min_len=0.0, exclusive=False)
+        mask = evaluate_formula(self.formula, indices != -1)
+        result = merge_adjacent_intervals(atoms[mask])
+
+        if self.min_len is not None:
+            result = result[result[:, 1] - result[:, 0] > self.min_len]
+        return result
+
+    def explain(self, names: Optional[List[Optional[str]]] = None, indent: int = 0) -> str:
+        """Describe the plan, using `names` for the groups bound to each slot."""
+        names = names or []
+        labels = []
+        for kind, source in self.inputs:
+            if kind == "group":
+                labels.append(
+                    names[source] if source < len(names) and names[source] else f"g{source}"
+                )
+            else:
+                labels.append(f"p{len(labels)}")
+
+        pad = " " * indent
+        lines = [
+            f"{pad}Plan ({self.n_passes} atomize pass{'es' if self.n_passes > 1 else ''})",
+            f"{pad}  formula: {format_formula(self.formula, labels)}",
+        ]
+        if self.min_len is not None:
+            lines.append(f"{pad}  min_len: {self.min_len}")
+        for label, (kind, source) in zip(labels, self.inputs):
+            if kind == "plan":
+                lines.append(f"{pad}  {label}:")
+                lines.append(source.explain(names, indent=indent + 4))
+        return "\n".join(lines)
+
+
+@lru_cache(maxsize=256)
+def compile_plan(key: tuple) -> Plan:
+    """Compile the structure of an expression into a plan."""
+    min_len = None
+    while key[0] == "min_len":
+        min_len = key[2] if min_len is None else max(min_len, key[2])
+        key = key[1]
+
+    inputs = []
+    formula = _compile_formula(key, inputs)
+    return Plan(formula=formula, inputs=tuple(inputs), min_len=min_len)
+
+
+def _compile_formula(key: tuple, inputs: list) -> tuple:
+    kind = key[0]
+    if kind in OPERATION_SYMBOLS:
+        return (kind, _compile_formula(key[1], inputs), _compile_formula(key[2], inputs))
+
+    source = key if kind == "group" else ("plan", compile_plan(key))
+    if source not in inputs:
+        inputs.append(source)
+    return ("input", inputs.index(source))
+
+
+def evaluate_formula(formula: tuple, membership: NDArray) -> NDArray:
+    """Evaluate a plan formula on a boolean matrix of the group membership of each atom."""
+    kind = formula[0]
+    if kind == "input":
+        return membership[:, formula[1]]
+
+    left = evaluate_formula(formula[1], membership)
+    right = evaluate_formula(formula[2], membership)
+    if kind == "sub":
+        return left & ~right
+    if kind == "and":
+        return left & right
+    return left | right
+
+
+def format_formula(formula: tuple, labels: List[str]) -> str:
+    """Format a plan formula as a string."""
+    if formula[0] == "input":
+        return labels[formula[1]]
+    left = format_formula(formula[1], labels)
+    right = format_formula(formula[2], labels)
+    if formula[0] == "sub":
+        return f"({left} & ~{right})"
+    return f"({left} {OPERATION_SYMBOLS[formula[0]]} {right})"
+
+
+def _unique(leaves: List[IntervalSet]) -> List[IntervalSet]:
+    seen, result = set(), []
+    for leaf in leaves:
+        if id(leaf) not in seen:
+            seen.add(id(leaf))
+            result.append(leaf)
+    return result
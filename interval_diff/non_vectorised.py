@@ -1,51 +1,82 @@
 import logging
-from typing import Union
+from typing import List, Union
 
 import numpy as np
 import pandas as pd
 from numpy.typing import NDArray
 
-from .globals import EMPTY_INTERVALS, INTERVAL_COL_NAMES
-
+from .storage import read_stores
+from .utils import (
+    as_interval_array,
+    as_interval_groups,
+    has_metadata,
+    interval_closed,
+    interval_values,
+    is_interval_array,
+    is_lazy_frame,
+    take_intervals,
+)
 
 logger = logging.getLogger(__name__)
 
+
 # TODO test dataframe inputs
 def interval_difference(
     intervals_a: Union[NDArray, pd.DataFrame],
-    intervals_b: Union[NDArray, pd.DataFrame],
+    intervals_b: Union[NDArray, pd.DataFrame, List[Union[NDArray, pd.DataFrame]]],
     min_len: float = 0.0,
+    return_indices: bool = False,
 ) -> NDArray:
     """Clip labels in `labels` which intersect with labels in `bounds`.
 
     Args:
         labels: Labels which need to be clipped to prevent overlap with `bounds`.
-        bounds: Labels to clip `labels` around.
+        bounds: Labels to clip `labels` around, or a list of groups of bounds which may overlap.
         min_len: minimum allowable length of intervals to keep, intervals shorter than min_len will
             be dropped.
+        return_indices: Whether to return arrays of the starts, ends and source rows in `labels`
+            of the result instead of building an array/dataframe.
 
     Returns:
-        Array of labels that overlap `labels` and complement of `bounds`.
+        Array of labels that overlap `labels` and complement of `bounds` (of the same type as
+        `labels` for interval arrays), or a tuple of the starts, ends and rows of `labels` of the
+        result if `return_indices` is set.
     """
-    if len(intervals_a) == 0 or len(intervals_b) == 0:
+    intervals_a, intervals_b = read_stores(intervals_a, intervals_b)
+
+    if is_interval_array(intervals_a):
+        interval_closed(intervals_a, intervals_b)
+        result = interval_difference(
+            interval_values(intervals_a),
+            intervals_b,
+            min_len=min_len,
+            return_indices=return_indices,
+        )
+        return result if return_indices else as_interval_array(result, like=intervals_a)
+
+    if is_lazy_frame(intervals_a):
+        result = interval_difference(
+            intervals_a.collect(), intervals_b, min_len=min_len, return_indices=return_indices
+        )
+        return result if return_indices else result.lazy()
+
+    groups_b = as_interval_groups(intervals_b)
+    if len(intervals_a) == 0 or len(groups_b) == 0:
+        if return_indices:
+            values_a = interval_values(intervals_a)
+            return values_a[:, 0], values_a[:, 1], np.arange(len(values_a))
         return intervals_a
 
     intervals_a_input = intervals_a
-    metadata = None
-    if isinstance(intervals_a_input, pd.DataFrame):
-        metadata = intervals_a_input.drop(INTERVAL_COL_NAMES, axis=1)
-        intervals_a_input = intervals_a.copy()
-        intervals_a = intervals_a[INTERVAL_COL_NAMES].values
+    intervals_a = interval_values(intervals_a)
+    dtype = np.result_type(intervals_a, *groups_b)
 
-    if isinstance(intervals_b, pd.DataFrame):
-        intervals_b = intervals_b[INTERVAL_COL_NAMES].values
+    intervals_b = np.concatenate(groups_b, axis=0)
 
-    intervals_a = sort_intervals_by_start(intervals_a)
+    index = np.argsort(intervals_a[:, 0])
+    intervals_a = np.concatenate([intervals_a[index], index[:, None]], axis=1)
     intervals_b = sort_intervals_by_start(intervals_b)
 
-    index = np.arange(len(intervals_a))
-    intervals_a = np.concatenate([intervals_a, index[:, None]], axis=1)
-
     final_labels = []
     bound_starts, bound_ends = intervals_b[:, 0], intervals_b[:, 1]
 
@@ -105,20 +136,18 @@ def interval_difference(
         if keep_label and label_end - label_start > min_len:
             final_labels.append((label_start, label_end, label_idx))
 
-    if len(final_labels) == 0:
-        if metadata is not None:
-            return pd.DataFrame(columns=intervals_a_input.columns)
-        return EMPTY_INTERVALS
+    # Bounds are cast back from the float array of labels and rows, and every result (even an
+    # empty one) is built like in the vectorised backend, so both give the same types and dtypes
+    result = np.array(final_labels, dtype=np.float64).reshape(-1, 3)
+    values = result[:, :2].astype(dtype, copy=False)
+    indices = result[:, 2].astype(int)
+    if return_indices:
+        return values[:, 0], values[:, 1], indices
 
-    result = np.array(final_labels)
-    if metadata is None:
-        return result[:, :2]
+    if not has_metadata(intervals_a_input):
+        return values
 
-    result, indices = result[:, :2], result[:, -1].astype(int)
-    metadata = metadata.iloc[indices].reset_index(drop=True)
-    metadata[INTERVAL_COL_NAMES] = result
-    result = metadata[intervals_a_input.columns]
-    return result
+    return take_intervals(intervals_a_input, indices, values)
 
 
 def sort_intervals_by_start(intervals: NDArray) -> NDArray:
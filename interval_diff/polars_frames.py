@@ -0,0 +1,108 @@
+"""Interval differences within groups of Polars dataframes, as part of a lazy query.
+
+`interval_difference_by` builds a `polars.LazyFrame` which computes `A \\ B` separately for every
+value of some key columns (e.g. a recording or patient id), so it can be chained after scans and
+filters and nothing is computed until the query is collected:
+
+    import polars as pl
+
+    labels = pl.scan_parquet("labels.parquet")
+    artifacts = pl.scan_parquet("artifacts.parquet").filter(pl.col("confidence") > 0.5)
+    result = interval_difference_by(labels, artifacts, by="study_id").collect()
+
+Grouping, scans and joining the metadata back onto the result run in Polars, and the difference
+of each group runs in the vectorised engine on zero-copy views of the start/end columns. Polars is
+an optional dependency, and is only imported when this module is used.
+"""
+
+from functools import partial
+from typing import List, Union
+
+import numpy as np
+
+from .globals import INTERVAL_COL_NAMES
+from .utils import import_polars
+from .vectorised import difference_atoms
+
+ROW_COL = "__interval_diff_row"
+
+
+def interval_difference_by(
+    intervals_a,
+    intervals_b,
+    by: Union[str, List[str]],
+    min_len: float = 0.0,
+):
+    """Chop out sub-intervals from A that overlap with B, separately for each group of rows.
+
+    Rows of A are only chopped by rows of B with the same values of the `by` columns.
+
+    Args:
+        intervals_a: Polars dataframe or lazy frame with start/end and `by` columns, and any other
+            metadata columns.
+        intervals_b: Polars dataframe or lazy frame with start/end and `by` columns.
+        by: Name of the column (or list of columns) to group rows by.
+        min_len: minimum allowable length of intervals to keep, intervals shorter than min_len will
+            be dropped.
+
+    Returns:
+        Lazy frame of the interval difference with the columns of A, sorted by the `by` columns
+        and start.
+    """
+    pl = import_polars()
+    by = [by] if isinstance(by, str) else list(by)
+    intervals_a = intervals_a.lazy().with_row_index(ROW_COL)
+    schema_a = intervals_a.collect_schema()
+
+    # Only the keys and bounds are passed to each group, the metadata is joined back afterwards
+    bounds = pl.concat(
+        [
+            intervals_a.select(
+                *by,
+                *(pl.col(col).cast(pl.Float64) for col in INTERVAL_COL_NAMES),
+                pl.col(ROW_COL).cast(pl.Int64),
+            ),
+            intervals_b.lazy().select(
+                *by,
+                *(pl.col(col).cast(pl.Float64) for col in INTERVAL_COL_NAMES),
+                pl.lit(-1, dtype=pl.Int64).alias(ROW_COL),
+            ),
+        ],
+        how="vertical_relaxed",
+    )
+    schema = {
+        **{col: schema_a[col] for col in by},
+        **{col: pl.Float64 for col in INTERVAL_COL_NAMES},
+        ROW_COL: pl.Int64,
+    }
+    diffs = bounds.group_by(by).map_groups(partial(_group_difference, min_len=min_len), schema)
+
+    columns = [col for col in schema_a.names() if col != ROW_COL]
+    metadata = intervals_a.drop(*by, *INTERVAL_COL_NAMES)
+    return (
+        diffs.join(metadata, on=ROW_COL, how="left")
+        .sort(*by, INTERVAL_COL_NAMES[0])
+        .select(
+            pl.col(col).cast(schema_a[col]) if col in INTERVAL_COL_NAMES else pl.col(col)
+            for col in columns
+        )
+    )
+
+
+def _group_difference(group, min_len: float):
+    pl = import_polars()
+    rows = group[ROW_COL].to_numpy()
+    in_a = rows >= 0
+    values = group.select(INTERVAL_COL_NAMES).to_numpy()
+    values_a, values_b = values[in_a], values[~in_a]
+
+    if len(values_a) == 0 or len(values_b) == 0:
+        result, indices = values_a, np.arange(len(values_a))
+    else:
+        result, indices = difference_atoms(values_a, [values_b], min_len=min_len)
+
+    keys = group.drop(*INTERVAL_COL_NAMES, ROW_COL).head(1)
+    return keys.gather(np.zeros(len(result), dtype=np.int64)).with_columns(
+        *(pl.Series(col, result[:, i]) for i, col in enumerate(INTERVAL_COL_NAMES)),
+        pl.Series(ROW_COL, rows[in_a][indices]),
+    )
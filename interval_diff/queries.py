@@ -0,0 +1,349 @@
+"""Vectorised queries against sorted, non-overlapping sets of intervals."""
+
+from typing import Iterator, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from numpy.typing import NDArray
+
+from .utils import interval_values
+
+IntervalsOrAtoms = Union[NDArray, pd.DataFrame, Tuple[NDArray, NDArray]]
+
+DEFAULT_JOIN_CHUNK_SIZE = 1_000_000
+
+
+def points_in_intervals(
+    points: NDArray,
+    intervals: Union[NDArray, pd.DataFrame],
+    return_index: bool = False,
+    points_sorted: bool = False,
+) -> NDArray:
+    """Find which points fall inside a set of sorted, non-overlapping intervals.
+
+    Intervals are treated as half-open `[start, end)`, so the result of `interval_difference` can
+    be used directly to mask a signal.
+
+    Args:
+        points: Array of points to look up.
+        intervals: Array representing intervals (col 0/1 represent start/end), sorted by start and
+            non-overlapping.
+        return_index: Whether to return the row of the interval containing each point instead of a
+            boolean mask.
+        points_sorted: Whether `points` are sorted, which allows the intervals to be looked up in
+            the points instead of the other way around.
+
+    Returns:
+        Boolean mask of points inside any interval, or the row of the interval containing each
+        point (-1 for points outside every interval) if `return_index` is set.
+    """
+    points = np.asarray(points)
+    intervals = interval_values(intervals)
+    check_sorted_intervals(intervals)
+    starts, ends = intervals[:, 0], intervals[:, 1]
+
+    if len(intervals) == 0:
+        index = np.full(points.shape, -1)
+    elif points_sorted:
+        index = _sorted_points_index(points, starts, ends)
+    else:
+        index = np.searchsorted(starts, points, side="right") - 1
+        index[points >= ends[index]] = -1
+
+    if return_index:
+        return index
+    return index != -1
+
+
+def _sorted_points_index(points: NDArray, starts: NDArray, ends: NDArray) -> NDArray:
+    # Each interval covers a contiguous run of sorted points, mark the run boundaries with the
+    # interval row and accumulate
+    lower = np.searchsorted(points, starts, side="left")
+    upper = np.searchsorted(points, ends, side="left")
+    rows = np.arange(1, len(starts) + 1)
+    codes = np.bincount(lower, weights=rows, minlength=len(points) + 1)
+    codes -= np.bincount(upper, weights=rows, minlength=len(points) + 1)
+    return np.cumsum(codes[:-1]).astype(int) - 1
+
+
+def nearest_intervals(
+    intervals_a: Union[NDArray, pd.DataFrame],
+    intervals_b: Union[NDArray, pd.DataFrame],
+    max_distance: Optional[float] = None,
+    assume_sorted: bool = False,
+) -> Tuple[NDArray, NDArray]:
+    """Find the nearest interval of B to each interval of A, and the gap between them.
+
+    Overlapping intervals have a distance of 0, otherwise the distance is the length of the gap,
+    negative when the interval of B is before the interval of A. When several intervals of B
+    overlap an interval of A, the one which ends last is returned, and ties between intervals
+    before and after go to the one before.
+
+    Args:
+        intervals_a: Array representing intervals (col 0/1 represent start/end).
+        intervals_b: Array representing intervals (col 0/1 represent start/end).
+        max_distance: Maximum gap to look for an interval across, intervals of A with no interval
+            of B this close get a row of -1.
+        assume_sorted: Whether B is already sorted by start and non-overlapping (as returned by
+            the engines), which allows its sort to be skipped.
+
+    Returns:
+        Tuple of the row of B nearest to each row of A (-1 if there isn't one), and the signed
+        distance to it (NaN if there isn't one).
+    """
+    intervals_a, intervals_b = interval_values(intervals_a), interval_values(intervals_b)
+    starts_a, ends_a = intervals_a[:, 0], intervals_a[:, 1]
+    rows = np.full(len(intervals_a), -1)
+    distances = np.full(len(intervals_a), np.nan)
+    if len(intervals_b) == 0:
+        return rows, distances
+
+    if assume_sorted:
+        order_start = order_end = np.arange(len(intervals_b))
+    else:
+        order_start = np.argsort(intervals_b[:, 0], kind="stable")
+        order_end = np.argsort(intervals_b[:, 1], kind="stable")
+    starts_b, ends_b = intervals_b[order_start, 0], intervals_b[order_end, 1]
+
+    # Nearest interval starting at or after the end of A
+    after = np.searchsorted(starts_b, ends_a, side="left")
+    has_after = after < len(starts_b)
+    after_distance = np.where(has_after, starts_b[np.minimum(after, len(starts_b) - 1)], np.inf)
+    after_distance -= ends_a
+
+    # Nearest interval ending at or before the start of A
+    before = np.searchsorted(ends_b, starts_a, side="right") - 1
+    before_distance = np.where(before >= 0, starts_a - ends_b[np.maximum(before, 0)], np.inf)
+
+    # Of the intervals starting before the end of A, the one which ends last overlaps A if any do
+    ends_by_start = intervals_b[order_start, 1]
+    latest_end = np.maximum.accumulate(ends_by_start)
+    latest = np.maximum.accumulate(
+        np.where(ends_by_start == latest_end, np.arange(len(ends_by_start)), 0)
+    )
+    candidate = np.maximum(after - 1, 0)
+    overlapping = (after > 0) & (latest_end[candidate] > starts_a)
+
+    use_after = after_distance < before_distance
+    rows = np.where(
+        use_after,
+        order_start[np.minimum(after, len(starts_b) - 1)],
+        order_end[np.maximum(before, 0)],
+    )
+    distances = np.where(use_after, after_distance, -before_distance)
+    rows = np.where(overlapping, order_start[latest[candidate]], rows)
+    distances = np.where(overlapping, 0.0, distances) + 0.0
+
+    missing = ~np.isfinite(distances)
+    if max_distance is not None:
+        missing |= np.abs(distances) > max_distance
+    rows[missing] = -1
+    distances[missing] = np.nan
+    return rows, distances
+
+
+def binned_coverage(
+    intervals: IntervalsOrAtoms,
+    bin_edges: NDArray,
+    normalize: bool = False,
+) -> NDArray:
+    """Get the length of each bin covered by a set of sorted, non-overlapping intervals.
+
+    Coverage is looked up from the cumulative length of the intervals at each bin edge, so the
+    cost is `O(n + b log n)` for `n` intervals and `b` bins, however the intervals and bins line up.
+
+    Args:
+        intervals: Array representing intervals (col 0/1 represent start/end), sorted by start and
+            non-overlapping, or the atoms and indices returned by `atomize_intervals` to get the
+            coverage of each group.
+        bin_edges: Sorted array of the edges of the bins, bin `i` is `[edges[i], edges[i + 1])`.
+        normalize: Whether to return the covered fraction of each bin instead of the length.
+
+    Returns:
+        Array of the covered length (or fraction) of each bin, with a column per group for the
+        output of `atomize_intervals`.
+    """
+    bin_edges = np.asarray(bin_edges, dtype=float)
+    if (np.diff(bin_edges) < 0).any():
+        raise ValueError("Expected sorted bin edges.")
+
+    coverage = np.diff(cumulative_length(intervals, bin_edges), axis=0)
+    if normalize:
+        widths = np.diff(bin_edges).reshape(-1, *[1] * (coverage.ndim - 1))
+        coverage = np.divide(coverage, widths, out=np.zeros_like(coverage), where=widths > 0)
+    return coverage
+
+
+def rolling_coverage(
+    intervals: IntervalsOrAtoms,
+    times: NDArray,
+    window: float,
+    normalize: bool = False,
+) -> NDArray:
+    """Get the length of the trailing window `[t - window, t)` covered by a set of intervals.
+
+    Args:
+        intervals: Array representing intervals (col 0/1 represent start/end), sorted by start and
+            non-overlapping, or the atoms and indices returned by `atomize_intervals` to get the
+            coverage of each group.
+        times: Array of the ends of the windows.
+        window: Length of each window.
+        normalize: Whether to return the covered fraction of each window instead of the length.
+
+    Returns:
+        Array of the covered length (or fraction) of the window ending at each time, with a column
+        per group for the output of `atomize_intervals`.
+    """
+    if window <= 0:
+        raise ValueError("Expected a positive window length.")
+    times = np.asarray(times, dtype=float)
+    coverage = cumulative_length(intervals, times) - cumulative_length(intervals, times - window)
+    return coverage / window if normalize else coverage
+
+
+def cumulative_length(intervals: IntervalsOrAtoms, points: NDArray) -> NDArray:
+    """Get the length of a set of sorted, non-overlapping intervals before each point.
+
+    Args:
+        intervals: Array representing intervals (col 0/1 represent start/end), sorted by start and
+            non-overlapping, or the atoms and indices returned by `atomize_intervals` to get the
+            length of each group.
+        points: Array of points to look up.
+
+    Returns:
+        Array of the covered length before each point, with a column per group for the output of
+        `atomize_intervals`.
+    """
+    atoms = isinstance(intervals, tuple)
+    if atoms:
+        intervals, indices = intervals
+        weights = np.not_equal(indices, -1)
+    else:
+        intervals = interval_values(intervals)
+        weights = np.ones((len(intervals), 1), dtype=bool)
+    check_sorted_intervals(intervals)
+    points = np.asarray(points, dtype=float)
+
+    result = np.zeros((*points.shape, weights.shape[1]))
+    if len(intervals) > 0:
+        starts = intervals[:, 0]
+        lengths = intervals[:, 1] - starts
+        totals = np.zeros((len(intervals) + 1, weights.shape[1]))
+        np.cumsum(lengths[:, None] * weights, axis=0, out=totals[1:])
+
+        # Every interval before the last one starting at or before a point is fully covered
+        n_before = np.searchsorted(starts, points, side="right")
+        last = np.maximum(n_before - 1, 0)
+        partial = np.clip(points - starts[last], 0, lengths[last])
+        result = totals[last] + partial[..., None] * weights[last]
+        result[n_before == 0] = 0.0
+
+    return result if atoms else result[..., 0]
+
+
+def check_sorted_intervals(intervals: NDArray):
+    """Raise an error if intervals aren't sorted by start and non-overlapping."""
+    if (intervals[1:, 0] < intervals[:-1, 1]).any():
+        raise ValueError("Expected intervals to be sorted by start and non-overlapping.")
+
+
+def interval_overlap_join(
+    intervals_a: Union[NDArray, pd.DataFrame],
+    intervals_b: Union[NDArray, pd.DataFrame],
+    min_len: float = 0.0,
+) -> Tuple[NDArray, NDArray, NDArray]:
+    """Find every pair of overlapping intervals of A and B, and their intersections.
+
+    Neither input needs to be sorted or non-overlapping. Intervals are treated as half-open, so
+    touching intervals don't overlap. Pairs are found with binary searches on the sorted starts of
+    each input, in `O((n + m) log(n + m) + k)` for `k` overlapping pairs, and aren't in any
+    particular order.
+
+    Args:
+        intervals_a: Array representing intervals (col 0/1 represent start/end).
+        intervals_b: Array representing intervals (col 0/1 represent start/end).
+        min_len: minimum allowable length of intersections to keep, pairs overlapping by
+            min_len or less will be dropped.
+
+    Returns:
+        Tuple of the rows of A and rows of B of each overlapping pair, and an array of their
+        intersections.
+    """
+    chunks = list(iter_interval_overlap_join(intervals_a, intervals_b, min_len=min_len))
+    if len(chunks) == 0:
+        return np.empty(0, dtype=int), np.empty(0, dtype=int), np.empty((0, 2))
+    rows_a, rows_b, intersections = zip(*chunks)
+    return np.concatenate(rows_a), np.concatenate(rows_b), np.concatenate(intersections)
+
+
+def iter_interval_overlap_join(
+    intervals_a: Union[NDArray, pd.DataFrame],
+    intervals_b: Union[NDArray, pd.DataFrame],
+    min_len: float = 0.0,
+    chunk_size: Optional[int] = DEFAULT_JOIN_CHUNK_SIZE,
+) -> Iterator[Tuple[NDArray, NDArray, NDArray]]:
+    """Find the overlapping pairs of `interval_overlap_join` in chunks of at most `chunk_size`.
+
+    Only one chunk of pairs is in memory at a time, so joins with more pairs than fit in memory
+    can be reduced chunk by chunk.
+
+    Args:
+        intervals_a: Array representing intervals (col 0/1 represent start/end).
+        intervals_b: Array representing intervals (col 0/1 represent start/end).
+        min_len: minimum allowable length of intersections to keep, pairs overlapping by
+            min_len or less will be dropped.
+        chunk_size: Maximum number of pairs in each chunk, everything in one chunk if `None`.
+
+    Yields:
+        Tuples of the rows of A and rows of B of each overlapping pair, and an array of their
+        intersections.
+    """
+    intervals_a, intervals_b = interval_values(intervals_a), interval_values(intervals_b)
+    if chunk_size is not None and chunk_size < 1:
+        raise ValueError("Expected a chunk size of at least 1.")
+
+    # Overlapping pairs either have the start of B in [start_a, end_a), or the start of A in
+    # (start_b, end_b), so each pair is found exactly once by one of the two searches
+    order_b = np.argsort(intervals_b[:, 0], kind="stable")
+    starts_b = intervals_b[order_b, 0]
+    lower = np.searchsorted(starts_b, intervals_a[:, 0], side="left")
+    upper = np.searchsorted(starts_b, intervals_a[:, 1], side="left")
+    for rows_a, rows_b in _expand_ranges(lower, upper, chunk_size):
+        yield _overlap_pairs(intervals_a, intervals_b, rows_a, order_b[rows_b], min_len)
+
+    order_a = np.argsort(intervals_a[:, 0], kind="stable")
+    starts_a = intervals_a[order_a, 0]
+    lower = np.searchsorted(starts_a, intervals_b[:, 0], side="right")
+    upper = np.searchsorted(starts_a, intervals_b[:, 1], side="left")
+    for rows_b, rows_a in _expand_ranges(lower, upper, chunk_size):
+        yield _overlap_pairs(intervals_a, intervals_b, order_a[rows_a], rows_b, min_len)
+
+
+def _expand_ranges(
+    lower: NDArray, upper: NDArray, chunk_size: Optional[int]
+) -> Iterator[Tuple[NDArray, NDArray]]:
+    # Expand the ranges `[lower[i], upper[i])` into pairs `(i, j)`, taking consecutive slices of
+    # the flattened pairs so each chunk only repeats the rows it covers
+    counts = np.maximum(upper - lower, 0)
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+    total = int(offsets[-1])
+    chunk_size = total if chunk_size is None else chunk_size
+
+    for start in range(0, total, max(chunk_size, 1)):
+        stop = min(start + chunk_size, total)
+        first = np.searchsorted(offsets, start, side="right") - 1
+        last = np.searchsorted(offsets, stop, side="left")
+
+        rows = np.arange(first, last)
+        row_counts = np.minimum(offsets[first + 1 : last + 1], stop) - np.maximum(
+            offsets[first:last], start
+        )
+        row_offsets = np.repeat(lower[first:last] - offsets[first:last], row_counts)
+        yield np.repeat(rows, row_counts), np.arange(start, stop) + row_offsets
+
+
+def _overlap_pairs(intervals_a, intervals_b, rows_a, rows_b, min_len):
+    starts = np.maximum(intervals_a[rows_a, 0], intervals_b[rows_b, 0])
+    ends = np.minimum(intervals_a[rows_a, 1], intervals_b[rows_b, 1])
+    keep = ends - starts > min_len
+    return rows_a[keep], rows_b[keep], np.stack([starts[keep], ends[keep]], axis=1)
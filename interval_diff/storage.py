@@ -0,0 +1,269 @@
+"""Compressed, chunked storage for large interval sets which supports range queries.
+
+Intervals are stored in chunks of rows sorted by start, and each chunk is compressed separately.
+A footer at the end of the file records the byte range, number of rows, smallest start and
+largest end of every chunk, so a reader only decodes the chunks which can overlap a query:
+
+    MAGIC | chunk 0 | chunk 1 | ... | footer (one CHUNK_INDEX_DTYPE record per chunk) |
+    number of chunks (uint64) | MAGIC
+
+Bounds are stored as the bits of float64s, which are monotonic for sorted non-negative starts, so
+the starts are delta-encoded as integers and ends are stored relative to their starts. Both are
+exact, and the bytes are shuffled by significance before compressing so the mostly zero high bytes
+of small deltas compress well.
+
+Either engine can read straight from a store, passing an `IntervalStore` as A or B only decodes
+the chunks overlapping the window (if any) and the span of A:
+
+    labels, artifacts = IntervalStore("labels.ivz"), IntervalStore("artifacts.ivz")
+    result = interval_difference(labels, artifacts, window=(t0, t1))
+"""
+
+import zlib
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from numpy.typing import NDArray
+
+from .globals import EMPTY_INTERVALS
+from .utils import interval_values
+
+STORE_SUFFIX = ".ivz"
+MAGIC = b"IVDIFF01"
+DEFAULT_STORE_CHUNK_SIZE = 65_536
+DEFAULT_COMPRESSION_LEVEL = 1
+CHUNK_INDEX_DTYPE = np.dtype(
+    [
+        ("offset", "<u8"),
+        ("nbytes", "<u8"),
+        ("n_rows", "<u8"),
+        ("min_start", "<f8"),
+        ("max_end", "<f8"),
+    ]
+)
+_TRAILER_DTYPE = np.dtype("<u8")
+
+
+class IntervalStoreWriter:
+    """Context manager for incrementally writing intervals to a store.
+
+    Rows are buffered and written in chunks of `chunk_size` rows, each sorted by start. The store
+    is only sorted overall if the intervals are written in order of start, which also makes the
+    chunk index most selective.
+
+    Args:
+        path: File to write the store to.
+        chunk_size: Number of rows in each chunk.
+        level: zlib compression level of each chunk.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        chunk_size: int = DEFAULT_STORE_CHUNK_SIZE,
+        level: int = DEFAULT_COMPRESSION_LEVEL,
+    ):
+        if chunk_size < 1:
+            raise ValueError("Expected a chunk size of at least 1.")
+        self.path = path
+        self.chunk_size = chunk_size
+        self.level = level
+        self.n_rows = 0
+        self._file = None
+        self._index: List[tuple] = []
+        self._pending: List[NDArray] = []
+        self._n_pending = 0
+
+    def __enter__(self):
+        self._file = open(self.path, "wb")
+        self._file.write(MAGIC)
+        return self
+
+    def write(self, intervals: Union[NDArray, pd.DataFrame]):
+        """Append intervals to the store."""
+        intervals = np.asarray(interval_values(intervals), dtype=np.float64)
+        if len(intervals) == 0:
+            return
+        self._pending.append(intervals)
+        self._n_pending += len(intervals)
+        self.n_rows += len(intervals)
+        if self._n_pending >= self.chunk_size:
+            self._flush(final=False)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            if exc_type is None:
+                self._flush(final=True)
+                index = np.array(self._index, dtype=CHUNK_INDEX_DTYPE)
+                self._file.write(index.tobytes())
+                self._file.write(np.array(len(index), dtype=_TRAILER_DTYPE).tobytes())
+                self._file.write(MAGIC)
+        finally:
+            self._file.close()
+
+    def _flush(self, final: bool):
+        if self._n_pending == 0:
+            return
+        pending = np.concatenate(self._pending, axis=0)
+        n_full = len(pending) if final else len(pending) - len(pending) % self.chunk_size
+        for i in range(0, n_full, self.chunk_size):
+            self._write_chunk(pending[i : min(i + self.chunk_size, n_full)])
+        self._pending = [pending[n_full:]]
+        self._n_pending = len(pending) - n_full
+
+    def _write_chunk(self, intervals: NDArray):
+        intervals = intervals[np.argsort(intervals[:, 0], kind="stable")]
+        data = zlib.compress(encode_chunk(intervals), self.level)
+        self._index.append(
+            (self._file.tell(), len(data), len(intervals), intervals[0, 0], intervals[:, 1].max())
+        )
+        self._file.write(data)
+
+
+def write_intervals(
+    path: Union[str, Path],
+    intervals: Union[NDArray, pd.DataFrame],
+    chunk_size: int = DEFAULT_STORE_CHUNK_SIZE,
+    level: int = DEFAULT_COMPRESSION_LEVEL,
+) -> "IntervalStore":
+    """Sort intervals by start and write them to a store.
+
+    Args:
+        path: File to write the store to.
+        intervals: Array representing intervals (col 0/1 represent start/end).
+        chunk_size: Number of rows in each chunk.
+        level: zlib compression level of each chunk.
+
+    Returns:
+        Store of the written intervals.
+    """
+    intervals = interval_values(intervals)
+    with IntervalStoreWriter(path, chunk_size=chunk_size, level=level) as writer:
+        writer.write(intervals[np.argsort(intervals[:, 0], kind="stable")])
+    return IntervalStore(path)
+
+
+class IntervalStore:
+    """Reader for a store written by `IntervalStoreWriter`, only the chunk index is read upfront.
+
+    Args:
+        path: File containing the store.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = path
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} isn't an interval store.")
+            f.seek(-(_TRAILER_DTYPE.itemsize + len(MAGIC)), 2)
+            n_chunks = int(np.frombuffer(f.read(_TRAILER_DTYPE.itemsize), dtype=_TRAILER_DTYPE)[0])
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is truncated, the chunk index is missing.")
+            f.seek(
+                -(n_chunks * CHUNK_INDEX_DTYPE.itemsize + _TRAILER_DTYPE.itemsize + len(MAGIC)), 2
+            )
+            self.index = np.frombuffer(
+                f.read(n_chunks * CHUNK_INDEX_DTYPE.itemsize), dtype=CHUNK_INDEX_DTYPE
+            )
+
+    def __repr__(self):
+        return f"IntervalStore({str(self.path)!r}, {len(self)} rows, {len(self.index)} chunks)"
+
+    def __len__(self):
+        return int(self.index["n_rows"].sum())
+
+    @property
+    def span(self) -> Optional[Tuple[float, float]]:
+        """Smallest start and largest end of the stored intervals, `None` if there aren't any."""
+        if len(self.index) == 0:
+            return None
+        return float(self.index["min_start"].min()), float(self.index["max_end"].max())
+
+    def chunks_overlapping(self, window: Optional[Tuple[float, float]] = None) -> NDArray:
+        """Get the positions of the chunks which can contain intervals overlapping `window`."""
+        if window is None:
+            return np.arange(len(self.index))
+        t0, t1 = window
+        return np.flatnonzero((self.index["min_start"] < t1) & (self.index["max_end"] > t0))
+
+    def iter_chunks(self, window: Optional[Tuple[float, float]] = None) -> Iterator[NDArray]:
+        """Decode the chunks which can overlap `window` (every chunk if `None`) one at a time."""
+        with open(self.path, "rb") as f:
+            for chunk in self.chunks_overlapping(window):
+                offset, nbytes, n_rows, _, _ = self.index[chunk]
+                f.seek(int(offset))
+                yield decode_chunk(zlib.decompress(f.read(int(nbytes))), int(n_rows))
+
+    def read(self, window: Optional[Tuple[float, float]] = None) -> NDArray:
+        """Read the intervals overlapping `window` (every interval if `None`).
+
+        Only the chunks which can overlap the window are decoded, and intervals aren't clipped.
+        """
+        chunks = list(self.iter_chunks(window))
+        if len(chunks) == 0:
+            return EMPTY_INTERVALS
+        intervals = np.concatenate(chunks, axis=0)
+        if window is not None:
+            t0, t1 = window
+            intervals = intervals[(intervals[:, 1] > t0) & (intervals[:, 0] < t1)]
+        return intervals
+
+
+def encode_chunk(intervals: NDArray) -> bytes:
+    """Encode intervals sorted by start as delta-encoded float bits, shuffled by byte."""
+    bits = np.ascontiguousarray(intervals, dtype=np.float64).view(np.int64)
+    codes = np.empty((2, len(intervals)), dtype=np.int64)
+    codes[0, 0] = bits[0, 0]
+    np.subtract(bits[1:, 0], bits[:-1, 0], out=codes[0, 1:])
+    np.subtract(bits[:, 1], bits[:, 0], out=codes[1])
+    return codes.view(np.uint8).reshape(-1, 8).T.tobytes()
+
+
+def decode_chunk(data: bytes, n_rows: int) -> NDArray:
+    """Decode intervals encoded by `encode_chunk`."""
+    codes = np.frombuffer(data, dtype=np.uint8).reshape(8, -1).T.copy().view(np.int64)
+    codes = codes.reshape(2, n_rows)
+    bits = np.empty((n_rows, 2), dtype=np.int64)
+    np.cumsum(codes[0], out=bits[:, 0])
+    np.add(bits[:, 0], codes[1], out=bits[:, 1])
+    return bits.view(np.float64)
+
+
+def read_stores(
+    intervals_a,
+    intervals_b,
+    window: Optional[Tuple[float, float]] = None,
+) -> tuple:
+    """Read the parts of stored A and B which are needed for `A \\ B`, other inputs are unchanged.
+
+    A is read inside `window`, and B inside the window and the span of A, so only the chunks which
+    can affect the result are decoded.
+    """
+    if isinstance(intervals_a, IntervalStore):
+        intervals_a = intervals_a.read(window)
+
+    is_list = isinstance(intervals_b, (list, tuple))
+    groups_b = list(intervals_b) if is_list else [intervals_b]
+    if not any(isinstance(group, IntervalStore) for group in groups_b):
+        return intervals_a, intervals_b
+
+    # Nothing outside the span of A can overlap it
+    values_a = interval_values(intervals_a)
+    if len(values_a) == 0:
+        span = None
+    else:
+        span = (values_a[:, 0].min(), values_a[:, 1].max())
+        if window is not None:
+            span = (max(span[0], window[0]), min(span[1], window[1]))
+    groups_b = [
+        _read_span(group, span) if isinstance(group, IntervalStore) else group for group in groups_b
+    ]
+    return intervals_a, groups_b if is_list else groups_b[0]
+
+
+def _read_span(store: IntervalStore, span: Optional[Tuple[float, float]]) -> NDArray:
+    if span is None or span[0] >= span[1]:
+        return EMPTY_INTERVALS
+    return store.read(span)
@@ -0,0 +1,381 @@
+"""Chunked file I/O for computing interval differences over files too large for memory."""
+
+import logging
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+from numpy.typing import NDArray
+
+from .globals import EMPTY_INTERVALS, INTERVAL_COL_NAMES
+from .storage import STORE_SUFFIX, IntervalStore, IntervalStoreWriter
+from .vectorised import interval_difference
+
+DEFAULT_CHUNK_SIZE = 1_000_000
+STDIO_PATH = "-"
+
+logger = logging.getLogger(__name__)
+
+IntervalChunk = Union[NDArray, pd.DataFrame]
+
+
+def diff_files(
+    path_a: Union[str, Path],
+    path_b: Union[str, Path],
+    path_out: Union[str, Path] = STDIO_PATH,
+    min_len: float = 0.0,
+    by: Optional[List[str]] = None,
+    start_col: str = INTERVAL_COL_NAMES[0],
+    end_col: str = INTERVAL_COL_NAMES[1],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> int:
+    """Compute `A \\ B` between two interval files and write the result to `path_out`.
+
+    Inputs are read in chunks of at most `chunk_size` rows, so both files must be sorted by start.
+    Supported formats are CSV, Parquet (requires `pyarrow`), `.npy` arrays of shape `(n, 2)` and
+    interval stores (`.ivz`, see `interval_diff.storage`).
+    A path of `"-"` reads/writes CSV on stdin/stdout.
+
+    Args:
+        path_a: File containing intervals A.
+        path_b: File containing intervals B.
+        path_out: File to write `A \\ B` to.
+        min_len: minimum allowable length of intervals to keep, intervals shorter than min_len will
+            be dropped.
+        by: Columns to group by, intervals in A are only clipped by intervals in B with matching
+            values in these columns.
+        start_col: Name of the column holding interval starts.
+        end_col: Name of the column holding interval ends.
+        chunk_size: Maximum number of rows to read from a file at once.
+
+    Returns:
+        Number of intervals written.
+    """
+    columns = {start_col: INTERVAL_COL_NAMES[0], end_col: INTERVAL_COL_NAMES[1]}
+    chunks_a = read_interval_chunks(path_a, chunk_size=chunk_size, columns=columns)
+    chunks_b = read_interval_chunks(path_b, chunk_size=chunk_size, columns=columns)
+
+    n_written = 0
+    with IntervalWriter(path_out, columns={v: k for k, v in columns.items()}) as writer:
+        for result in stream_interval_difference(chunks_a, chunks_b, min_len=min_len, by=by):
+            writer.write(result)
+            n_written += len(result)
+
+    logger.info(f"Wrote {n_written} intervals to {path_out}")
+    return n_written
+
+
+def stream_interval_difference(
+    chunks_a: Iterable[IntervalChunk],
+    chunks_b: Iterable[IntervalChunk],
+    min_len: float = 0.0,
+    by: Optional[List[str]] = None,
+) -> Iterator[IntervalChunk]:
+    """Compute `A \\ B` chunk by chunk, for chunks of A and B that are sorted by start.
+
+    Only the rows of B which can overlap the current chunk of A are held in memory at once.
+
+    Args:
+        chunks_a: Iterable of interval arrays/dataframes representing A, sorted by start.
+        chunks_b: Iterable of interval arrays/dataframes representing B, sorted by start.
+        min_len: minimum allowable length of intervals to keep, intervals shorter than min_len will
+            be dropped.
+        by: Columns to group by (dataframe chunks only).
+
+    Yields:
+        Interval difference between each chunk of A and the overlapping intervals of B.
+    """
+    chunks_b = iter(chunks_b)
+    window = IntervalWindow()
+    last_start_a = -np.inf
+    for chunk_a in chunks_a:
+        if len(chunk_a) == 0:
+            continue
+        starts_a, ends_a = interval_bounds(chunk_a)
+        last_start_a = check_sorted(starts_a, last_start_a, "A")
+
+        while window.needs(ends_a.max()):
+            window.extend(next(chunks_b, None))
+        window.drop_before(starts_a.min())
+
+        yield window_difference(chunk_a, window, min_len=min_len, by=by)
+
+
+class IntervalWindow:
+    """Buffer of intervals from a sorted stream that may overlap the chunk being processed."""
+
+    def __init__(self):
+        self.intervals = None
+        self.exhausted = False
+        self.last_start = -np.inf
+
+    @property
+    def started(self) -> bool:
+        """Whether any intervals have been read from the stream."""
+        return self.last_start > -np.inf
+
+    def needs(self, end: float) -> bool:
+        """Whether more intervals must be read to cover everything that starts before `end`."""
+        return not self.exhausted and self.last_start < end
+
+    def extend(self, chunk: Optional[IntervalChunk]):
+        """Append a chunk to the buffer, a chunk of `None` marks the end of the stream."""
+        if chunk is None:
+            self.exhausted = True
+            if self.intervals is None:
+                self.intervals = EMPTY_INTERVALS
+            return
+        if len(chunk) == 0:
+            return
+        starts, _ = interval_bounds(chunk)
+        self.last_start = check_sorted(starts, self.last_start, "B")
+        if self.intervals is None or len(self.intervals) == 0:
+            self.intervals = chunk
+        elif isinstance(chunk, pd.DataFrame):
+            self.intervals = pd.concat([self.intervals, chunk], ignore_index=True)
+        else:
+            self.intervals = np.concatenate([self.intervals, chunk], axis=0)
+
+    def drop_before(self, start: float):
+        """Drop buffered intervals which end before `start`."""
+        if self.intervals is None or len(self.intervals) == 0:
+            return
+        _, ends = interval_bounds(self.intervals)
+        mask = ends > start
+        if isinstance(self.intervals, pd.DataFrame):
+            self.intervals = self.intervals[mask].reset_index(drop=True)
+        else:
+            self.intervals = self.intervals[mask]
+
+
+def window_difference(
+    chunk_a: IntervalChunk,
+    window: IntervalWindow,
+    min_len: float = 0.0,
+    by: Optional[List[str]] = None,
+) -> IntervalChunk:
+    """Compute `A \\ B` for a chunk of A and the buffered intervals of B which can overlap it."""
+    if not by and len(window.intervals) == 0 and window.started:
+        # B isn't empty, it just doesn't reach this chunk, so short intervals are dropped like in
+        # the unchunked difference (which only returns A unchanged if all of B is empty)
+        return drop_short(chunk_a, min_len)
+    return chunk_difference(chunk_a, window.intervals, min_len=min_len, by=by)
+
+
+def chunk_difference(
+    chunk_a: IntervalChunk,
+    chunk_b: IntervalChunk,
+    min_len: float = 0.0,
+    by: Optional[List[str]] = None,
+) -> IntervalChunk:
+    """Compute `A \\ B` for a single chunk, optionally within groups of matching `by` values."""
+    if not by:
+        return interval_difference(chunk_a, chunk_b, min_len=min_len)
+
+    if not isinstance(chunk_a, pd.DataFrame):
+        raise ValueError("Grouping with `by` requires tabular (CSV/Parquet) inputs.")
+
+    groups_b = {}
+    if isinstance(chunk_b, pd.DataFrame):
+        groups_b = dict(iter(chunk_b.groupby(by, sort=False)))
+
+    results = []
+    for key, group_a in chunk_a.groupby(by, sort=False):
+        group_b = groups_b.get(key)
+        if group_b is None:
+            # Nothing to chop out, but intervals shorter than `min_len` are dropped like in every
+            # other group
+            results.append(drop_short(group_a, min_len))
+            continue
+        results.append(interval_difference(group_a, group_b, min_len=min_len))
+
+    results = [r for r in results if len(r) > 0]
+    if len(results) == 0:
+        return chunk_a.iloc[:0]
+    # Groups come out one after another, so restore the order of the unchunked result
+    return pd.concat(results).sort_values(INTERVAL_COL_NAMES[0], kind="stable", ignore_index=True)
+
+
+def drop_short(intervals: IntervalChunk, min_len: float) -> IntervalChunk:
+    """Drop intervals which aren't longer than `min_len`."""
+    starts, ends = interval_bounds(intervals)
+    return intervals[ends - starts > min_len]
+
+
+def interval_bounds(intervals: IntervalChunk):
+    """Get arrays of starts and ends from an interval array/dataframe."""
+    if isinstance(intervals, pd.DataFrame):
+        return (
+            intervals[INTERVAL_COL_NAMES[0]].to_numpy(),
+            intervals[INTERVAL_COL_NAMES[1]].to_numpy(),
+        )
+    return intervals[:, 0], intervals[:, 1]
+
+
+def check_sorted(starts: NDArray, last_start: float, name: str) -> float:
+    """Raise an error if `starts` don't follow on from `last_start` in ascending order."""
+    if starts[0] < last_start or (np.diff(starts) < 0).any():
+        raise ValueError(f"Intervals in {name} must be sorted by start for chunked processing.")
+    return starts[-1]
+
+
+def read_interval_chunks(
+    path: Union[str, Path],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    columns: Optional[Dict[str, str]] = None,
+) -> Iterator[IntervalChunk]:
+    """Read an interval file in chunks of at most `chunk_size` rows.
+
+    CSV and Parquet files are read as dataframes with columns renamed by `columns`, `.npy` files
+    are memory-mapped and read as arrays, and interval stores are read as arrays one stored chunk
+    at a time.
+    """
+    suffix = _file_suffix(path)
+    if suffix == ".npy":
+        yield from _read_npy_chunks(path, chunk_size)
+        return
+    if suffix == STORE_SUFFIX:
+        yield from IntervalStore(path).iter_chunks()
+        return
+
+    if suffix == ".csv":
+        reader = pd.read_csv(sys.stdin if str(path) == STDIO_PATH else path, chunksize=chunk_size)
+    elif suffix == ".parquet":
+        reader = _read_parquet_chunks(path, chunk_size)
+    else:
+        raise ValueError(f"Unsupported file type '{suffix}' for {path}.")
+
+    for chunk in reader:
+        if columns:
+            chunk = chunk.rename(columns=columns)
+        yield chunk
+
+
+def _read_npy_chunks(path: Union[str, Path], chunk_size: int) -> Iterator[NDArray]:
+    intervals = np.load(path, mmap_mode="r")
+    if intervals.ndim != 2 or intervals.shape[1] != 2:
+        raise ValueError(f"Expected an array of shape (n, 2) in {path}, got {intervals.shape}.")
+    for i in range(0, len(intervals), chunk_size):
+        yield np.asarray(intervals[i : i + chunk_size])
+
+
+def _read_parquet_chunks(path: Union[str, Path], chunk_size: int) -> Iterator[pd.DataFrame]:
+    pq = _import_parquet()
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+        yield batch.to_pandas()
+
+
+class IntervalWriter:
+    """Context manager for incrementally writing interval chunks to a CSV, Parquet, `.npy` or
+    interval store file.
+
+    `.npy` output is spooled to a temporary file and the array header is written once the final
+    number of rows is known.
+    """
+
+    def __init__(self, path: Union[str, Path], columns: Optional[Dict[str, str]] = None):
+        self.path = path
+        self.suffix = _file_suffix(path)
+        if self.suffix not in (".csv", ".parquet", ".npy", STORE_SUFFIX):
+            raise ValueError(f"Unsupported file type '{self.suffix}' for {path}.")
+        self.columns = columns or {}
+        self.n_rows = 0
+        self._file = None
+        self._writer = None
+        self._store = None
+        self._started = False
+
+    def __enter__(self):
+        if self.suffix == ".csv":
+            self._file = (
+                sys.stdout
+                if str(self.path) == STDIO_PATH
+                else open(self.path, "w", encoding="utf-8", newline="")
+            )
+        elif self.suffix == ".npy":
+            self._file = tempfile.TemporaryFile()
+        elif self.suffix == STORE_SUFFIX:
+            self._store = IntervalStoreWriter(self.path).__enter__()
+        return self
+
+    def write(self, intervals: IntervalChunk):
+        """Append a chunk of intervals to the output."""
+        if self.suffix == ".npy":
+            self._write_npy(intervals)
+        elif self.suffix == STORE_SUFFIX:
+            self._store.write(intervals)
+        else:
+            self._write_table(intervals)
+        self.n_rows += len(intervals)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            if exc_type is None:
+                self._finalise()
+        finally:
+            if self._writer is not None:
+                self._writer.close()
+            if self._store is not None:
+                self._store.__exit__(exc_type, exc_value, traceback)
+            if self._file is not None and self._file is not sys.stdout:
+                self._file.close()
+
+    def _write_table(self, intervals: IntervalChunk):
+        if not isinstance(intervals, pd.DataFrame):
+            intervals = pd.DataFrame(np.asarray(intervals), columns=INTERVAL_COL_NAMES)
+        intervals = intervals.rename(columns=self.columns)
+
+        if self.suffix == ".csv":
+            intervals.to_csv(self._file, header=not self._started, index=False)
+        else:
+            pa, pq = _import_arrow(), _import_parquet()
+            table = pa.Table.from_pandas(intervals, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+            self._writer.write_table(table)
+        self._started = True
+
+    def _write_npy(self, intervals: IntervalChunk):
+        if isinstance(intervals, pd.DataFrame):
+            intervals = intervals[INTERVAL_COL_NAMES].to_numpy()
+        self._file.write(np.ascontiguousarray(intervals, dtype=np.float64).tobytes())
+
+    def _finalise(self):
+        if self.suffix == STORE_SUFFIX:
+            return
+        if self.suffix != ".npy" and not self._started:
+            self._write_table(EMPTY_INTERVALS)
+        elif self.suffix == ".npy":
+            header = {
+                "descr": np.lib.format.dtype_to_descr(np.dtype(np.float64)),
+                "fortran_order": False,
+                "shape": (self.n_rows, 2),
+            }
+            self._file.seek(0)
+            with open(self.path, "wb") as f:
+                np.lib.format.write_array_header_1_0(f, header)
+                shutil.copyfileobj(self._file, f)
+
+
+def _file_suffix(path: Union[str, Path]) -> str:
+    if str(path) == STDIO_PATH:
+        return ".csv"
+    return Path(path).suffix.lower()
+
+
+def _import_parquet():
+    try:
+        import pyarrow.parquet as pq  # pylint: disable=import-outside-toplevel
+    except ImportError as err:
+        raise ImportError("Reading/writing Parquet files requires `pyarrow`.") from err
+    return pq
+
+
+def _import_arrow():
+    import pyarrow as pa  # pylint: disable=import-outside-toplevel
+
+    return pa
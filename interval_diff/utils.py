@@ -1,4 +1,4 @@
-from typing import Optional, List, Tuple
+from typing import Optional, List, Tuple, Union
 
 import numpy as np
 import pandas as pd
@@ -16,6 +16,7 @@ def generate_random_intervals(
     min_len: float = 10.0,
     precision: int = 2,
     dataframe: bool = False,
+    structured: bool = False,
 ) -> NDArray:
     """Generate a specified number of random intervals"""
     if n_intervals < 1:
@@ -26,10 +27,217 @@ def generate_random_intervals(
     data = start + np.cumsum(data)
     starts, ends = data[0::2], data[1::2]
     results = np.stack([starts, ends], axis=1)
-    if not dataframe:
+    if not dataframe and not structured:
         return results
+    tags = [DEFAULT_TAGS[i] for i in np.random.randint(0, len(DEFAULT_TAGS), n_intervals)]
+    if structured:
+        start_col, end_col = INTERVAL_COL_NAMES
+        records = np.empty(
+            n_intervals, dtype=[(start_col, float), (end_col, float), ("tags", "U1")]
+        )
+        records[start_col], records[end_col], records["tags"] = starts, ends, tags
+        return records
     results = pd.DataFrame(results, columns=INTERVAL_COL_NAMES)
-    results["tags"] = [
-        DEFAULT_TAGS[i] for i in np.random.randint(0, len(DEFAULT_TAGS), n_intervals)
-    ]
+    results["tags"] = tags
     return results
+
+
+def is_structured(intervals: Union[NDArray, pd.DataFrame]) -> bool:
+    """Check whether intervals are a structured array, with start/end and metadata fields."""
+    return isinstance(intervals, np.ndarray) and intervals.dtype.names is not None
+
+
+def is_interval_array(intervals) -> bool:
+    """Check whether intervals are a `pd.IntervalIndex` or `pd.arrays.IntervalArray`."""
+    return isinstance(intervals, (pd.IntervalIndex, pd.arrays.IntervalArray))
+
+
+def is_polars(intervals) -> bool:
+    """Check whether intervals are a `polars.DataFrame` or `polars.LazyFrame`."""
+    # Checked by name so polars doesn't need to be imported
+    cls = type(intervals)
+    return cls.__module__.startswith("polars.") and cls.__name__ in ("DataFrame", "LazyFrame")
+
+
+def is_lazy_frame(intervals) -> bool:
+    """Check whether intervals are a `polars.LazyFrame`."""
+    return is_polars(intervals) and type(intervals).__name__ == "LazyFrame"
+
+
+def import_polars():
+    """Import `polars`, which is only needed for Polars inputs."""
+    try:
+        import polars as pl  # pylint: disable=import-outside-toplevel
+    except ImportError as err:
+        raise ImportError("Polars inputs require `polars`.") from err
+    return pl
+
+
+def has_metadata(intervals) -> bool:
+    """Check whether intervals are a dataframe or structured array, which can have metadata."""
+    return isinstance(intervals, pd.DataFrame) or is_structured(intervals) or is_polars(intervals)
+
+
+def interval_values(intervals: Union[NDArray, pd.DataFrame]) -> NDArray:
+    """Get an array of intervals (col 0/1 represent start/end) from an array or dataframe."""
+    if isinstance(intervals, pd.DataFrame):
+        return intervals[INTERVAL_COL_NAMES].values
+    if is_polars(intervals):
+        # Only the interval columns of a lazy frame are computed, and columns of the same dtype
+        # without nulls are viewed without a copy
+        intervals = intervals.select(INTERVAL_COL_NAMES)
+        if is_lazy_frame(intervals):
+            intervals = intervals.collect()
+        return intervals.to_numpy()
+    if is_interval_array(intervals):
+        return np.stack([intervals.left.to_numpy(), intervals.right.to_numpy()], axis=1)
+    if is_structured(intervals):
+        start_col, end_col = INTERVAL_COL_NAMES
+        return np.stack([intervals[start_col], intervals[end_col]], axis=1)
+    return intervals
+
+
+def interval_closed(intervals_a, intervals_b) -> str:
+    """Get the side interval arrays A and B are closed on, which must be the same for both.
+
+    Only half-open intervals are supported, since chopping a closed (or open) interval out of
+    another leaves intervals which are open (or closed) at the cut.
+    """
+    closed = intervals_a.closed
+    if closed not in ("left", "right"):
+        raise ValueError(f"Expected intervals closed on the left or right, got closed='{closed}'.")
+    for intervals in intervals_b if isinstance(intervals_b, (list, tuple)) else [intervals_b]:
+        if is_interval_array(intervals) and intervals.closed != closed:
+            raise ValueError(
+                f"Expected intervals of B to be closed on the same side as A ('{closed}'), got "
+                f"closed='{intervals.closed}'."
+            )
+    return closed
+
+
+def as_interval_array(values: NDArray, like):
+    """Build an interval array of the same type (and name) as `like` from an array of intervals."""
+    if isinstance(like, pd.IntervalIndex):
+        return pd.IntervalIndex.from_arrays(
+            values[:, 0], values[:, 1], closed=like.closed, name=like.name
+        )
+    return pd.arrays.IntervalArray.from_arrays(values[:, 0], values[:, 1], closed=like.closed)
+
+
+def take_intervals(
+    intervals: Union[NDArray, pd.DataFrame],
+    indices: NDArray,
+    values: NDArray,
+) -> Union[NDArray, pd.DataFrame]:
+    """Gather rows of a dataframe or structured array, and replace their starts/ends with `values`.
+
+    Args:
+        intervals: Dataframe or structured array with start/end columns and metadata.
+        indices: Rows of `intervals` to gather.
+        values: Array representing the new intervals (col 0/1 represent start/end) of each row.
+
+    Returns:
+        Gathered rows with the same columns/fields as `intervals`.
+    """
+    if is_structured(intervals):
+        result = np.asarray(np.take(intervals, indices))
+        for i, col in enumerate(INTERVAL_COL_NAMES):
+            result[col] = values[:, i]
+        return result
+
+    if is_polars(intervals):
+        pl = import_polars()
+        return intervals.gather(indices).with_columns(
+            pl.Series(col, values[:, i]).cast(intervals.schema[col])
+            for i, col in enumerate(INTERVAL_COL_NAMES)
+        )
+
+    # `take` gathers each block of the frame once and keeps categorical and extension dtypes, so
+    # only the interval columns need replacing
+    result = intervals.take(indices)
+    result.index = pd.RangeIndex(len(result))
+    result[INTERVAL_COL_NAMES] = values
+    return result
+
+
+def as_interval_groups(
+    intervals: Union[NDArray, pd.DataFrame, List[Union[NDArray, pd.DataFrame]]],
+) -> List[NDArray]:
+    """Get a list of non-empty interval arrays from a single group or a list of groups."""
+    if not isinstance(intervals, (list, tuple)):
+        intervals = [intervals]
+    groups = [interval_values(group) for group in intervals]
+    return [group for group in groups if len(group) > 0]
+
+
+def select_window(
+    intervals: Union[NDArray, pd.DataFrame],
+    window: Tuple[float, float],
+    assume_sorted: bool = False,
+    clip: bool = True,
+    return_rows: bool = False,
+) -> Union[NDArray, pd.DataFrame]:
+    """Select the intervals which overlap a window, and clip them to the window.
+
+    Args:
+        intervals: Array representing intervals (col 0/1 represent start/end).
+        window: Start and end of the window.
+        assume_sorted: Whether the intervals are sorted by start and non-overlapping, in which case
+            the rows overlapping the window are found with a binary search instead of a full scan.
+        clip: Whether to clip the selected intervals to the window.
+        return_rows: Whether to also return the positions of the selected rows.
+
+    Returns:
+        Intervals overlapping the window, and the positions of their rows if `return_rows` is set.
+    """
+    t0, t1 = window
+    if is_lazy_frame(intervals):
+        intervals = intervals.collect()
+    values = interval_values(intervals)
+    starts, ends = values[:, 0], values[:, 1]
+    if assume_sorted:
+        rows = slice(np.searchsorted(ends, t0, side="right"), np.searchsorted(starts, t1))
+    else:
+        rows = (ends > t0) & (starts < t1)
+
+    if isinstance(intervals, pd.DataFrame):
+        result = intervals.iloc[rows]
+        if clip:
+            result = result.copy()
+            result[INTERVAL_COL_NAMES] = np.clip(values[rows], t0, t1)
+    elif is_polars(intervals):
+        result = intervals[rows] if isinstance(rows, slice) else intervals.filter(rows)
+        if clip:
+            result = take_intervals(result, np.arange(len(result)), np.clip(values[rows], t0, t1))
+    elif is_structured(intervals):
+        result = np.asarray(intervals[rows])
+        if clip:
+            result = result.copy()
+            for col in INTERVAL_COL_NAMES:
+                result[col] = np.clip(result[col], t0, t1)
+    else:
+        result = values[rows]
+        if clip:
+            result = np.clip(result, t0, t1)
+
+    if return_rows:
+        return result, np.arange(len(values))[rows]
+    return result
+
+
+def to_ragged(interval_groups: List[NDArray]) -> Tuple[NDArray, NDArray]:
+    """Pack a list of interval arrays into a single array of values and an array of offsets.
+
+    Rows `offsets[i]:offsets[i + 1]` of the values belong to `interval_groups[i]`.
+    """
+    lengths = [len(intervals) for intervals in interval_groups]
+    offsets = np.concatenate([[0], np.cumsum(lengths, dtype=int)])
+    values = [intervals for intervals in interval_groups if len(intervals) > 0]
+    if len(values) == 0:
+        return EMPTY_INTERVALS, offsets
+    return np.concatenate(values, axis=0), offsets
+
+
+def from_ragged(values: NDArray, offsets: NDArray) -> List[NDArray]:
+    """Unpack an array of values and an array of offsets into a list of interval arrays."""
+    return [values[offsets[i] : offsets[i + 1]] for i in range(len(offsets) - 1)]
@@ -4,85 +4,389 @@ import numpy as np
 import pandas as pd
 from numpy.typing import NDArray
 
-from .globals import INTERVAL_COL_NAMES
+from .globals import EMPTY_INTERVALS
+from .storage import read_stores
+from .utils import (
+    as_interval_array,
+    as_interval_groups,
+    has_metadata,
+    interval_closed,
+    interval_values,
+    is_interval_array,
+    is_lazy_frame,
+    select_window,
+    take_intervals,
+)
+from .workspace import Workspace
 
 
 # TODO test dataframe inputs
 def interval_difference(
     intervals_a: Union[NDArray, pd.DataFrame],
-    intervals_b: Union[NDArray, pd.DataFrame],
+    intervals_b: Union[NDArray, pd.DataFrame, List[Union[NDArray, pd.DataFrame]]],
     min_len: float = 0.0,
+    window: Optional[Tuple[float, float]] = None,
+    assume_sorted: bool = False,
+    return_indices: bool = False,
+    workspace: Optional[Workspace] = None,
 ) -> NDArray:
     """Chop out sub-intervals from A that overlap with B.
 
+    If `intervals_b` is a list of interval groups, the sub-intervals overlapping any of the groups
+    are chopped out in a single pass, intervals in different groups are allowed to overlap.
+
+    Metadata of A is kept if it's a pandas or Polars dataframe, or a structured array with
+    start/end fields, and a `polars.LazyFrame` gives a lazy frame of the result. If A is a
+    `pd.IntervalIndex` or `pd.arrays.IntervalArray`, the result has the same type, and any interval
+    arrays in B must be closed on the same side. A and B can also be `storage.IntervalStore`s, in
+    which case only the chunks inside `window` and the span of A are decoded.
+
     Args:
         intervals_a: Array representing intervals (col 0/1 represent start/end).
-        intervals_b: Array representing intervals (col 0/1 represent start/end).
+        intervals_b: Array representing intervals (col 0/1 represent start/end), or a list of them.
         min_len: minimum allowable length of intervals to keep, intervals shorter than min_len will
             be dropped.
+        window: Start and end of a window to compute the difference in, intervals of A are clipped
+            to the window and only the intervals overlapping the window are processed.
+        assume_sorted: Whether the inputs are sorted by start, in which case the intervals
+            overlapping `window` are found with a binary search so the cost scales with the
+            contents of the window.
+        return_indices: Whether to return arrays of the starts, ends and source rows in A of the
+            result instead of building an array/dataframe, so metadata can be joined lazily.
+        workspace: Buffers to reuse for intermediate arrays, passing the same workspace to
+            repeated calls avoids allocating them on every call.
 
     Returns:
-        Interval difference between intervals_a and intervals_b
+        Interval difference between intervals_a and intervals_b, or a tuple of the starts, ends
+        and rows of intervals_a of the result if `return_indices` is set.
     """
-    if len(intervals_a) == 0 or len(intervals_b) == 0:
+    intervals_a, intervals_b = read_stores(intervals_a, intervals_b, window=window)
+
+    if is_interval_array(intervals_a):
+        interval_closed(intervals_a, intervals_b)
+        result = interval_difference(
+            interval_values(intervals_a),
+            intervals_b,
+            min_len=min_len,
+            window=window,
+            assume_sorted=assume_sorted,
+            return_indices=return_indices,
+            workspace=workspace,
+        )
+        return result if return_indices else as_interval_array(result, like=intervals_a)
+
+    if is_lazy_frame(intervals_a):
+        result = interval_difference(
+            intervals_a.collect(),
+            intervals_b,
+            min_len=min_len,
+            window=window,
+            assume_sorted=assume_sorted,
+            return_indices=return_indices,
+            workspace=workspace,
+        )
+        return result if return_indices else result.lazy()
+
+    source_rows = None
+    if window is not None:
+        intervals_a, source_rows = select_window(
+            intervals_a, window, assume_sorted=assume_sorted, return_rows=True
+        )
+        intervals_b = [
+            select_window(intervals, window, assume_sorted=assume_sorted, clip=False)
+            for intervals in as_interval_groups(intervals_b)
+        ]
+
+    groups_b = as_interval_groups(intervals_b)
+    if return_indices:
+        values_a = interval_values(intervals_a)
+        if len(values_a) == 0 or len(groups_b) == 0:
+            result, indices = values_a, np.arange(len(values_a))
+        else:
+            result, indices = difference_atoms(
+                values_a, groups_b, min_len=min_len, workspace=workspace
+            )
+        if source_rows is not None:
+            indices = source_rows[indices]
+        return result[:, 0], result[:, 1], indices
+
+    if len(intervals_a) == 0 or len(groups_b) == 0:
         return intervals_a
 
-    intervals_a_input = intervals_a
-    if isinstance(intervals_a, pd.DataFrame):
-        intervals_a_input = intervals_a.copy()
-        intervals_a = intervals_a[INTERVAL_COL_NAMES].values
+    result, indices = difference_atoms(
+        interval_values(intervals_a), groups_b, min_len=min_len, workspace=workspace
+    )
+
+    # Metadata of dataframes and structured arrays is gathered from the source rows
+    if has_metadata(intervals_a):
+        result = take_intervals(intervals_a, indices, result)
+
+    return result
 
-    if isinstance(intervals_b, pd.DataFrame):
-        intervals_b = intervals_b[INTERVAL_COL_NAMES].values
 
-    atoms, indices = atomize_intervals(
-        [intervals_a, intervals_b],
+def difference_atoms(
+    intervals_a: NDArray,
+    groups_b: List[NDArray],
+    min_len: float = 0.0,
+    workspace: Optional[Workspace] = None,
+) -> Tuple[NDArray, NDArray]:
+    """Get the atoms of A which don't overlap any group in B, and the row in A they came from."""
+    starts, ends, rows, mask = _difference_mask(intervals_a, groups_b, min_len, workspace)
+    return _compress_atoms(starts, ends, mask), np.compress(mask, rows)
+
+
+def _difference_mask(intervals_a, groups_b, min_len, workspace):
+    """Get the starts, ends and rows in A of every atom, and a mask of the atoms of A \\ B."""
+    workspace = Workspace() if workspace is None else workspace
+    starts, ends, indices, mask = _atomize(
+        [intervals_a, *groups_b],
         min_len=min_len,
         drop_gaps=False,
+        exclusive=True,
+        workspace=workspace,
     )
-    mask_a_atoms = (indices[:, 0] != -1) & (indices[:, 1] == -1)
-    result, indices = atoms[mask_a_atoms], indices[mask_a_atoms, 0]
+    # Atoms covered by B have already been removed from A, so the remaining A atoms are A \ B
+    rows = indices[:, 0]
+    mask_a_atoms = workspace.buffer("mask_a_atoms", len(mask), bool)
+    np.not_equal(rows, -1, out=mask_a_atoms)
+    np.logical_and(mask, mask_a_atoms, out=mask)
+    return starts, ends, rows, mask
 
-    if isinstance(intervals_a_input, pd.DataFrame):
-        metadata = intervals_a_input.drop(INTERVAL_COL_NAMES, axis=1)
-        metadata = metadata.iloc[indices].reset_index(drop=True)
-        metadata[INTERVAL_COL_NAMES] = result
-        result = metadata[intervals_a_input.columns]
 
-    return result
+def difference_lengths(
+    intervals_a: Union[NDArray, pd.DataFrame],
+    intervals_b: Union[NDArray, pd.DataFrame, List[Union[NDArray, pd.DataFrame]]],
+    min_len: float = 0.0,
+    workspace: Optional[Workspace] = None,
+) -> NDArray:
+    """Length of each interval in A that remains after chopping out B, without building A \\ B.
+
+    Args:
+        intervals_a: Array representing intervals (col 0/1 represent start/end).
+        intervals_b: Array representing intervals (col 0/1 represent start/end), or a list of them.
+        min_len: minimum allowable length of intervals to keep, intervals shorter than min_len will
+            not be counted.
+        workspace: Buffers to reuse for intermediate arrays.
+
+    Returns:
+        Array of the remaining length of each row of intervals_a.
+    """
+    n_rows, lengths, bins = _reduction_atoms(intervals_a, intervals_b, min_len, workspace)
+    return np.bincount(bins, weights=lengths, minlength=n_rows + 1)[1:]
+
+
+def difference_counts(
+    intervals_a: Union[NDArray, pd.DataFrame],
+    intervals_b: Union[NDArray, pd.DataFrame, List[Union[NDArray, pd.DataFrame]]],
+    min_len: float = 0.0,
+    workspace: Optional[Workspace] = None,
+) -> NDArray:
+    """Number of fragments each interval in A is split into by chopping out B.
+
+    Args:
+        intervals_a: Array representing intervals (col 0/1 represent start/end).
+        intervals_b: Array representing intervals (col 0/1 represent start/end), or a list of them.
+        min_len: minimum allowable length of intervals to keep, intervals shorter than min_len will
+            not be counted.
+        workspace: Buffers to reuse for intermediate arrays.
+
+    Returns:
+        Array of the number of fragments of each row of intervals_a in A \\ B.
+    """
+    n_rows, _, bins = _reduction_atoms(intervals_a, intervals_b, min_len, workspace)
+    return np.bincount(bins, minlength=n_rows + 1)[1:]
+
+
+def difference_coverage(
+    intervals_a: Union[NDArray, pd.DataFrame],
+    intervals_b: Union[NDArray, pd.DataFrame, List[Union[NDArray, pd.DataFrame]]],
+    min_len: float = 0.0,
+    workspace: Optional[Workspace] = None,
+) -> NDArray:
+    """Fraction of each interval in A that remains after chopping out B.
+
+    Args:
+        intervals_a: Array representing intervals (col 0/1 represent start/end).
+        intervals_b: Array representing intervals (col 0/1 represent start/end), or a list of them.
+        min_len: minimum allowable length of intervals to keep, intervals shorter than min_len will
+            not be counted.
+        workspace: Buffers to reuse for intermediate arrays.
+
+    Returns:
+        Array of the remaining fraction of each row of intervals_a, zero-length rows are `nan`.
+    """
+    lengths = difference_lengths(intervals_a, intervals_b, min_len=min_len, workspace=workspace)
+    intervals_a = interval_values(intervals_a)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return lengths / (intervals_a[:, 1] - intervals_a[:, 0])
+
+
+def difference_total_length(
+    intervals_a: Union[NDArray, pd.DataFrame],
+    intervals_b: Union[NDArray, pd.DataFrame, List[Union[NDArray, pd.DataFrame]]],
+    min_len: float = 0.0,
+    workspace: Optional[Workspace] = None,
+) -> float:
+    """Total length of A \\ B, without building A \\ B.
+
+    Args:
+        intervals_a: Array representing intervals (col 0/1 represent start/end).
+        intervals_b: Array representing intervals (col 0/1 represent start/end), or a list of them.
+        min_len: minimum allowable length of intervals to keep, intervals shorter than min_len will
+            not be counted.
+        workspace: Buffers to reuse for intermediate arrays.
+
+    Returns:
+        Sum of the lengths of the intervals in A \\ B.
+    """
+    _, lengths, bins = _reduction_atoms(intervals_a, intervals_b, min_len, workspace)
+    return float(np.sum(lengths, where=bins != 0))
+
+
+def _reduction_atoms(intervals_a, intervals_b, min_len, workspace):
+    """Get the number of rows of A, the length of every atom and the bin of every atom.
+
+    Atoms of A \\ B are binned by their row in A plus one, and every other atom into bin 0, so
+    the reductions run over the atoms in place instead of selecting the ones in A \\ B.
+    """
+    intervals_a = interval_values(intervals_a)
+    groups_b = as_interval_groups(intervals_b)
+    if len(intervals_a) == 0 or len(groups_b) == 0:
+        # Consistent with `interval_difference`, A is unchanged if there's nothing to chop out
+        lengths = intervals_a[:, 1] - intervals_a[:, 0]
+        return len(intervals_a), lengths, np.arange(1, len(intervals_a) + 1)
+
+    workspace = Workspace() if workspace is None else workspace
+    starts, ends, rows, mask = _difference_mask(intervals_a, groups_b, min_len, workspace)
+    lengths = workspace.buffer("atom_lengths", len(mask), starts.dtype)
+    np.subtract(ends, starts, out=lengths)
+    bins = workspace.buffer("bins", len(mask), rows.dtype)
+    np.add(rows, 1, out=bins)
+    np.multiply(bins, mask, out=bins)
+    return len(intervals_a), lengths, bins
+
+
+def batch_interval_difference(
+    a_values: NDArray,
+    a_offsets: NDArray,
+    b_values: NDArray,
+    b_offsets: NDArray,
+    min_len: float = 0.0,
+) -> Tuple[NDArray, NDArray]:
+    """Chop out sub-intervals from each A_i that overlap with B_i for many pairs in one pass.
+
+    Pairs are given as ragged arrays, rows `a_offsets[i]:a_offsets[i + 1]` of `a_values` make up
+    A_i and rows `b_offsets[i]:b_offsets[i + 1]` of `b_values` make up B_i. The points of every
+    pair are sorted and accumulated together, which avoids the overhead of one call per pair.
+    The result of each pair is the same as `interval_difference(A_i, B_i, min_len)`, so A_i is
+    returned unchanged (without dropping short intervals) if B_i is empty.
+
+    Args:
+        a_values: Array representing intervals of every A_i (col 0/1 represent start/end).
+        a_offsets: Array of `n_pairs + 1` row offsets into `a_values`.
+        b_values: Array representing intervals of every B_i (col 0/1 represent start/end).
+        b_offsets: Array of `n_pairs + 1` row offsets into `b_values`.
+        min_len: minimum allowable length of intervals to keep, intervals shorter than min_len will
+            be dropped.
+
+    Returns:
+        Array of the intervals of every A_i \\ B_i, and an array of `n_pairs + 1` row offsets into
+        it.
+    """
+    n_pairs = len(a_offsets) - 1
+    if len(b_offsets) - 1 != n_pairs:
+        raise ValueError("Expected the same number of pairs in `a_offsets` and `b_offsets`.")
+
+    n_a, n_b = len(a_values), len(b_values)
+    pairs_a = np.repeat(np.arange(n_pairs), np.diff(a_offsets))
+    pairs_b = np.repeat(np.arange(n_pairs), np.diff(b_offsets))
+    empty_b = np.diff(b_offsets) == 0
+
+    points = np.concatenate([a_values[:, 0], a_values[:, 1], b_values[:, 0], b_values[:, 1]])
+    pairs = np.concatenate([pairs_a, pairs_a, pairs_b, pairs_b])
+
+    # Codes of A points track which interval is active, codes of B points track how many are
+    index_a = np.arange(1, n_a + 1)
+    codes_a = np.concatenate([index_a, -index_a, np.zeros(2 * n_b, dtype=int)])
+    codes_b = np.concatenate([np.zeros(2 * n_a, dtype=int), np.ones(n_b, int), -np.ones(n_b, int)])
+
+    order = np.lexsort((points, pairs))
+    points, pairs = points[order], pairs[order]
+    indices_a = np.abs(np.cumsum(codes_a[order])) - 1
+    depth_b = np.cumsum(codes_b[order])
+
+    starts, ends = points[:-1], points[1:]
+    mask = (
+        (pairs[:-1] == pairs[1:])
+        & (indices_a[:-1] != -1)
+        & (depth_b[:-1] == 0)
+        & (ends - starts > min_len)
+        & ~empty_b[pairs[:-1]]
+    )
+
+    # Like `interval_difference`, A_i is unchanged if B_i is empty, so its rows are merged back in
+    # after the atoms of the other pairs
+    unchanged = empty_b[pairs_a]
+    result = np.concatenate(
+        [np.stack([starts[mask], ends[mask]], axis=1), a_values[unchanged]], axis=0
+    )
+    result_pairs = np.concatenate([pairs[:-1][mask], pairs_a[unchanged]])
+    result = result[np.argsort(result_pairs, kind="stable")]
+    counts = np.bincount(result_pairs, minlength=n_pairs)
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+    return result, offsets
 
 
 # TODO test
-def points_from_intervals(interval_groups: List[NDArray]) -> Tuple[NDArray]:
+def points_from_intervals(
+    interval_groups: List[NDArray],
+    workspace: Optional[Workspace] = None,
+) -> Tuple[NDArray]:
+    workspace = Workspace() if workspace is None else workspace
     n_interval_groups = len(interval_groups)
-    interval_points, interval_indices = [], []
+    n_points = 2 * sum(len(intervals) for intervals in interval_groups)
+    dtype = np.result_type(*interval_groups)
+
+    interval_points = workspace.buffer("points", n_points, dtype)
+    interval_indices = workspace.buffer("indices", (n_points, n_interval_groups), int)
+    interval_indices.fill(0)
+    offset = 0
     for i, intervals in enumerate(interval_groups):
         assert not intervals_overlapping(
-            intervals
+            intervals, workspace
         ), "Expected the intervals within a group to be non-overlapping"
         n_intervals = len(intervals)
+        starts = slice(offset, offset + n_intervals)
+        ends = slice(offset + n_intervals, offset + 2 * n_intervals)
 
-        indices = np.zeros((n_intervals, n_interval_groups))
-        indices[:, i] = np.arange(n_intervals) + 1
-        indices = np.concatenate([indices, -indices], axis=0)
+        interval_points[starts] = intervals[:, 0]
+        interval_points[ends] = intervals[:, 1]
+        indices = workspace.arange(1, n_intervals + 1)
+        interval_indices[starts, i] = indices
+        np.negative(indices, out=interval_indices[ends, i])
+        offset += 2 * n_intervals
 
-        points = np.concatenate([intervals[:, 0:1], intervals[:, 1:2]], axis=0)
+    foo = np.argsort(interval_points)
+    sorted_points = workspace.buffer("sorted_points", n_points, dtype)
+    sorted_indices = workspace.buffer("sorted_indices", interval_indices.shape, int)
+    np.take(interval_points, foo, out=sorted_points, mode="clip")
+    np.take(interval_indices, foo, axis=0, out=sorted_indices, mode="clip")
 
-        interval_points.append(points)
-        interval_indices.append(indices)
+    np.cumsum(sorted_indices, axis=0, out=interval_indices)
+    np.abs(interval_indices, out=interval_indices)
+    np.subtract(interval_indices, 1, out=interval_indices)
+    return sorted_points, interval_indices
 
-    interval_points = np.concatenate(interval_points, axis=0)
-    interval_indices = np.concatenate(interval_indices, axis=0)
-
-    foo = np.argsort(interval_points[:, 0])
-    interval_points = interval_points[foo, :]
-    interval_indices = interval_indices[foo, :]
-
-    interval_indices = np.abe(np.cumsum(interval_indices, axis=0)) - 1
-    return interval_points, interval_indices
 
+def intervals_overlapping(intervals: NDArray, workspace: Optional[Workspace] = None) -> bool:
+    starts, ends = intervals[:, 0], intervals[:, 1]
+    flags = None
+    if workspace is not None:
+        flags = workspace.buffer("overlap_flags", max(len(intervals) - 1, 0), bool)
+    if not np.less(starts[1:], starts[:-1], out=flags).any():
+        # Already sorted, so only neighbouring intervals can overlap
+        return np.less(starts[1:], ends[:-1], out=flags).any()
 
-def intervals_overlapping(intervals: NDArray) -> bool:
     intervals = intervals[np.argsort(intervals[:, 0]), :]
     starts, ends = intervals[:, 0], intervals[:, 1]
     overlaps = starts[1:] - ends[:-1]
@@ -94,26 +398,143 @@ def atomize_intervals(
     interval_groups,
     min_len: Optional[float] = 0.0,
     drop_gaps: bool = True,
+    exclusive: bool = True,
+    workspace: Optional[Workspace] = None,
 ) -> Tuple[NDArray, NDArray]:
-    points, indices = points_from_intervals(interval_groups)
-    for i in range(1, len(interval_groups)):
-        indices[indices[:, i] != -1, :i] = -1
+    starts, ends, interval_idxs, mask = _atomize(
+        interval_groups, min_len, drop_gaps, exclusive, workspace
+    )
+    return _compress_atoms(starts, ends, mask), np.compress(mask, interval_idxs, axis=0)
 
-    starts, ends = points[:-1, 0:1], points[1:, 0:1]
-    interval_idxs = indices[:-1].astype(int)
-    atomized_intervals = np.concatenate([starts, ends], axis=1)
 
-    if drop_gaps:
-        mask_nongap_intervals = (interval_idxs != -1).any(axis=1)
+def _atomize(interval_groups, min_len, drop_gaps, exclusive, workspace):
+    """Get the starts, ends and indices of every atom, and a mask of the atoms to keep.
+
+    The arrays are views into `workspace`, so only the atoms selected from them are allocated.
+    """
+    workspace = Workspace() if workspace is None else workspace
+    points, indices = points_from_intervals(interval_groups, workspace)
+    if exclusive:
+        # Atoms covered by a group are removed from every group before it
+        covered = workspace.buffer("covered", (len(points), 1), bool)
+        for i in range(1, len(interval_groups)):
+            np.not_equal(indices[:, i : i + 1], -1, out=covered)
+            np.copyto(indices[:, :i], -1, where=covered)
+
+    starts, ends = points[:-1], points[1:]
+    interval_idxs = indices[:-1]
+    n_atoms = len(starts)
 
-        atomized_intervals = atomized_intervals[mask_nongap_intervals]
-        interval_idxs = interval_idxs[mask_nongap_intervals]
+    mask = workspace.buffer("mask", n_atoms, bool)
+    if drop_gaps:
+        nongap = workspace.buffer("nongap", interval_idxs.shape, bool)
+        np.not_equal(interval_idxs, -1, out=nongap).any(axis=1, out=mask)
+    else:
+        mask.fill(True)
 
     if min_len is not None:
-        interval_lengths = atomized_intervals[:, 1] - atomized_intervals[:, 0]
-        mask_above_min_len = interval_lengths > min_len
+        interval_lengths = workspace.buffer("lengths", n_atoms, points.dtype)
+        above_min_len = workspace.buffer("above_min_len", n_atoms, bool)
+        np.subtract(ends, starts, out=interval_lengths)
+        np.greater(interval_lengths, min_len, out=above_min_len)
+        np.logical_and(mask, above_min_len, out=mask)
+
+    return starts, ends, interval_idxs, mask
+
+
+def _compress_atoms(starts, ends, mask):
+    atoms = np.empty((np.count_nonzero(mask), 2), dtype=starts.dtype)
+    np.compress(mask, starts, out=atoms[:, 0])
+    np.compress(mask, ends, out=atoms[:, 1])
+    return atoms
+
+
+def merge_adjacent_intervals(
+    intervals: NDArray, return_offsets: bool = False
+) -> Union[NDArray, Tuple[NDArray, NDArray]]:
+    """Merge sorted, non-overlapping intervals where the end of one is the start of the next.
+
+    If `return_offsets` is True, also returns offsets such that the intervals merged into region
+    `i` are `intervals[offsets[i]:offsets[i + 1]]`.
+    """
+    if len(intervals) == 0:
+        return (intervals, np.zeros(1, dtype=np.int64)) if return_offsets else intervals
+    run_starts = np.flatnonzero(intervals[1:, 0] != intervals[:-1, 1]) + 1
+    offsets = np.concatenate([[0], run_starts, [len(intervals)]])
+    merged = np.stack([intervals[offsets[:-1], 0], intervals[offsets[1:] - 1, 1]], axis=1)
+    return (merged, offsets) if return_offsets else merged
+
+
+def coverage_depth(
+    interval_groups: List[Union[NDArray, pd.DataFrame]],
+    min_len: float = 0.0,
+    workspace: Optional[Workspace] = None,
+) -> Tuple[NDArray, NDArray, NDArray]:
+    """Get the number of groups covering each atom of a list of interval groups.
+
+    Intervals in different groups are allowed to overlap, but intervals within a group aren't.
+
+    Args:
+        interval_groups: List of arrays representing intervals (col 0/1 represent start/end).
+        min_len: minimum allowable length of atoms to keep, atoms shorter than min_len will be
+            dropped.
+        workspace: Buffers to reuse for intermediate arrays.
+
+    Returns:
+        Array of the atoms covered by any group, the number of groups covering each atom, and the
+        row of each group covering each atom (-1 if the group doesn't cover it).
+    """
+    interval_groups = [interval_values(intervals) for intervals in interval_groups]
+    if sum(len(intervals) for intervals in interval_groups) == 0:
+        return EMPTY_INTERVALS, np.empty(0, dtype=int), np.empty((0, len(interval_groups)), int)
+
+    atoms, indices = atomize_intervals(
+        interval_groups, min_len=min_len, exclusive=False, workspace=workspace
+    )
+    return atoms, np.count_nonzero(indices != -1, axis=1), indices
+
+
+def interval_consensus(
+    interval_groups: List[Union[NDArray, pd.DataFrame]],
+    k: int,
+    min_len: float = 0.0,
+    return_indices: bool = False,
+    workspace: Optional[Workspace] = None,
+) -> Union[NDArray, Tuple[NDArray, NDArray, NDArray]]:
+    """Get the regions covered by at least `k` of a list of interval groups.
+
+    Intervals in different groups are allowed to overlap, but intervals within a group aren't.
+    `k = 1` gives the union of the groups and `k = len(interval_groups)` their intersection.
+
+    Args:
+        interval_groups: List of arrays representing intervals (col 0/1 represent start/end).
+        k: Minimum number of groups covering the regions to keep.
+        min_len: minimum allowable length of intervals to keep, intervals shorter than min_len will
+            be dropped.
+        return_indices: Whether to also return the atoms making up each region, with the row of
+            each group covering them.
+        workspace: Buffers to reuse for intermediate arrays.
+
+    Returns:
+        Array of the merged regions covered by at least `k` groups. If `return_indices` is set, also
+        the row of each group covering each atom of the regions (-1 if the group doesn't cover it),
+        and an array of `n_regions + 1` offsets, where rows `offsets[i]:offsets[i + 1]` of the
+        indices are the atoms of region `i`.
+    """
+    if not 1 <= k <= len(interval_groups):
+        raise ValueError(f"Expected 1 <= k <= {len(interval_groups)}, got k={k}.")
+
+    atoms, depth, indices = coverage_depth(interval_groups, workspace=workspace)
+    keep = depth >= k
+    atoms = _compress_atoms(atoms[:, 0], atoms[:, 1], keep)
 
-        atomized_intervals = atomized_intervals[mask_above_min_len]
-        interval_idxs = interval_idxs[mask_above_min_len]
+    # Atoms which touch are merged into one region, then regions are filtered by length
+    regions, offsets = merge_adjacent_intervals(atoms, return_offsets=True)
+    long_enough = regions[:, 1] - regions[:, 0] > min_len
+    regions = regions[long_enough]
 
-    return atomized_intervals, interval_idxs
+    if not return_indices:
+        return regions
+    counts = np.diff(offsets)
+    indices = np.compress(keep, indices, axis=0)[np.repeat(long_enough, counts)]
+    return regions, indices, np.concatenate([[0], np.cumsum(counts[long_enough])])
@@ -0,0 +1,83 @@
+"""Reusable buffers for the vectorised pipeline.
+
+Every call of `atomize_intervals` needs scratch arrays for the points, codes, cumulative sums and
+masks of its inputs. Passing the same `Workspace` to repeated calls keeps those arrays around, so
+calls of the same (or smaller) size don't allocate anything apart from their results and the
+sort order of the points:
+
+    workspace = Workspace()
+    for intervals_a, intervals_b in pairs:
+        result = interval_difference(intervals_a, intervals_b, workspace=workspace)
+
+Buffers grow geometrically when a call needs more room than the last one. A workspace must not be
+shared between threads.
+"""
+
+from typing import Dict, Tuple, Union
+
+import numpy as np
+from numpy.typing import DTypeLike, NDArray
+
+DEFAULT_GROWTH = 1.5
+
+
+class Workspace:
+    """Named, growable buffers which are reused across calls.
+
+    Args:
+        growth: Factor to grow a buffer's capacity by when it's too small, so a slowly growing
+            call size doesn't reallocate on every call.
+    """
+
+    def __init__(self, growth: float = DEFAULT_GROWTH):
+        if growth < 1:
+            raise ValueError("Expected a growth factor of at least 1.")
+        self.growth = growth
+        self.n_allocations = 0
+        self._buffers: Dict[str, NDArray] = {}
+
+    def __repr__(self):
+        return f"Workspace({len(self._buffers)} buffers, {self.nbytes} bytes)"
+
+    @property
+    def nbytes(self) -> int:
+        """Total size of the buffers in bytes."""
+        return sum(buffer.nbytes for buffer in self._buffers.values())
+
+    def buffer(
+        self,
+        name: str,
+        shape: Union[int, Tuple[int, ...]],
+        dtype: DTypeLike = float,
+    ) -> NDArray:
+        """Get an uninitialised array of `shape`, backed by the buffer called `name`.
+
+        The array is only valid until the buffer is requested again.
+        """
+        shape = (shape,) if isinstance(shape, (int, np.integer)) else tuple(shape)
+        dtype = np.dtype(dtype)
+        size = int(np.prod(shape, dtype=np.int64))
+
+        buffer = self._buffers.get(name)
+        if buffer is None or buffer.dtype != dtype or buffer.size < size:
+            capacity = size
+            if buffer is not None and buffer.dtype == dtype:
+                capacity = max(size, int(buffer.size * self.growth))
+            buffer = np.empty(capacity, dtype=dtype)
+            self._buffers[name] = buffer
+            self.n_allocations += 1
+        return buffer[:size].reshape(shape)
+
+    def arange(self, start: int, stop: int) -> NDArray:
+        """Get `np.arange(start, stop)` as a view of a cached range, `0 <= start <= stop`."""
+        buffer = self._buffers.get("arange")
+        if buffer is None or buffer.size < stop:
+            capacity = stop if buffer is None else max(stop, int(buffer.size * self.growth))
+            buffer = np.arange(capacity)
+            self._buffers["arange"] = buffer
+            self.n_allocations += 1
+        return buffer[start:stop]
+
+    def clear(self):
+        """Release every buffer."""
+        self._buffers.clear()
@@ -22,6 +22,12 @@ setup(
         "tqdm",
     ],
     extras_require={
+        "parquet": [
+            "pyarrow",
+        ],
+        "polars": [
+            "polars",
+        ],
         "dev": [
             "black",
             "pip-tools",
@@ -7,3 +7,24 @@ import pytest
 @pytest.fixture(autouse=True)
 def add_np(doctest_namespace):
     doctest_namespace["Path"] = Path
+
+
+_scaling_results = {}
+
+
+@pytest.fixture
+def scaling_report():
+    """Dict to record the fitted exponents of each backend in, which are reported after the run."""
+    return _scaling_results
+
+
+def pytest_terminal_summary(terminalreporter):
+    if len(_scaling_results) == 0:
+        return
+    terminalreporter.section("scaling exponents")
+    terminalreporter.write_line(f"{'backend':<16}{'time':>8}{'bound':>8}{'memory':>8}{'bound':>8}")
+    for backend, (time_slope, time_bound, memory_slope, memory_bound) in _scaling_results.items():
+        terminalreporter.write_line(
+            f"{backend:<16}{time_slope:>8.2f}{time_bound:>8.2f}{memory_slope:>8.2f}"
+            f"{memory_bound:>8.2f}"
+        )
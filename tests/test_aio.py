@@ -0,0 +1,137 @@
+import asyncio
+import threading
+import time
+
+import pytest
+import numpy as np
+
+from interval_diff import aio
+from interval_diff.aio import AsyncIntervalEngine
+from interval_diff.utils import generate_random_intervals, to_ragged
+from interval_diff.vectorised import batch_interval_difference, interval_difference
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+class TestAsyncIntervalEngine:
+    intervals_a = generate_random_intervals(200, start=100, max_len=100)
+    intervals_b = generate_random_intervals(200, start=0, max_len=80)
+
+    @pytest.mark.parametrize("processes", [False, True])
+    def test_interval_difference(self, processes):
+        async def main():
+            async with AsyncIntervalEngine(max_concurrency=2, processes=processes) as engine:
+                return await engine.interval_difference(self.intervals_a, self.intervals_b)
+
+        expected = interval_difference(self.intervals_a, self.intervals_b)
+        assert np.array_equal(run(main()), expected)
+
+    def test_batch_interval_difference(self):
+        groups = [generate_random_intervals(10) for _ in range(5)]
+        a_values, a_offsets = to_ragged(groups)
+        b_values, b_offsets = to_ragged(groups[::-1])
+
+        async def main():
+            async with AsyncIntervalEngine() as engine:
+                return await engine.batch_interval_difference(
+                    a_values, a_offsets, b_values, b_offsets
+                )
+
+        values, offsets = run(main())
+        expected_values, expected_offsets = batch_interval_difference(
+            a_values, a_offsets, b_values, b_offsets
+        )
+        assert np.array_equal(values, expected_values)
+        assert np.array_equal(offsets, expected_offsets)
+
+    def test_max_concurrency(self):
+        lock, active, peak = threading.Lock(), [0], [0]
+
+        def slow_job():
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.01)
+            with lock:
+                active[0] -= 1
+
+        async def main():
+            async with AsyncIntervalEngine(max_concurrency=2) as engine:
+                await asyncio.gather(*[engine.run(slow_job) for _ in range(8)])
+
+        run(main())
+        assert peak[0] == 2
+
+    def test_stream_interval_difference(self):
+        async def chunks(intervals, chunk_size):
+            for i in range(0, len(intervals), chunk_size):
+                await asyncio.sleep(0)
+                yield intervals[i : i + chunk_size]
+
+        async def main():
+            async with AsyncIntervalEngine() as engine:
+                return [
+                    result
+                    async for result in engine.stream_interval_difference(
+                        chunks(self.intervals_a, 7),
+                        [self.intervals_b[i : i + 11] for i in range(0, 200, 11)],
+                        min_len=5.0,
+                    )
+                ]
+
+        result = np.concatenate(run(main()), axis=0)
+        expected = interval_difference(self.intervals_a, self.intervals_b, min_len=5.0)
+        assert np.array_equal(result, expected)
+
+    def test_stream_short_intervals_without_b(self):
+        intervals_a = np.array([(0.0, 1.0), (100.0, 200.0), (300.0, 301.0)])
+        intervals_b = np.array([(150.0, 160.0)])
+
+        async def main():
+            async with AsyncIntervalEngine() as engine:
+                return [
+                    result
+                    async for result in engine.stream_interval_difference(
+                        [intervals_a[i : i + 1] for i in range(len(intervals_a))],
+                        [intervals_b],
+                        min_len=5.0,
+                    )
+                ]
+
+        result = np.concatenate(run(main()), axis=0)
+        assert np.array_equal(result, interval_difference(intervals_a, intervals_b, min_len=5.0))
+
+
+def test_default_engine():
+    intervals_a = generate_random_intervals(20, start=100)
+    intervals_b = generate_random_intervals(20)
+    aio.set_default_engine(AsyncIntervalEngine(max_concurrency=1))
+    try:
+        result = run(aio.interval_difference(intervals_a, intervals_b))
+    finally:
+        aio.get_default_engine().close()
+        aio.set_default_engine(None)
+    assert np.array_equal(result, interval_difference(intervals_a, intervals_b))
+
+
+def test_default_engine_across_event_loops():
+    intervals_a = generate_random_intervals(20, start=100)
+    intervals_b = generate_random_intervals(20)
+
+    async def main():
+        # More calls than slots, so every call has to wait on the semaphore of this loop
+        return await asyncio.gather(
+            *[aio.interval_difference(intervals_a, intervals_b) for _ in range(4)]
+        )
+
+    aio.set_default_engine(AsyncIntervalEngine(max_concurrency=1))
+    try:
+        results = run(main()) + run(main())
+    finally:
+        aio.get_default_engine().close()
+        aio.set_default_engine(None)
+
+    expected = interval_difference(intervals_a, intervals_b)
+    assert all(np.array_equal(result, expected) for result in results)
@@ -0,0 +1,120 @@
+import pytest
+import numpy as np
+
+from interval_diff.bitmap import (
+    IntervalBitmap,
+    common_grid,
+    interval_difference,
+    interval_intersection,
+    interval_union,
+)
+from interval_diff.dispatch import interval_difference as dispatch_diff
+from interval_diff.utils import generate_random_intervals
+from interval_diff.vectorised import interval_difference as vec_diff, merge_adjacent_intervals
+
+
+def random_groups(n_groups, n_intervals=200, resolution=1.0):
+    return [
+        resolution
+        * generate_random_intervals(n_intervals, start=7 * i, max_len=30, min_len=1, precision=0)
+        for i in range(n_groups)
+    ]
+
+
+def rasterize(intervals, size=20000):
+    mask = np.zeros(size, dtype=bool)
+    for start, end in intervals.astype(int):
+        mask[start:end] = True
+    return mask
+
+
+class TestIntervalBitmap:
+    def test_round_trip(self):
+        intervals = np.array([(0.0, 2.0), (2.0, 5.0), (7.0, 8.0), (15.0, 16.0)])
+        bitmap = IntervalBitmap.from_intervals(intervals, 16, 1.0)
+
+        assert np.array_equal(np.unpackbits(bitmap.bits), [1] * 5 + [0, 0, 1] + [0] * 7 + [1])
+        assert np.array_equal(bitmap.to_intervals(), [(0, 5), (7, 8), (15, 16)])
+        assert np.array_equal(bitmap.to_intervals(min_len=1), [(0, 5)])
+
+    def test_clipped_to_grid(self):
+        intervals = np.array([(-10.0, -5.0), (-2.0, 3.0), (8.0, 20.0)])
+        bitmap = IntervalBitmap.from_intervals(intervals, 10, 1.0)
+        assert np.array_equal(bitmap.to_intervals(), [(0, 3), (8, 10)])
+
+    def test_resolution_and_origin(self):
+        intervals = np.array([(100.5, 101.0), (102.0, 103.5)])
+        grid = common_grid([intervals], 0.5)
+
+        assert grid == (6, 0.5, 100.5)
+        bitmap = IntervalBitmap.from_intervals(intervals, *grid)
+        assert np.array_equal(bitmap.to_intervals(), intervals)
+
+    @pytest.mark.parametrize(
+        "intervals, expected",
+        [
+            # Bounds rounded onto the same sample
+            (np.array([(0.0, 2.6), (2.4, 5.0)]), [(0, 5)]),
+            (np.array([(0.0, 2.0), (2.0, 5.0), (5.0, 6.0)]), [(0, 6)]),
+            (np.array([(0.0, 10.0), (2.0, 4.0)]), [(0, 10)]),
+            (np.array([(0.0, 4.0), (2.0, 6.0), (3.0, 8.0)]), [(0, 8)]),
+        ],
+    )
+    def test_overlapping_and_touching(self, intervals, expected):
+        bitmap = IntervalBitmap.from_intervals(intervals, 10, 1.0)
+        assert np.array_equal(bitmap.to_intervals(), expected)
+
+    def test_mismatched_grids(self):
+        with pytest.raises(ValueError):
+            IntervalBitmap.empty(10, 1.0) - IntervalBitmap.empty(10, 0.5)
+
+
+class TestBitmapOperations:
+    @pytest.mark.parametrize("min_len", [0.0, 5.0])
+    @pytest.mark.parametrize("resolution", [1.0, 0.25])
+    def test_difference(self, min_len, resolution):
+        intervals_a, *groups_b = random_groups(4, resolution=resolution)
+
+        result = interval_difference(intervals_a, groups_b, min_len=min_len, resolution=resolution)
+
+        expected = merge_adjacent_intervals(vec_diff(intervals_a, groups_b))
+        expected = expected[expected[:, 1] - expected[:, 0] > min_len]
+        assert np.array_equal(result, expected)
+
+    @pytest.mark.parametrize("resolution", [1.0, 0.25])
+    def test_difference_off_grid_overlapping(self, resolution):
+        intervals_a, group_b, other_group_b = random_groups(3, resolution=resolution)
+        # Touching intervals in A, and B as a single group of overlapping intervals with off-grid
+        # bounds
+        intervals_a[1:, 0] = intervals_a[:-1, 1]
+        intervals_b = np.concatenate([group_b, other_group_b]) + 0.3 * resolution
+
+        result = interval_difference(intervals_a, intervals_b, resolution=resolution)
+
+        snapped_b = np.rint(intervals_b / resolution) * resolution
+        groups_b = [snapped_b[: len(group_b)], snapped_b[len(group_b) :]]
+        expected = merge_adjacent_intervals(vec_diff(intervals_a, groups_b))
+        assert np.array_equal(result, expected)
+
+    def test_union(self):
+        groups = random_groups(3)
+        result = interval_union(groups)
+        expected = rasterize(groups[0]) | rasterize(groups[1]) | rasterize(groups[2])
+        assert np.array_equal(rasterize(result), expected)
+
+    def test_intersection(self):
+        groups = random_groups(3)
+        result = interval_intersection(groups)
+        expected = rasterize(groups[0]) & rasterize(groups[1]) & rasterize(groups[2])
+        assert np.array_equal(rasterize(result), expected)
+
+    def test_empty(self):
+        intervals_a, intervals_b = random_groups(2)
+        assert np.array_equal(interval_difference(intervals_a, []), intervals_a)
+        assert interval_difference(np.empty((0, 2)), intervals_b).shape == (0, 2)
+        assert interval_intersection([intervals_a, np.empty((0, 2))]).shape == (0, 2)
+
+    def test_dispatch(self):
+        intervals_a, intervals_b = random_groups(2)
+        result = dispatch_diff(intervals_a, intervals_b, backend="bitmap", resolution=1.0)
+        assert np.array_equal(result, interval_difference(intervals_a, intervals_b))
@@ -0,0 +1,135 @@
+import pytest
+import numpy as np
+import pandas as pd
+
+import interval_diff
+from interval_diff import dispatch
+from interval_diff.dispatch import (
+    CostModel,
+    choose_backend,
+    cost_features,
+    interval_difference,
+    load_profile,
+    save_profile,
+)
+from interval_diff.globals import INTERVAL_COL_NAMES
+from interval_diff.utils import generate_random_intervals
+from interval_diff.vectorised import interval_difference as vec_diff
+
+
+@pytest.fixture
+def cost_model():
+    # Non-vectorised is faster below 100 pairs of rows
+    model = CostModel(
+        coefficients={
+            "vectorised": [100.0, 0.0, 0.0, 0.0],
+            "non_vectorised": [0.0, 0.0, 1.0, 0.0],
+        }
+    )
+    dispatch.set_cost_model(model)
+    yield model
+    dispatch.set_cost_model(None)
+
+
+class TestDispatch:
+    def test_top_level(self):
+        assert interval_diff.interval_difference is interval_difference
+
+    @pytest.mark.parametrize("n, expected", [(5, "non_vectorised"), (50, "vectorised")])
+    def test_choose_backend(self, cost_model, n, expected):
+        intervals_a = generate_random_intervals(n, start=100)
+        intervals_b = generate_random_intervals(n)
+        assert choose_backend(intervals_a, intervals_b) == expected
+
+    def test_unsupported_kwargs(self, cost_model):
+        intervals_a = generate_random_intervals(5, start=100)
+        intervals_b = generate_random_intervals(5)
+        assert choose_backend(intervals_a, intervals_b, window=(0, 100)) == "vectorised"
+
+    def test_no_backend_accepts_kwargs(self, cost_model):
+        intervals_a = generate_random_intervals(5, start=100)
+        intervals_b = generate_random_intervals(5)
+        with pytest.raises(ValueError, match="unknown_option"):
+            interval_difference(intervals_a, intervals_b, unknown_option=True)
+
+    def test_no_coefficients(self):
+        model = CostModel(coefficients={"vectorised": [1.0, 0.0, 0.0, 0.0]})
+        with pytest.raises(ValueError, match="non_vectorised"):
+            model.choose(np.ones(4), candidates=["non_vectorised"])
+
+    @pytest.mark.parametrize("backend", [None, "vectorised", "non_vectorised"])
+    def test_interval_difference(self, cost_model, backend):
+        intervals_a = generate_random_intervals(50, start=100, max_len=100)
+        intervals_b = generate_random_intervals(50, start=0, max_len=80)
+
+        result = interval_difference(intervals_a, intervals_b, min_len=5.0, backend=backend)
+
+        assert np.array_equal(result, vec_diff(intervals_a, intervals_b, min_len=5.0))
+
+    @pytest.mark.parametrize("df", [False, True])
+    @pytest.mark.parametrize("dtype", [np.int64, np.float64])
+    @pytest.mark.parametrize("intervals_b", [[(0, 40), (60, 100)], [(0, 100)]])
+    def test_backends_same_types(self, df, dtype, intervals_b):
+        # B covers part of A, or all of it so the result is empty
+        intervals_a = np.array([(10, 20), (30, 50), (70, 90)], dtype=dtype)
+        intervals_b = np.array(intervals_b, dtype=dtype)
+        if df:
+            intervals_a = pd.DataFrame(intervals_a, columns=INTERVAL_COL_NAMES).assign(tag="a")
+
+        results = {
+            backend: interval_difference(intervals_a, intervals_b, backend=backend)
+            for backend in ["vectorised", "non_vectorised"]
+        }
+        indices = {
+            backend: interval_difference(
+                intervals_a, intervals_b, return_indices=True, backend=backend
+            )
+            for backend in ["vectorised", "non_vectorised"]
+        }
+
+        vec, nonvec = results["vectorised"], results["non_vectorised"]
+        assert type(vec) is type(nonvec)
+        if df:
+            assert vec.dtypes.equals(nonvec.dtypes)
+            assert vec.equals(nonvec)
+        else:
+            assert vec.dtype == nonvec.dtype
+            assert np.array_equal(vec, nonvec)
+        for vec, nonvec in zip(indices["vectorised"], indices["non_vectorised"]):
+            assert vec.dtype == nonvec.dtype
+            assert np.array_equal(vec, nonvec)
+
+    def test_unknown_backend(self):
+        with pytest.raises(ValueError):
+            interval_difference(np.array([(0.0, 1.0)]), np.array([(0.0, 1.0)]), backend="foo")
+
+
+def test_cost_features():
+    intervals_a = np.array([(0.0, 10.0), (20.0, 30.0)])
+    intervals_b = [np.array([(5.0, 15.0)]), np.array([(25.0, 35.0), (90.0, 100.0)])]
+
+    features = cost_features(intervals_a, intervals_b)
+
+    assert np.allclose(features, [1.0, 5.0, 6.0, 6.0 * 20.0 / 100.0])
+
+
+def test_fit():
+    features = np.array([[1.0, n, n * n, 0.0] for n in [1, 10, 100, 1000]])
+    times = {"fast": 1e-4 + 1e-7 * features[:, 1], "slow": 1e-6 + 1e-8 * features[:, 2]}
+
+    model = CostModel.fit(features, times)
+
+    assert np.allclose(model.coefficients["fast"], [1e-4, 1e-7, 0.0, 0.0], atol=1e-12)
+    assert np.allclose(model.coefficients["slow"], [1e-6, 0.0, 1e-8, 0.0], atol=1e-12)
+    assert all(c >= 0 for coefficients in model.coefficients.values() for c in coefficients)
+
+
+def test_profile(tmp_path, monkeypatch):
+    monkeypatch.setenv(dispatch.PROFILE_ENV_VAR, str(tmp_path / "profile.json"))
+    model = CostModel(coefficients={"vectorised": [1.0, 2.0, 3.0, 4.0]}, machine="test")
+    assert load_profile() is None
+
+    path = save_profile(model)
+
+    assert path == tmp_path / "profile.json"
+    assert load_profile() == model
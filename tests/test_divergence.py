@@ -0,0 +1,99 @@
+import pytest
+import numpy as np
+
+from interval_diff.divergence import (
+    DivergenceRecorder,
+    diverges,
+    load_divergence,
+    results_equal,
+    shrink_divergence,
+)
+from interval_diff.non_vectorised import interval_difference as nonvec_diff
+from interval_diff.utils import generate_random_intervals, interval_values
+from interval_diff.vectorised import interval_difference as vec_diff
+
+
+def buggy_diff(intervals_a, intervals_b, min_len=0.0):
+    """Drops every fragment which doesn't start at the start of an interval of A."""
+    result = vec_diff(intervals_a, intervals_b, min_len=min_len)
+    if len(intervals_a) == 0 or len(intervals_b) == 0:
+        return result
+    keep = np.isin(interval_values(result)[:, 0], interval_values(intervals_a)[:, 0])
+    return result[keep]
+
+
+def failing_diff(intervals_a, intervals_b, min_len=0.0):
+    if len(intervals_a) > 3:
+        raise RuntimeError("too many intervals")
+    return vec_diff(intervals_a, intervals_b, min_len=min_len)
+
+
+class TestShrinkDivergence:
+    intervals_a = generate_random_intervals(300, start=100, max_len=100)
+    intervals_b = generate_random_intervals(300, start=0, max_len=80)
+
+    def test_backends_agree(self):
+        assert not diverges(vec_diff, nonvec_diff, self.intervals_a, self.intervals_b)
+
+    def test_shrinks_to_minimal_pair(self):
+        assert diverges(vec_diff, buggy_diff, self.intervals_a, self.intervals_b)
+
+        intervals_a, intervals_b = shrink_divergence(
+            vec_diff, buggy_diff, self.intervals_a, self.intervals_b
+        )
+
+        assert diverges(vec_diff, buggy_diff, intervals_a, intervals_b)
+        assert len(intervals_a) == 1
+        assert len(intervals_b) == 1
+
+    @pytest.mark.parametrize("scale", [1e-3, 1e6])
+    def test_localize_scale_invariant(self, scale):
+        def n_calls(intervals_a, intervals_b, **kwargs):
+            calls = []
+
+            def counted_diff(*args, **kwargs):
+                calls.append(args)
+                return buggy_diff(*args, **kwargs)
+
+            shrink_divergence(vec_diff, counted_diff, intervals_a, intervals_b, **kwargs)
+            return len(calls)
+
+        expected = n_calls(self.intervals_a, self.intervals_b)
+        assert n_calls(scale * self.intervals_a, scale * self.intervals_b) == expected
+        assert n_calls(
+            scale * self.intervals_a, scale * self.intervals_b, buffer=scale * 100
+        ) == n_calls(self.intervals_a, self.intervals_b, buffer=100)
+
+    def test_shrinks_exceptions(self):
+        intervals_a, intervals_b = shrink_divergence(
+            vec_diff, failing_diff, self.intervals_a, self.intervals_b
+        )
+        assert len(intervals_a) == 4
+        assert len(intervals_b) <= 1
+
+
+def test_results_equal():
+    intervals = generate_random_intervals(10, dataframe=True)
+    assert results_equal(intervals, intervals.copy())
+    assert not results_equal(intervals, intervals.iloc[1:])
+    assert not results_equal(intervals, intervals[["start", "end"]].values)
+    assert results_equal(ValueError("a"), ValueError("b"))
+
+
+@pytest.mark.parametrize("df", [False, True])
+def test_recorder(tmp_path, df):
+    intervals_a = generate_random_intervals(100, start=100, max_len=100, dataframe=df)
+    intervals_b = generate_random_intervals(100, start=0, max_len=80, dataframe=df)
+    funcs = {"vec": vec_diff, "buggy": buggy_diff, "nonvec": nonvec_diff}
+    results = {name: func(intervals_a, intervals_b) for name, func in funcs.items()}
+
+    recorder = DivergenceRecorder(fixtures_dir=tmp_path)
+    assert not recorder.check(funcs, results, intervals_a, intervals_b)
+
+    assert len(recorder.divergences) == 1
+    divergence = recorder.divergences[0]
+    assert divergence["backends"] == ["vec", "buggy"]
+
+    loaded_a, loaded_b, metadata = load_divergence(divergence["path"])
+    assert metadata["backends"] == ["vec", "buggy"]
+    assert diverges(vec_diff, buggy_diff, loaded_a, loaded_b)
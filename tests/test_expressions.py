@@ -0,0 +1,93 @@
+import pytest
+import numpy as np
+
+from interval_diff.expressions import IntervalExpr, IntervalSet, compile_plan
+from interval_diff.utils import generate_random_intervals
+from interval_diff.vectorised import interval_difference, merge_adjacent_intervals
+
+
+def random_groups(n_groups, n_intervals=100):
+    return [
+        generate_random_intervals(n_intervals, start=10 * i, max_len=60, min_len=5, precision=0)
+        for i in range(n_groups)
+    ]
+
+
+def rasterize(intervals, size=20000):
+    mask = np.zeros(size, dtype=bool)
+    for start, end in intervals.astype(int):
+        mask[start:end] = True
+    return mask
+
+
+class TestIntervalExpressions:
+    def test_difference(self):
+        intervals_a, intervals_b, intervals_c = random_groups(3)
+        a, b, c = IntervalSet(intervals_a), IntervalSet(intervals_b), IntervalSet(intervals_c)
+
+        result = ((a - b) - c).evaluate()
+
+        expected = interval_difference(intervals_a, [intervals_b, intervals_c])
+        assert np.array_equal(result, merge_adjacent_intervals(expected))
+
+    @pytest.mark.parametrize(
+        "build, combine",
+        [
+            (lambda a, b, c, d: ((a - b) - c) & d, lambda a, b, c, d: a & ~b & ~c & d),
+            (lambda a, b, c, d: (a | b) - (c & d), lambda a, b, c, d: (a | b) & ~(c & d)),
+            (lambda a, b, c, d: a & (b | c | d), lambda a, b, c, d: a & (b | c | d)),
+        ],
+    )
+    def test_matches_brute_force(self, build, combine):
+        groups = random_groups(4)
+
+        result = build(*[IntervalSet(group) for group in groups]).evaluate()
+
+        expected = combine(*[rasterize(group) for group in groups])
+        assert np.array_equal(rasterize(result), expected)
+        assert (result[1:, 0] > result[:-1, 1]).all()
+
+    def test_clip_and_min_len(self):
+        a = IntervalSet(np.array([(0.0, 100.0), (200.0, 300.0), (400.0, 500.0)]))
+        b = IntervalSet(np.array([(50.0, 250.0), (480.0, 490.0)]))
+
+        result = (a - b).clip(10, 485).min_len(20).evaluate()
+
+        assert np.array_equal(result, [(10, 50), (250, 300), (400, 480)])
+
+    def test_nested_min_len(self):
+        a = IntervalSet(np.array([(0.0, 100.0), (200.0, 300.0)]))
+        b = IntervalSet(np.array([(90.0, 210.0)]))
+        c = IntervalSet(np.array([(0.0, 1000.0)]))
+
+        expr = (a - b).min_len(20) | (c - a)
+
+        assert expr.plan().n_passes == 2
+        assert np.array_equal(expr.evaluate(), [(0, 90), (100, 200), (210, 1000)])
+
+    def test_plan_cached(self):
+        groups_1, groups_2 = random_groups(3), random_groups(3)
+        a1, b1, c1 = [IntervalSet(group) for group in groups_1]
+        a2, b2, c2 = [IntervalSet(group) for group in groups_2]
+
+        plan = ((a1 - b1) & c1).plan()
+
+        assert ((a2 - b2) & c2).plan() is plan
+        assert compile_plan.cache_info().hits > 0
+        assert plan.execute(groups_2).shape == ((a2 - b2) & c2).evaluate().shape
+
+    def test_explain(self):
+        a, b = IntervalSet(np.empty((0, 2)), name="A"), IntervalSet(np.empty((0, 2)), name="B")
+        explanation = (a - b - a).min_len(5).explain()
+        assert "((A & ~B) & ~A)" in explanation
+        assert "min_len: 5" in explanation
+        assert "1 atomize pass" in explanation
+
+
+def test_incomplete_expression():
+    class NoKey(IntervalExpr):  # pylint: disable=abstract-method
+        def leaves(self):
+            return []
+
+    with pytest.raises(TypeError):
+        NoKey()
@@ -1,5 +1,6 @@
 import pytest
 import numpy as np
+import pandas as pd
 
 from interval_diff.non_vectorised import (
     interval_difference,
@@ -234,3 +235,42 @@ def test_sort_intervals_by_start():
     expected = np.array([(100, 200), (600, 700), (1100, 1200), (2000, 2200)])
     result = sort_intervals_by_start(intervals)
     assert (result == expected).all()
+
+
+def test_interval_difference_groups():
+    intervals_a = np.array([(100, 200), (600, 700), (1100, 1200), (2000, 2200)])
+    groups_b = [
+        np.array([(150, 250), (620, 640), (1050, 1150)]),
+        np.array([(120, 180), (630, 660), (2100, 2300)]),
+    ]
+    expected = np.array([(100, 120), (600, 620), (660, 700), (1150, 1200), (2000, 2100)])
+    result = interval_difference(intervals_a, groups_b)
+    assert np.array_equal(result, expected)
+
+
+def test_interval_difference_return_indices():
+    intervals_a = np.array([(600, 700), (100, 200), (1100, 1200)])
+    intervals_b = np.array([(150, 650)])
+    starts, ends, indices = interval_difference(intervals_a, intervals_b, return_indices=True)
+    assert np.array_equal(starts, [100, 650, 1100])
+    assert np.array_equal(ends, [150, 700, 1200])
+    assert np.array_equal(indices, [1, 0, 2])
+
+
+def test_interval_difference_structured():
+    intervals_a = np.array(
+        [(600, 700, "a"), (100, 200, "b")],
+        dtype=[("start", float), ("end", float), ("tag", "U1")],
+    )
+    intervals_b = np.array([(150, 650)])
+    result = interval_difference(intervals_a, intervals_b)
+    assert result.dtype == intervals_a.dtype
+    assert result.tolist() == [(100, 150, "b"), (650, 700, "a")]
+
+
+def test_interval_difference_interval_index():
+    intervals_a = pd.IntervalIndex.from_arrays([600, 100], [700, 200], closed="left", name="a")
+    intervals_b = pd.arrays.IntervalArray.from_arrays([150], [650], closed="left")
+    result = interval_difference(intervals_a, intervals_b)
+    expected = pd.IntervalIndex.from_arrays([100, 650], [150, 700], closed="left", name="a")
+    assert result.equals(expected) and result.name == "a"
@@ -0,0 +1,120 @@
+import pytest
+import numpy as np
+import pandas as pd
+
+from interval_diff.non_vectorised import interval_difference as nonvec_diff
+from interval_diff.utils import generate_random_intervals, interval_values, select_window
+from interval_diff.vectorised import interval_difference
+
+pl = pytest.importorskip("polars")
+
+from interval_diff.polars_frames import (
+    interval_difference_by,
+)  # pylint: disable=wrong-import-position
+
+
+def _random_frames(seed=0):
+    np.random.seed(seed)
+    intervals_a = generate_random_intervals(100, max_len=100, dataframe=True)
+    intervals_b = generate_random_intervals(100, max_len=60, dataframe=True)
+    intervals_a["confidence"] = np.random.rand(len(intervals_a))
+    return intervals_a, intervals_b
+
+
+@pytest.mark.parametrize("diff_func", [interval_difference, nonvec_diff])
+class TestPolarsInputs:
+    @pytest.mark.parametrize("lazy", [False, True])
+    def test_interval_difference(self, diff_func, lazy):
+        intervals_a, intervals_b = _random_frames()
+        frame_a, frame_b = pl.from_pandas(intervals_a), pl.from_pandas(intervals_b)
+        if lazy:
+            frame_a, frame_b = frame_a.lazy(), frame_b.lazy()
+
+        result = diff_func(frame_a, frame_b)
+
+        assert isinstance(result, pl.LazyFrame if lazy else pl.DataFrame)
+        if lazy:
+            result = result.collect()
+        assert result.to_pandas().equals(diff_func(intervals_a, intervals_b))
+
+    def test_empty_result(self, diff_func):
+        intervals_a, _ = _random_frames()
+        frame_a = pl.from_pandas(intervals_a)
+
+        result = diff_func(frame_a, frame_a)
+
+        assert result.shape == (0, frame_a.width)
+        assert result.schema == frame_a.schema
+
+    def test_return_indices(self, diff_func):
+        intervals_a, intervals_b = _random_frames()
+        starts, ends, rows = diff_func(
+            pl.from_pandas(intervals_a).lazy(), pl.from_pandas(intervals_b), return_indices=True
+        )
+        expected = diff_func(intervals_a, intervals_b, return_indices=True)
+        for result, expected_result in zip((starts, ends, rows), expected):
+            assert np.array_equal(result, expected_result)
+
+
+def test_interval_values_lazy():
+    intervals_a, _ = _random_frames()
+    frame = pl.from_pandas(intervals_a).lazy()
+    assert np.array_equal(interval_values(frame), interval_values(intervals_a))
+
+
+@pytest.mark.parametrize("assume_sorted", [False, True])
+def test_select_window(assume_sorted):
+    intervals_a, _ = _random_frames()
+    result = select_window(pl.from_pandas(intervals_a), (1000, 3000), assume_sorted=assume_sorted)
+    expected = select_window(intervals_a, (1000, 3000), assume_sorted=assume_sorted)
+    assert result.to_pandas().equals(expected.reset_index(drop=True))
+
+
+class TestIntervalDifferenceBy:
+    def _grouped_frames(self):
+        frames_a, frames_b, expected = [], [], []
+        for key in range(4):
+            intervals_a, intervals_b = _random_frames(seed=key)
+            intervals_a["key"], intervals_b["key"] = key, key
+            if key == 3:
+                intervals_b = intervals_b.iloc[:0]
+            frames_a.append(intervals_a)
+            frames_b.append(intervals_b)
+            expected.append(interval_difference(intervals_a, intervals_b))
+
+        # Groups of B without any rows of A are ignored
+        intervals_b = generate_random_intervals(10, dataframe=True)
+        intervals_b["key"] = 10
+        frames_b.append(intervals_b)
+
+        frame_a = pl.from_pandas(pd.concat(frames_a, ignore_index=True))
+        frame_b = pl.from_pandas(pd.concat(frames_b, ignore_index=True))
+        return frame_a, frame_b, pl.from_pandas(pd.concat(expected, ignore_index=True))
+
+    @pytest.mark.parametrize("lazy", [False, True])
+    def test_groups(self, lazy):
+        frame_a, frame_b, expected = self._grouped_frames()
+        if lazy:
+            frame_a, frame_b = frame_a.lazy(), frame_b.lazy()
+
+        result = interval_difference_by(frame_a, frame_b, by="key")
+
+        assert isinstance(result, pl.LazyFrame)
+        assert result.collect().equals(expected.sort("key", "start"))
+
+    def test_min_len(self):
+        frame_a, frame_b, _ = self._grouped_frames()
+        result = interval_difference_by(frame_a, frame_b, by=["key"], min_len=20).collect()
+
+        # Like the engines, groups without any rows of B are returned unchanged
+        result = result.filter(pl.col("key") != 3)
+        assert (result["end"] - result["start"] > 20).all()
+
+    def test_composes_with_query(self):
+        frame_a, frame_b, expected = self._grouped_frames()
+        query = interval_difference_by(
+            frame_a.lazy().filter(pl.col("key") < 2), frame_b.lazy(), by="key"
+        ).filter(pl.col("confidence") > 0.5)
+
+        expected = expected.filter((pl.col("key") < 2) & (pl.col("confidence") > 0.5))
+        assert query.collect().equals(expected.sort("key", "start"))
@@ -0,0 +1,234 @@
+import pytest
+import numpy as np
+import pandas as pd
+
+from interval_diff.queries import (
+    binned_coverage,
+    cumulative_length,
+    interval_overlap_join,
+    iter_interval_overlap_join,
+    nearest_intervals,
+    points_in_intervals,
+    rolling_coverage,
+)
+from interval_diff.utils import generate_random_intervals
+from interval_diff.vectorised import atomize_intervals, interval_difference
+
+
+@pytest.mark.parametrize("points_sorted", [False, True])
+class TestPointsInIntervals:
+    intervals = np.array([(100, 200), (200, 250), (400, 500)])
+
+    def test_index(self, points_sorted):
+        points = np.array([50, 100, 150, 200, 249.9, 250, 300, 400, 500, 600])
+        expected = np.array([-1, 0, 0, 1, 1, -1, -1, 2, -1, -1])
+        result = points_in_intervals(
+            points, self.intervals, return_index=True, points_sorted=points_sorted
+        )
+        assert np.array_equal(result, expected)
+
+    def test_mask(self, points_sorted):
+        points = np.array([50, 100, 250, 450])
+        result = points_in_intervals(points, self.intervals, points_sorted=points_sorted)
+        assert np.array_equal(result, [False, True, False, True])
+
+    def test_empty(self, points_sorted):
+        points = np.array([50, 100, 250, 450])
+        result = points_in_intervals(points, np.empty((0, 2)), points_sorted=points_sorted)
+        assert not result.any()
+
+    @pytest.mark.parametrize("df", [False, True])
+    def test_interval_difference_result(self, points_sorted, df):
+        intervals_a = generate_random_intervals(100, start=100, max_len=100, dataframe=df)
+        intervals_b = generate_random_intervals(100, start=0, max_len=80, dataframe=df)
+        intervals = interval_difference(intervals_a, intervals_b)
+        points = np.sort(np.random.uniform(0, 12000, 5000))
+
+        result = points_in_intervals(
+            points, intervals, return_index=True, points_sorted=points_sorted
+        )
+
+        if df:
+            intervals = intervals[["start", "end"]].values
+        inside = (points[:, None] >= intervals[:, 0]) & (points[:, None] < intervals[:, 1])
+        expected = np.where(inside.any(axis=1), inside.argmax(axis=1), -1)
+        assert np.array_equal(result, expected)
+
+    def test_overlapping(self, points_sorted):
+        with pytest.raises(ValueError):
+            points_in_intervals(
+                np.array([0.0]),
+                np.array([(100, 200), (150, 250)]),
+                points_sorted=points_sorted,
+            )
+
+
+def _brute_force_join(intervals_a, intervals_b, min_len=0.0):
+    pairs = []
+    for i, (start_a, end_a) in enumerate(intervals_a):
+        for j, (start_b, end_b) in enumerate(intervals_b):
+            start, end = max(start_a, start_b), min(end_a, end_b)
+            if end - start > min_len:
+                pairs.append((i, j, start, end))
+    return sorted(pairs)
+
+
+def _join_pairs(rows_a, rows_b, intersections):
+    return sorted(zip(rows_a, rows_b, intersections[:, 0], intersections[:, 1]))
+
+
+class TestIntervalOverlapJoin:
+    intervals_a = np.array([(0, 10), (5, 15), (20, 30)], dtype=float)
+    intervals_b = np.array([(8, 22), (10, 12), (30, 40)], dtype=float)
+
+    def test_pairs(self):
+        result = interval_overlap_join(self.intervals_a, self.intervals_b)
+        expected = [(0, 0, 8, 10), (1, 0, 8, 15), (1, 1, 10, 12), (2, 0, 20, 22)]
+        assert _join_pairs(*result) == expected
+
+    def test_min_len(self):
+        result = interval_overlap_join(self.intervals_a, self.intervals_b, min_len=2)
+        assert _join_pairs(*result) == [(1, 0, 8, 15)]
+
+    def test_empty(self):
+        rows_a, rows_b, intersections = interval_overlap_join(self.intervals_a, np.empty((0, 2)))
+        assert len(rows_a) == len(rows_b) == 0
+        assert intersections.shape == (0, 2)
+
+    @pytest.mark.parametrize("df", [False, True])
+    def test_random(self, df):
+        rng = np.random.default_rng(0)
+        intervals_a = np.sort(rng.integers(0, 200, (100, 2)), axis=1).astype(float)
+        intervals_b = np.sort(rng.integers(0, 200, (80, 2)), axis=1).astype(float)
+        expected = _brute_force_join(intervals_a, intervals_b)
+
+        if df:
+            intervals_a = pd.DataFrame(intervals_a, columns=["start", "end"])
+            intervals_b = pd.DataFrame(intervals_b, columns=["start", "end"])
+        assert _join_pairs(*interval_overlap_join(intervals_a, intervals_b)) == expected
+
+    @pytest.mark.parametrize("chunk_size", [1, 7, 100, None])
+    def test_chunks(self, chunk_size):
+        intervals_a = generate_random_intervals(100, max_len=100)
+        intervals_b = generate_random_intervals(100, max_len=300)
+        expected = _brute_force_join(intervals_a, intervals_b)
+
+        chunks = list(iter_interval_overlap_join(intervals_a, intervals_b, chunk_size=chunk_size))
+        if chunk_size is not None:
+            assert all(len(rows_a) <= chunk_size for rows_a, _, _ in chunks)
+        pairs = [_join_pairs(*chunk) for chunk in chunks]
+        assert sorted(pair for chunk in pairs for pair in chunk) == expected
+
+    def test_invalid_chunk_size(self):
+        with pytest.raises(ValueError):
+            next(iter_interval_overlap_join(self.intervals_a, self.intervals_b, chunk_size=0))
+
+
+def _brute_force_coverage(intervals, lower, upper):
+    return np.clip(
+        np.minimum(intervals[:, 1], upper) - np.maximum(intervals[:, 0], lower), 0, None
+    ).sum()
+
+
+class TestCoverage:
+    intervals = np.array([(10, 20), (30, 35), (35, 50)], dtype=float)
+
+    def test_cumulative_length(self):
+        points = np.array([0, 10, 15, 25, 30, 40, 50, 60])
+        result = cumulative_length(self.intervals, points)
+        assert np.allclose(result, [0, 0, 5, 10, 10, 20, 30, 30])
+
+    def test_binned(self):
+        result = binned_coverage(self.intervals, [0, 10, 20, 40, 60])
+        assert np.allclose(result, [0, 10, 10, 10])
+
+    def test_normalize(self):
+        result = binned_coverage(self.intervals, [0, 10, 20, 40, 40, 60], normalize=True)
+        assert np.allclose(result, [0, 1, 0.5, 0, 0.5])
+
+    def test_rolling(self):
+        result = rolling_coverage(self.intervals, [15, 30, 50], window=10)
+        assert np.allclose(result, [5, 0, 10])
+        result = rolling_coverage(self.intervals, [15, 30, 50], window=10, normalize=True)
+        assert np.allclose(result, [0.5, 0, 1])
+
+    def test_empty(self):
+        result = binned_coverage(np.empty((0, 2)), [0, 10, 20])
+        assert np.array_equal(result, [0, 0])
+
+    @pytest.mark.parametrize("df", [False, True])
+    def test_interval_difference_result(self, df):
+        intervals_a = generate_random_intervals(100, max_len=100, dataframe=df)
+        intervals_b = generate_random_intervals(100, max_len=80, dataframe=df)
+        intervals = interval_difference(intervals_a, intervals_b)
+        bin_edges = np.linspace(-100, 12000, 50)
+
+        result = binned_coverage(intervals, bin_edges)
+
+        if df:
+            intervals = intervals[["start", "end"]].values
+        expected = [
+            _brute_force_coverage(intervals, *edges) for edges in zip(bin_edges, bin_edges[1:])
+        ]
+        assert np.allclose(result, expected)
+
+    def test_atoms(self):
+        intervals_a = generate_random_intervals(100, max_len=100)
+        intervals_b = generate_random_intervals(100, max_len=80)
+        bin_edges = np.linspace(-100, 12000, 50)
+
+        result = binned_coverage(atomize_intervals([intervals_a, intervals_b]), bin_edges)
+
+        assert result.shape == (len(bin_edges) - 1, 2)
+        assert np.allclose(
+            result[:, 0], binned_coverage(interval_difference(intervals_a, intervals_b), bin_edges)
+        )
+        assert np.allclose(result[:, 1], binned_coverage(intervals_b, bin_edges))
+
+    def test_invalid(self):
+        with pytest.raises(ValueError):
+            binned_coverage(self.intervals, [10, 0])
+        with pytest.raises(ValueError):
+            rolling_coverage(self.intervals, [10], window=0)
+        with pytest.raises(ValueError):
+            binned_coverage(np.array([(0, 20), (10, 30)]), [0, 10])
+
+
+class TestNearestIntervals:
+    intervals_a = np.array([(0, 10), (20, 30), (44, 50), (60, 65), (100, 110)], dtype=float)
+    intervals_b = np.array([(12, 15), (25, 40), (52, 58), (56, 57)], dtype=float)
+
+    def test_nearest(self):
+        rows, distances = nearest_intervals(self.intervals_a, self.intervals_b)
+        assert np.array_equal(rows, [0, 1, 2, 2, 2])
+        assert np.array_equal(distances, [2, 0, 2, -2, -42])
+
+    def test_max_distance(self):
+        rows, distances = nearest_intervals(self.intervals_a, self.intervals_b, max_distance=10)
+        assert np.array_equal(rows, [0, 1, 2, 2, -1])
+        assert np.isnan(distances[-1])
+
+    def test_touching(self):
+        rows, distances = nearest_intervals(np.array([(10.0, 20.0)]), np.array([(0.0, 10.0)]))
+        assert np.array_equal(rows, [0])
+        assert np.array_equal(distances, [0])
+
+    def test_empty(self):
+        rows, distances = nearest_intervals(self.intervals_a, np.empty((0, 2)))
+        assert np.array_equal(rows, np.full(len(self.intervals_a), -1))
+        assert np.isnan(distances).all()
+
+    @pytest.mark.parametrize("assume_sorted", [False, True])
+    def test_random(self, assume_sorted):
+        intervals_a = generate_random_intervals(100, max_len=100)
+        intervals_b = generate_random_intervals(50, start=30, max_len=50)
+        if not assume_sorted:
+            intervals_b = intervals_b[np.random.permutation(len(intervals_b))]
+
+        rows, distances = nearest_intervals(intervals_a, intervals_b, assume_sorted=assume_sorted)
+
+        starts_a, ends_a = intervals_a[:, :1], intervals_a[:, 1:]
+        starts_b, ends_b = intervals_b[:, 0], intervals_b[:, 1]
+        gaps = np.maximum(starts_b - ends_a, starts_a - ends_b).clip(0, None)
+        assert np.allclose(np.abs(distances), gaps.min(axis=1))
+        assert np.allclose(gaps[np.arange(len(rows)), rows], np.abs(distances))
@@ -0,0 +1,72 @@
+"""Empirical complexity tests, which check how the run time and memory of each backend scale.
+
+These are slow, so they're excluded from the default run and selected with `pytest -m scaling`.
+The fitted exponents are reported at the end of the run.
+"""
+
+import time
+import tracemalloc
+
+import pytest
+import numpy as np
+
+from interval_diff.dispatch import BACKENDS
+from interval_diff.utils import generate_random_intervals
+
+pytestmark = pytest.mark.scaling
+
+MIN_RUN_TIME = 0.05
+
+# Sizes to run each backend on, and upper bounds on the log-log slopes of time and peak memory
+SCALING = {
+    "vectorised": {"sizes": [2000 * 2**i for i in range(7)], "time": 1.35, "memory": 1.2},
+    "non_vectorised": {"sizes": [100 * 2**i for i in range(4)], "time": 2.3, "memory": 1.2},
+    "bitmap": {"sizes": [2000 * 2**i for i in range(7)], "time": 1.35, "memory": 1.2},
+}
+
+
+def _min_run_time(func, *args):
+    elapsed, total = [], 0.0
+    while total < MIN_RUN_TIME or len(elapsed) < 3:
+        tic = time.perf_counter()
+        func(*args)
+        elapsed.append(time.perf_counter() - tic)
+        total += elapsed[-1]
+    return min(elapsed)
+
+
+def _peak_memory(func, *args):
+    tracemalloc.start()
+    try:
+        baseline, _ = tracemalloc.get_traced_memory()
+        func(*args)
+        return tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        tracemalloc.stop()
+
+
+def _slope(sizes, values):
+    return np.polyfit(np.log(sizes), np.log(values), 1)[0]
+
+
+def test_every_backend_has_bounds():
+    assert set(BACKENDS) <= set(SCALING)
+
+
+@pytest.mark.parametrize("backend", list(SCALING))
+def test_scaling(backend, scaling_report):
+    diff_func, config = BACKENDS[backend], SCALING[backend]
+    np.random.seed(0)
+    times, peaks = [], []
+    for n_intervals in config["sizes"]:
+        intervals_a = generate_random_intervals(n_intervals, max_len=100)
+        intervals_b = generate_random_intervals(n_intervals, max_len=60)
+        diff_func(intervals_a, intervals_b)  # warm up
+        times.append(_min_run_time(diff_func, intervals_a, intervals_b))
+        peaks.append(_peak_memory(diff_func, intervals_a, intervals_b))
+
+    time_slope, memory_slope = _slope(config["sizes"], times), _slope(config["sizes"], peaks)
+    scaling_report[backend] = (time_slope, config["time"], memory_slope, config["memory"])
+
+    assert time_slope < config["time"], f"Run time of {backend} grows as n^{time_slope:.2f}"
+    assert memory_slope < config["memory"], f"Memory of {backend} grows as n^{memory_slope:.2f}"
@@ -0,0 +1,121 @@
+import pytest
+import numpy as np
+
+from interval_diff import interval_difference as dispatch_diff
+from interval_diff.non_vectorised import interval_difference as nonvec_diff
+from interval_diff.storage import (
+    IntervalStore,
+    IntervalStoreWriter,
+    decode_chunk,
+    encode_chunk,
+    read_stores,
+    write_intervals,
+)
+from interval_diff.streaming import diff_files
+from interval_diff.utils import generate_random_intervals
+from interval_diff.vectorised import interval_difference
+
+
+@pytest.mark.parametrize(
+    "intervals",
+    [
+        np.array([(0.0, 1.0)]),
+        np.array([(-5.0, -1.0), (-3.0, 2.0), (0.0, 1e300), (0.1, 0.1)]),
+        generate_random_intervals(100),
+    ],
+)
+def test_encode_chunk(intervals):
+    data = encode_chunk(intervals)
+    assert np.array_equal(decode_chunk(data, len(intervals)), intervals)
+
+
+class TestIntervalStore:
+    @pytest.mark.parametrize("chunk_size", [1, 7, 1000])
+    def test_round_trip(self, tmp_path, chunk_size):
+        intervals = generate_random_intervals(100)
+        shuffled = intervals[np.random.permutation(len(intervals))]
+
+        store = write_intervals(tmp_path / "a.ivz", shuffled, chunk_size=chunk_size)
+
+        assert len(store) == len(intervals)
+        assert len(store.index) == -(-len(intervals) // chunk_size)
+        assert np.array_equal(store.read(), intervals)
+
+    def test_dataframe(self, tmp_path):
+        intervals = generate_random_intervals(100, dataframe=True)
+        store = write_intervals(tmp_path / "a.ivz", intervals)
+        assert np.array_equal(store.read(), intervals[["start", "end"]].values)
+
+    def test_empty(self, tmp_path):
+        store = write_intervals(tmp_path / "a.ivz", np.empty((0, 2)))
+        assert len(store) == 0
+        assert store.span is None
+        assert store.read().shape == (0, 2)
+
+    def test_window(self, tmp_path):
+        intervals = generate_random_intervals(1000)
+        store = write_intervals(tmp_path / "a.ivz", intervals, chunk_size=50)
+        window = (20000.0, 30000.0)
+
+        result = store.read(window)
+
+        inside = (intervals[:, 1] > window[0]) & (intervals[:, 0] < window[1])
+        assert np.array_equal(result, intervals[inside])
+        assert len(store.chunks_overlapping(window)) < len(store.index)
+
+    def test_incremental(self, tmp_path):
+        intervals = generate_random_intervals(100)
+        with IntervalStoreWriter(tmp_path / "a.ivz", chunk_size=16) as writer:
+            for i in range(0, len(intervals), 9):
+                writer.write(intervals[i : i + 9])
+
+        store = IntervalStore(tmp_path / "a.ivz")
+        assert np.array_equal(store.index["n_rows"], [16] * 6 + [4])
+        assert np.array_equal(store.read(), intervals)
+
+    def test_invalid(self, tmp_path):
+        np.save(tmp_path / "a.npy", generate_random_intervals(10))
+        with pytest.raises(ValueError):
+            IntervalStore(tmp_path / "a.npy")
+
+
+class TestEngines:
+    @pytest.fixture
+    def stores(self, tmp_path):
+        intervals_a = generate_random_intervals(300, max_len=100)
+        intervals_b = generate_random_intervals(300, max_len=60)
+        store_a = write_intervals(tmp_path / "a.ivz", intervals_a, chunk_size=16)
+        store_b = write_intervals(tmp_path / "b.ivz", intervals_b, chunk_size=16)
+        return intervals_a, intervals_b, store_a, store_b
+
+    @pytest.mark.parametrize("diff_func", [interval_difference, nonvec_diff, dispatch_diff])
+    def test_interval_difference(self, stores, diff_func):
+        intervals_a, intervals_b, store_a, store_b = stores
+        expected = diff_func(intervals_a, intervals_b)
+        assert np.array_equal(diff_func(store_a, store_b), expected)
+        assert np.array_equal(diff_func(intervals_a, [store_b]), expected)
+
+    def test_window(self, stores):
+        intervals_a, intervals_b, store_a, store_b = stores
+        window = (5000.0, 9000.0)
+        result = interval_difference(store_a, store_b, window=window)
+        assert np.array_equal(result, interval_difference(intervals_a, intervals_b, window=window))
+
+    def test_read_stores_span(self, stores):
+        intervals_a, intervals_b, _, store_b = stores
+        values_a = intervals_a[100:120]
+
+        _, values_b = read_stores(values_a, store_b)
+
+        start, end = values_a[:, 0].min(), values_a[:, 1].max()
+        inside = (intervals_b[:, 1] > start) & (intervals_b[:, 0] < end)
+        assert np.array_equal(values_b, intervals_b[inside])
+
+    def test_diff_files(self, stores, tmp_path):
+        intervals_a, intervals_b, _, _ = stores
+        np.save(tmp_path / "b.npy", intervals_b)
+
+        diff_files(tmp_path / "a.ivz", tmp_path / "b.npy", tmp_path / "out.ivz", chunk_size=50)
+
+        result = IntervalStore(tmp_path / "out.ivz").read()
+        assert np.array_equal(result, interval_difference(intervals_a, intervals_b))
@@ -0,0 +1,175 @@
+import pytest
+import numpy as np
+import pandas as pd
+
+from interval_diff.globals import INTERVAL_COL_NAMES
+from interval_diff.streaming import diff_files, stream_interval_difference
+from interval_diff.utils import generate_random_intervals
+from interval_diff.vectorised import interval_difference
+
+
+def chunks(intervals, chunk_size):
+    for i in range(0, len(intervals), chunk_size):
+        if isinstance(intervals, pd.DataFrame):
+            yield intervals.iloc[i : i + chunk_size].reset_index(drop=True)
+        else:
+            yield intervals[i : i + chunk_size]
+
+
+def grouped_intervals(n_intervals, start):
+    groups = []
+    for recording in ["rec_a", "rec_b"]:
+        intervals = generate_random_intervals(n_intervals, start=start, dataframe=True)
+        intervals["recording"] = recording
+        groups.append(intervals)
+    result = pd.concat(groups, ignore_index=True)
+    return result.sort_values("start", kind="stable", ignore_index=True)
+
+
+class TestStreamIntervalDifference:
+    @pytest.mark.parametrize("chunk_size", [1, 7, 50, 1000])
+    def test_matches_in_memory(self, chunk_size):
+        intervals_a = generate_random_intervals(200, start=100, max_len=100)
+        intervals_b = generate_random_intervals(200, start=0, max_len=80)
+
+        expected = interval_difference(intervals_a, intervals_b, min_len=5.0)
+        result = np.concatenate(
+            list(
+                stream_interval_difference(
+                    chunks(intervals_a, chunk_size),
+                    chunks(intervals_b, chunk_size),
+                    min_len=5.0,
+                )
+            ),
+            axis=0,
+        )
+        assert np.array_equal(expected, result)
+
+    @pytest.mark.parametrize("chunk_size", [1, 2, 1000])
+    @pytest.mark.parametrize(
+        "intervals_b",
+        [np.array([(150.0, 160.0)]), np.array([(-20.0, -10.0), (500.0, 510.0)]), np.empty((0, 2))],
+    )
+    def test_short_intervals_without_b(self, chunk_size, intervals_b):
+        # Short intervals of A with no B nearby are only kept when all of B is empty
+        intervals_a = np.array([(0.0, 1.0), (100.0, 200.0), (300.0, 301.0), (400.0, 420.0)])
+
+        expected = interval_difference(intervals_a, intervals_b, min_len=5.0)
+        result = np.concatenate(
+            list(
+                stream_interval_difference(
+                    chunks(intervals_a, chunk_size),
+                    chunks(intervals_b, chunk_size),
+                    min_len=5.0,
+                )
+            ),
+            axis=0,
+        )
+        assert np.array_equal(expected, result)
+
+    @pytest.mark.parametrize("chunk_size", [3, 1000])
+    def test_by(self, chunk_size):
+        intervals_a = grouped_intervals(50, start=100)
+        intervals_b = grouped_intervals(50, start=0)
+
+        result = pd.concat(
+            stream_interval_difference(
+                chunks(intervals_a, chunk_size),
+                chunks(intervals_b, chunk_size),
+                by=["recording"],
+            ),
+            ignore_index=True,
+        )
+        for recording in ["rec_a", "rec_b"]:
+            expected = interval_difference(
+                intervals_a[intervals_a["recording"] == recording],
+                intervals_b[intervals_b["recording"] == recording],
+            )
+            output = result[result["recording"] == recording].sort_values("start")
+            assert np.array_equal(
+                expected[INTERVAL_COL_NAMES].values,
+                output[INTERVAL_COL_NAMES].values,
+            )
+
+    @pytest.mark.parametrize("chunk_size", [3, 1000])
+    def test_by_missing_group_min_len(self, chunk_size):
+        intervals_a = grouped_intervals(50, start=100)
+        intervals_b = grouped_intervals(50, start=0)
+        intervals_b = intervals_b[intervals_b["recording"] == "rec_a"].reset_index(drop=True)
+        min_len = 20.0
+
+        results = list(
+            stream_interval_difference(
+                chunks(intervals_a, chunk_size),
+                chunks(intervals_b, chunk_size),
+                min_len=min_len,
+                by=["recording"],
+            )
+        )
+        result = pd.concat(results, ignore_index=True)
+
+        lengths = result["end"] - result["start"]
+        assert (lengths > min_len).all()
+        assert all(chunk["start"].is_monotonic_increasing for chunk in results)
+        rec_b = intervals_a[intervals_a["recording"] == "rec_b"]
+        expected_b = rec_b[rec_b["end"] - rec_b["start"] > min_len]
+        output_b = result[result["recording"] == "rec_b"]
+        assert np.array_equal(
+            output_b[INTERVAL_COL_NAMES].values, expected_b[INTERVAL_COL_NAMES].values
+        )
+
+    def test_unsorted(self):
+        intervals_a = generate_random_intervals(20)[::-1]
+        intervals_b = generate_random_intervals(20)
+        with pytest.raises(ValueError):
+            list(stream_interval_difference(chunks(intervals_a, 5), chunks(intervals_b, 5)))
+
+
+class TestDiffFiles:
+    intervals_a = generate_random_intervals(100, start=100, max_len=100, dataframe=True)
+    intervals_b = generate_random_intervals(100, start=0, max_len=80, dataframe=True)
+
+    def test_csv(self, tmp_path):
+        columns = {"start": "onset", "end": "offset"}
+        self.intervals_a.rename(columns=columns).to_csv(tmp_path / "a.csv", index=False)
+        self.intervals_b.rename(columns=columns).to_csv(tmp_path / "b.csv", index=False)
+
+        n_written = diff_files(
+            tmp_path / "a.csv",
+            tmp_path / "b.csv",
+            tmp_path / "out.csv",
+            start_col="onset",
+            end_col="offset",
+            chunk_size=9,
+        )
+
+        expected = interval_difference(self.intervals_a, self.intervals_b)
+        result = pd.read_csv(tmp_path / "out.csv").rename(
+            columns={v: k for k, v in columns.items()}
+        )
+        assert n_written == len(expected)
+        assert list(result.columns) == list(expected.columns)
+        assert np.allclose(result[INTERVAL_COL_NAMES].values, expected[INTERVAL_COL_NAMES].values)
+        assert (result["tags"] == expected["tags"]).all()
+
+    def test_npy(self, tmp_path):
+        np.save(tmp_path / "a.npy", self.intervals_a[INTERVAL_COL_NAMES].values)
+        np.save(tmp_path / "b.npy", self.intervals_b[INTERVAL_COL_NAMES].values)
+
+        diff_files(tmp_path / "a.npy", tmp_path / "b.npy", tmp_path / "out.npy", chunk_size=9)
+
+        expected = interval_difference(
+            self.intervals_a[INTERVAL_COL_NAMES].values,
+            self.intervals_b[INTERVAL_COL_NAMES].values,
+        )
+        assert np.array_equal(np.load(tmp_path / "out.npy"), expected)
+
+    def test_parquet(self, tmp_path):
+        pytest.importorskip("pyarrow")
+        self.intervals_a.to_parquet(tmp_path / "a.parquet")
+        self.intervals_b.to_parquet(tmp_path / "b.parquet")
+
+        diff_files(tmp_path / "a.parquet", tmp_path / "b.parquet", tmp_path / "out.parquet")
+
+        expected = interval_difference(self.intervals_a, self.intervals_b)
+        assert pd.read_parquet(tmp_path / "out.parquet").equals(expected)
@@ -4,6 +4,11 @@ import pandas as pd
 
 from interval_diff.utils import (
     generate_random_intervals,
+    from_ragged,
+    interval_values,
+    select_window,
+    take_intervals,
+    to_ragged,
     DEFAULT_TAGS,
 )
 
@@ -57,3 +62,89 @@ class TestGenerateRandomIntervals:
             assert max(durations) <= self.max_len
             assert min(inter_interval_gaps) > 0
             assert set(intervals.tags).issubset(set(DEFAULT_TAGS))
+
+    def test_structured(self, n_intervals):
+        intervals = generate_random_intervals(n_intervals, start=self.start, structured=True)
+
+        assert intervals.dtype.names == ("start", "end", "tags")
+        assert len(intervals) == n_intervals
+        assert np.array_equal(interval_values(intervals)[:, 0], intervals["start"])
+        assert set(intervals["tags"]).issubset(set(DEFAULT_TAGS))
+
+
+def test_take_intervals():
+    records = np.array(
+        [(0.0, 10.0, "a", 1), (20.0, 30.0, "b", 2)],
+        dtype=[("start", float), ("end", float), ("tag", "U1"), ("count", int)],
+    )
+    values = np.array([(0.0, 5.0), (25.0, 30.0), (7.0, 10.0)])
+
+    result = take_intervals(records, np.array([0, 1, 0]), values)
+
+    assert result.dtype == records.dtype
+    assert np.array_equal(interval_values(result), values)
+    assert list(result["tag"]) == ["a", "b", "a"]
+    assert list(result["count"]) == [1, 2, 1]
+    assert list(records["start"]) == [0.0, 20.0]
+
+    result = take_intervals(pd.DataFrame(records), np.array([1]), values[1:2])
+    assert list(result.columns) == ["start", "end", "tag", "count"]
+    assert result.values.tolist() == [[25.0, 30.0, "b", 2]]
+
+
+def test_take_intervals_keeps_dtypes():
+    intervals = generate_random_intervals(100, start=100, max_len=100, dataframe=True)
+    intervals["category"] = pd.Categorical(intervals["tags"])
+    intervals["count"] = pd.array(np.arange(100), dtype="Int64")
+    intervals.loc[3, "count"] = pd.NA
+    intervals["time"] = pd.date_range("2020-01-01", periods=100, freq="h", tz="UTC")
+    intervals.index = np.arange(100) * 3
+    indices = np.array([3, 3, 0, 50, 99])
+    values = interval_values(intervals)[indices] + 1.0
+
+    result = take_intervals(intervals, indices, values)
+
+    assert list(result.columns) == list(intervals.columns)
+    assert (result.dtypes == intervals.dtypes).all()
+    assert result.index.equals(pd.RangeIndex(len(indices)))
+    assert np.array_equal(interval_values(result), values)
+    for col in ["tags", "category", "count", "time"]:
+        expected = intervals[col].iloc[indices].reset_index(drop=True)
+        pd.testing.assert_series_equal(result[col], expected)
+
+
+def test_ragged_round_trip():
+    groups = [generate_random_intervals(n) for n in [3, 0, 5, 1]]
+    values, offsets = to_ragged(groups)
+
+    assert values.shape == (9, 2)
+    assert np.array_equal(offsets, [0, 3, 3, 8, 9])
+    for group, result in zip(groups, from_ragged(values, offsets)):
+        assert np.array_equal(group, result)
+
+
+@pytest.mark.parametrize("assume_sorted", [False, True])
+def test_select_window(assume_sorted):
+    intervals = np.array([(100, 200), (300, 400), (500, 600), (700, 800)])
+
+    result = select_window(intervals, (350, 700), assume_sorted=assume_sorted)
+    assert np.array_equal(result, [(350, 400), (500, 600)])
+
+    result = select_window(intervals, (350, 700), assume_sorted=assume_sorted, clip=False)
+    assert np.array_equal(result, [(300, 400), (500, 600)])
+
+
+def test_select_window_structured():
+    intervals = generate_random_intervals(50, structured=True)
+    values = interval_values(intervals)
+
+    result = select_window(intervals, (1000, 2000))
+
+    assert result.dtype == intervals.dtype
+    assert np.array_equal(interval_values(result), select_window(values, (1000, 2000)))
+
+
+def test_interval_values_interval_index():
+    intervals = pd.IntervalIndex.from_arrays([0.0, 20.0], [10.0, 30.0], closed="left")
+    assert np.array_equal(interval_values(intervals), [(0, 10), (20, 30)])
+    assert np.array_equal(interval_values(intervals.array), [(0, 10), (20, 30)])
@@ -4,7 +4,18 @@ import pytest
 import numpy as np
 import pandas as pd
 
-from interval_diff.vectorised import interval_difference, intervals_overlapping
+from interval_diff.utils import from_ragged, generate_random_intervals, select_window, to_ragged
+from interval_diff.vectorised import (
+    batch_interval_difference,
+    coverage_depth,
+    difference_counts,
+    difference_coverage,
+    difference_lengths,
+    difference_total_length,
+    interval_difference,
+    interval_consensus,
+    intervals_overlapping,
+)
 
 
 @pytest.mark.parametrize("df", [False, True])
@@ -253,3 +264,368 @@ class TestIntervalDifference:
             intervals_b,
         )
         assert self.results_equal(intervals_a, result)
+
+
+class TestBatchIntervalDifference:
+    @pytest.mark.parametrize("min_len", [0.0, 20.0])
+    def test_matches_single_calls(self, min_len):
+        n_pairs = 20
+        groups_a = [
+            generate_random_intervals(np.random.randint(1, 30), start=100) for _ in range(n_pairs)
+        ]
+        groups_b = [generate_random_intervals(np.random.randint(1, 30)) for _ in range(n_pairs)]
+        a_values, a_offsets = to_ragged(groups_a)
+        b_values, b_offsets = to_ragged(groups_b)
+
+        values, offsets = batch_interval_difference(
+            a_values, a_offsets, b_values, b_offsets, min_len=min_len
+        )
+
+        assert len(offsets) == n_pairs + 1
+        for intervals_a, intervals_b, result in zip(
+            groups_a, groups_b, from_ragged(values, offsets)
+        ):
+            expected = interval_difference(intervals_a, intervals_b, min_len=min_len)
+            assert np.array_equal(expected, result)
+
+    def test_empty_pairs(self):
+        intervals = np.array([(100, 200), (300, 400)])
+        a_values, a_offsets = to_ragged([intervals, np.empty((0, 2)), intervals])
+        b_values, b_offsets = to_ragged([np.empty((0, 2)), intervals, np.array([(150, 350)])])
+
+        values, offsets = batch_interval_difference(a_values, a_offsets, b_values, b_offsets)
+
+        assert np.array_equal(offsets, [0, 2, 2, 4])
+        assert np.array_equal(values, [(100, 200), (300, 400), (100, 150), (350, 400)])
+
+    def test_empty_b_min_len(self):
+        intervals_a = np.array([(100, 102), (110, 200), (300, 305)])
+        groups_a = [intervals_a, intervals_a, intervals_a]
+        groups_b = [np.empty((0, 2)), np.array([(150, 160)]), np.empty((0, 2))]
+        a_values, a_offsets = to_ragged(groups_a)
+        b_values, b_offsets = to_ragged(groups_b)
+
+        values, offsets = batch_interval_difference(
+            a_values, a_offsets, b_values, b_offsets, min_len=5.0
+        )
+
+        assert np.array_equal(offsets, [0, 3, 5, 8])
+        for intervals_a, intervals_b, result in zip(
+            groups_a, groups_b, from_ragged(values, offsets)
+        ):
+            assert np.array_equal(
+                result, interval_difference(intervals_a, intervals_b, min_len=5.0)
+            )
+
+    def test_mismatched_offsets(self):
+        with pytest.raises(ValueError):
+            batch_interval_difference(
+                np.empty((0, 2)), np.array([0, 0]), np.empty((0, 2)), np.array([0, 0, 0])
+            )
+
+
+@pytest.mark.parametrize("df", [False, True])
+class TestIntervalDifferenceGroups:
+    parse_intervals = staticmethod(TestIntervalDifference.parse_intervals)
+    results_equal = staticmethod(TestIntervalDifference.results_equal)
+
+    def test_overlapping_groups(self, df):
+        intervals_a, intervals_b1, intervals_b2, expected = (
+            " (q-----------------)(e------------------)    (r---)",
+            "   (----)         (-----)       (----)              ",
+            "     (-----)          (---)        (---)        (--)",
+            " (q)       (q-----)       (e----)      (e)    (r)   ",
+        )
+        intervals_a = self.parse_intervals(intervals_a, df=df)
+        intervals_b = [
+            self.parse_intervals(intervals_b1, df=df),
+            self.parse_intervals(intervals_b2, df=df),
+        ]
+        expected = self.parse_intervals(expected, df=df)
+
+        result = interval_difference(intervals_a, intervals_b)
+        assert self.results_equal(result, expected)
+
+    def test_matches_sequential(self, df):
+        intervals_a = generate_random_intervals(500, start=100, max_len=100, dataframe=df)
+        groups_b = [
+            generate_random_intervals(200, start=start, max_len=50, dataframe=df)
+            for start in [0, 35, 70]
+        ]
+
+        expected = intervals_a
+        for intervals_b in groups_b:
+            expected = interval_difference(expected, intervals_b, min_len=1.0)
+
+        result = interval_difference(intervals_a, groups_b, min_len=1.0)
+        assert self.results_equal(result, expected)
+
+    def test_empty_groups(self, df):
+        intervals_a = generate_random_intervals(20, dataframe=df)
+        result = interval_difference(intervals_a, [np.empty((0, 2)), np.empty((0, 2))])
+        assert self.results_equal(result, intervals_a)
+
+
+class TestDifferenceReductions:
+    # A     : (----)  (----)  (----)  (----)         (----) (------)
+    # B     :    (---------------)      (------)  (----)      (----)
+    # A \ B : (--)               (-)  (-)              (--) ()
+    intervals_a = np.array(
+        [(100, 200), (300, 400), (500, 600), (700, 800), (1000, 1100), (1250, 1400)]
+    )
+    intervals_b = np.array([(150, 580), (720, 890), (930, 1070), (1300, 1400)])
+
+    def test_lengths(self):
+        result = difference_lengths(self.intervals_a, self.intervals_b)
+        assert np.array_equal(result, [50, 0, 20, 20, 30, 50])
+
+    def test_counts(self):
+        intervals_b = np.concatenate([self.intervals_b, [(1270, 1280)]])
+        intervals_b = intervals_b[np.argsort(intervals_b[:, 0])]
+        result = difference_counts(self.intervals_a, intervals_b)
+        assert np.array_equal(result, [1, 0, 1, 1, 1, 2])
+
+    def test_coverage(self):
+        result = difference_coverage(self.intervals_a, self.intervals_b)
+        assert np.allclose(result, [0.5, 0, 0.2, 0.2, 0.3, 50 / 150])
+
+    def test_empty_b(self):
+        result = difference_lengths(self.intervals_a, np.empty((0, 2)))
+        assert np.array_equal(result, [100, 100, 100, 100, 100, 150])
+
+    @pytest.mark.parametrize("df", [False, True])
+    def test_matches_interval_difference(self, df):
+        intervals_a = generate_random_intervals(500, start=100, max_len=100, dataframe=df)
+        intervals_b = generate_random_intervals(500, start=0, max_len=80, dataframe=df)
+
+        result = interval_difference(intervals_a, intervals_b, min_len=5.0)
+        if df:
+            result = result[["start", "end"]].values
+        expected_total = np.sum(result[:, 1] - result[:, 0])
+
+        lengths = difference_lengths(intervals_a, intervals_b, min_len=5.0)
+        counts = difference_counts(intervals_a, intervals_b, min_len=5.0)
+        assert len(lengths) == len(counts) == len(intervals_a)
+        assert np.isclose(lengths.sum(), expected_total)
+        assert counts.sum() == len(result)
+        assert np.isclose(
+            difference_total_length(intervals_a, intervals_b, min_len=5.0), expected_total
+        )
+
+
+@pytest.mark.parametrize("df", [False, True])
+@pytest.mark.parametrize("assume_sorted", [False, True])
+class TestIntervalDifferenceWindow:
+    @pytest.mark.parametrize("window", [(0, 20000), (3000.5, 4000.5), (5000, 5000.5)])
+    def test_matches_clipped_result(self, window, assume_sorted, df):
+        intervals_a = generate_random_intervals(200, start=100, max_len=100, dataframe=df)
+        intervals_b = generate_random_intervals(200, start=0, max_len=80, dataframe=df)
+
+        result = interval_difference(
+            intervals_a, intervals_b, window=window, assume_sorted=assume_sorted
+        )
+
+        expected = select_window(interval_difference(intervals_a, intervals_b), window)
+        if df:
+            assert list(result.columns) == list(expected.columns)
+            assert (result["tags"].values == expected["tags"].values).all()
+            result, expected = result[["start", "end"]].values, expected[["start", "end"]].values
+        assert np.array_equal(result, expected)
+
+
+@pytest.mark.parametrize("df", [False, True])
+class TestIntervalDifferenceIndices:
+    def test_matches_result(self, df):
+        intervals_a = generate_random_intervals(200, start=100, max_len=100, dataframe=df)
+        intervals_b = generate_random_intervals(200, start=0, max_len=80, dataframe=df)
+
+        starts, ends, indices = interval_difference(intervals_a, intervals_b, return_indices=True)
+
+        expected = interval_difference(intervals_a, intervals_b)
+        if df:
+            assert (intervals_a["tags"].values[indices] == expected["tags"].values).all()
+            expected = expected[["start", "end"]].values
+        assert np.array_equal(np.stack([starts, ends], axis=1), expected)
+
+    def test_rows_of_a(self, df):
+        intervals_a = np.array([(600.0, 700.0), (100.0, 200.0), (1100.0, 1200.0)])
+        intervals_b = np.array([(150.0, 650.0)])
+        if df:
+            intervals_a = pd.DataFrame(intervals_a, columns=["start", "end"])
+            intervals_b = pd.DataFrame(intervals_b, columns=["start", "end"])
+
+        starts, ends, indices = interval_difference(intervals_a, intervals_b, return_indices=True)
+
+        assert np.array_equal(starts, [100, 650, 1100])
+        assert np.array_equal(ends, [150, 700, 1200])
+        assert np.array_equal(indices, [1, 0, 2])
+
+    def test_window(self, df):
+        intervals_a = generate_random_intervals(200, start=100, max_len=100, dataframe=df)
+        intervals_b = generate_random_intervals(200, start=0, max_len=80, dataframe=df)
+        values_a = intervals_a[["start", "end"]].values if df else intervals_a
+
+        starts, ends, indices = interval_difference(
+            intervals_a, intervals_b, window=(3000.5, 6000.5), return_indices=True
+        )
+
+        assert len(indices) > 0
+        assert (values_a[indices, 0] <= starts).all() and (ends <= values_a[indices, 1]).all()
+
+    def test_empty_b(self, df):
+        intervals_a = generate_random_intervals(20, dataframe=df)
+
+        _, _, indices = interval_difference(intervals_a, [], return_indices=True)
+
+        assert np.array_equal(indices, np.arange(20))
+
+
+class TestIntervalDifferenceStructured:
+    @pytest.mark.parametrize("window", [None, (3000.5, 6000.5)])
+    def test_matches_dataframe(self, window):
+        intervals_a = generate_random_intervals(200, start=100, max_len=100, structured=True)
+        intervals_b = generate_random_intervals(200, start=0, max_len=80, structured=True)
+
+        result = interval_difference(intervals_a, intervals_b, min_len=5.0, window=window)
+
+        expected = interval_difference(
+            pd.DataFrame(intervals_a), pd.DataFrame(intervals_b), min_len=5.0, window=window
+        )
+        assert result.dtype == intervals_a.dtype
+        assert pd.DataFrame(result).equals(expected)
+
+    def test_memory_mapped(self, tmp_path):
+        intervals_a = generate_random_intervals(200, start=100, max_len=100, structured=True)
+        intervals_b = generate_random_intervals(200, start=0, max_len=80)
+        np.save(tmp_path / "a.npy", intervals_a)
+
+        result = interval_difference(np.load(tmp_path / "a.npy", mmap_mode="r"), intervals_b)
+
+        assert np.array_equal(result, interval_difference(intervals_a, intervals_b))
+
+    def test_empty_b(self):
+        intervals_a = generate_random_intervals(20, structured=True)
+        assert interval_difference(intervals_a, []) is intervals_a
+
+
+@pytest.mark.parametrize("closed", ["left", "right"])
+@pytest.mark.parametrize("index", [False, True])
+class TestIntervalDifferenceIntervalArray:
+    @staticmethod
+    def to_interval_array(intervals, closed, index):
+        if index:
+            return pd.IntervalIndex.from_arrays(
+                intervals[:, 0], intervals[:, 1], closed=closed, name="labels"
+            )
+        return pd.arrays.IntervalArray.from_arrays(intervals[:, 0], intervals[:, 1], closed=closed)
+
+    def test_matches_array(self, closed, index):
+        intervals_a = generate_random_intervals(200, start=100, max_len=100)
+        groups_b = [generate_random_intervals(100, start=start, max_len=80) for start in [0, 50]]
+
+        result = interval_difference(
+            self.to_interval_array(intervals_a, closed, index),
+            [self.to_interval_array(groups_b[0], closed, index), groups_b[1]],
+            min_len=5.0,
+        )
+
+        expected = interval_difference(intervals_a, groups_b, min_len=5.0)
+        assert type(result) is (pd.IntervalIndex if index else pd.arrays.IntervalArray)
+        assert result.closed == closed
+        assert np.array_equal(result.left, expected[:, 0])
+        assert np.array_equal(result.right, expected[:, 1])
+        if index:
+            assert result.name == "labels"
+
+    def test_mismatched_closed(self, closed, index):
+        intervals = generate_random_intervals(10)
+        other = "right" if closed == "left" else "left"
+        with pytest.raises(ValueError):
+            interval_difference(
+                self.to_interval_array(intervals, closed, index),
+                self.to_interval_array(intervals, other, index),
+            )
+
+    def test_return_indices(self, closed, index):
+        intervals_a = np.array([(600.0, 700.0), (100.0, 200.0)])
+        intervals_b = np.array([(150.0, 650.0)])
+
+        _, _, indices = interval_difference(
+            self.to_interval_array(intervals_a, closed, index), intervals_b, return_indices=True
+        )
+
+        assert np.array_equal(indices, [1, 0])
+
+
+@pytest.mark.parametrize("closed", ["both", "neither"])
+def test_interval_array_closed(closed):
+    intervals = pd.IntervalIndex.from_arrays([0.0, 20.0], [10.0, 30.0], closed=closed)
+    with pytest.raises(ValueError):
+        interval_difference(intervals, np.array([(5.0, 25.0)]))
+
+
+def _grid_depth(interval_groups, grid):
+    return sum(
+        ((grid[:, None] >= intervals[:, 0]) & (grid[:, None] < intervals[:, 1])).any(axis=1)
+        for intervals in interval_groups
+    )
+
+
+class TestConsensus:
+    interval_groups = [
+        np.array([(0, 10), (20, 30)], dtype=float),
+        np.array([(5, 25)], dtype=float),
+        np.array([(8, 9), (22, 40)], dtype=float),
+    ]
+
+    def test_coverage_depth(self):
+        atoms, depth, indices = coverage_depth(self.interval_groups)
+        expected_atoms = [(0, 5), (5, 8), (8, 9), (9, 10), (10, 20), (20, 22), (22, 25), (25, 30)]
+        assert np.array_equal(atoms[: len(expected_atoms)], expected_atoms)
+        assert np.array_equal(depth, [1, 2, 3, 2, 1, 2, 3, 2, 1])
+        assert np.array_equal(indices[2], [0, 0, 0])
+        assert np.array_equal(indices[-1], [-1, -1, 1])
+
+    @pytest.mark.parametrize(
+        "k, expected",
+        [
+            (1, [(0, 40)]),
+            (2, [(5, 10), (20, 30)]),
+            (3, [(8, 9), (22, 25)]),
+        ],
+    )
+    def test_consensus(self, k, expected):
+        assert np.array_equal(interval_consensus(self.interval_groups, k), expected)
+
+    def test_min_len(self):
+        assert np.array_equal(interval_consensus(self.interval_groups, 3, min_len=1), [(22, 25)])
+
+    def test_indices(self):
+        regions, indices, offsets = interval_consensus(
+            self.interval_groups, 2, min_len=5, return_indices=True
+        )
+        assert np.array_equal(regions, [(20, 30)])
+        assert np.array_equal(offsets, [0, 3])
+        assert np.array_equal(indices, [(1, 0, -1), (1, 0, 1), (1, -1, 1)])
+
+    @pytest.mark.parametrize("k", [0, 4])
+    def test_invalid_k(self, k):
+        with pytest.raises(ValueError):
+            interval_consensus(self.interval_groups, k)
+
+    def test_empty(self):
+        regions = interval_consensus([np.empty((0, 2)), np.empty((0, 2))], 1)
+        assert regions.shape == (0, 2)
+
+    @pytest.mark.parametrize("k", [1, 2, 3, 4])
+    def test_random(self, k):
+        interval_groups = [
+            np.round(generate_random_intervals(50, start=10 * i, max_len=200)) for i in range(4)
+        ]
+        grid = np.arange(0, max(intervals[:, 1].max() for intervals in interval_groups)) + 0.5
+
+        regions = interval_consensus(interval_groups, k)
+
+        inside = ((grid[:, None] >= regions[:, 0]) & (grid[:, None] < regions[:, 1])).any(axis=1)
+        assert np.array_equal(inside, _grid_depth(interval_groups, grid) >= k)
+        assert (regions[1:, 0] > regions[:-1, 1]).all()
@@ -0,0 +1,108 @@
+import pytest
+import numpy as np
+
+from interval_diff.divergence import results_equal
+from interval_diff.utils import generate_random_intervals
+from interval_diff.vectorised import (
+    atomize_intervals,
+    difference_counts,
+    difference_lengths,
+    difference_total_length,
+    interval_difference,
+)
+from interval_diff.workspace import Workspace
+
+
+class TestWorkspace:
+    def test_buffer_reused(self):
+        workspace = Workspace()
+        buffer = workspace.buffer("x", (10, 2))
+        smaller = workspace.buffer("x", 5)
+
+        assert buffer.shape == (10, 2) and smaller.shape == (5,)
+        assert np.shares_memory(buffer, smaller)
+        assert workspace.n_allocations == 1
+
+    def test_buffer_grows(self):
+        workspace = Workspace(growth=2.0)
+        workspace.buffer("x", 10)
+        workspace.buffer("x", 11)
+        workspace.buffer("x", 20)
+
+        assert workspace.n_allocations == 2
+        assert workspace.nbytes == 20 * 8
+
+    def test_buffer_dtype(self):
+        workspace = Workspace()
+        workspace.buffer("x", 10)
+        buffer = workspace.buffer("x", 10, dtype=bool)
+
+        assert buffer.dtype == bool
+        assert workspace.n_allocations == 2
+
+    def test_arange(self):
+        workspace = Workspace()
+        assert np.array_equal(workspace.arange(1, 6), np.arange(1, 6))
+        assert np.array_equal(workspace.arange(0, 3), np.arange(3))
+        assert workspace.n_allocations == 1
+
+    def test_invalid_growth(self):
+        with pytest.raises(ValueError):
+            Workspace(growth=0.5)
+
+
+class TestWorkspacePipeline:
+    @pytest.mark.parametrize("df", [False, True])
+    @pytest.mark.parametrize("min_len", [0.0, 10.0])
+    def test_interval_difference(self, df, min_len):
+        workspace = Workspace()
+        for n in [50, 200, 100, 0, 200]:
+            intervals_a = generate_random_intervals(n, start=100, max_len=100, dataframe=df)
+            intervals_b = generate_random_intervals(n, start=0, max_len=80, dataframe=df)
+
+            result = interval_difference(
+                intervals_a, intervals_b, min_len=min_len, workspace=workspace
+            )
+
+            expected = interval_difference(intervals_a, intervals_b, min_len=min_len)
+            assert results_equal(result, expected)
+
+    @pytest.mark.parametrize("exclusive", [False, True])
+    def test_atomize_intervals(self, exclusive):
+        groups = [generate_random_intervals(100, start=10 * i) for i in range(3)]
+        workspace = Workspace()
+        atomize_intervals(groups, exclusive=exclusive, workspace=workspace)
+
+        atoms, indices = atomize_intervals(groups, exclusive=exclusive, workspace=workspace)
+
+        expected_atoms, expected_indices = atomize_intervals(groups, exclusive=exclusive)
+        assert np.array_equal(atoms, expected_atoms)
+        assert np.array_equal(indices, expected_indices)
+
+    def test_steady_state_allocations(self):
+        workspace = Workspace()
+        intervals_a = generate_random_intervals(1000, start=100)
+        intervals_b = generate_random_intervals(1000)
+        interval_difference(intervals_a, intervals_b, workspace=workspace)
+        n_allocations = workspace.n_allocations
+
+        for _ in range(5):
+            interval_difference(intervals_a[:500], intervals_b, workspace=workspace)
+
+        assert workspace.n_allocations == n_allocations
+
+    @pytest.mark.parametrize(
+        "reduction", [difference_lengths, difference_counts, difference_total_length]
+    )
+    def test_reductions(self, reduction):
+        workspace = Workspace()
+        intervals_a = generate_random_intervals(1000, start=100, max_len=100)
+        intervals_b = generate_random_intervals(1000, max_len=80)
+        reduction(intervals_a, intervals_b, min_len=5.0, workspace=workspace)
+        n_allocations = workspace.n_allocations
+
+        result = reduction(intervals_a[:500], intervals_b, min_len=5.0, workspace=workspace)
+
+        # Atoms are reduced in the workspace, so nothing the size of A \ B is allocated
+        assert workspace.n_allocations == n_allocations
+        assert np.allclose(result, reduction(intervals_a[:500], intervals_b, min_len=5.0))